@@ -0,0 +1,215 @@
+import time
+import shutil
+import argparse
+import tempfile
+import tracemalloc
+import numpy as np
+import pandas as pd
+
+from data_preparation_utils import (relevant_cols, select_columns, read_raw_data, filter_kfz_rows, rename_columns,
+                                    remove_leading_zeros, standardize_kfz_categories, transform_kfz_data,
+                                    fix_missing_values, fix_missing_values_bulk)
+from main import stage_ingest_pop, stage_ingest_vee, stage_ingest_svu, stage_merge, stage_normalize
+from synthetic_data_utils import generate_raw_data
+from data_preparation_polars import prepare_kfz_data
+
+
+# Größenstufen des Benchmarks: Anzahl der synthetischen Kreise (je Kreis 80 Zeilen in den KFZ-Rohdaten)
+benchmark_tiers = {'klein': 400, 'mittel': 2000, 'gross': 10000}
+
+# Faktor, ab dem eine Laufzeit gegenüber der Vergleichsmessung als Verschlechterung gilt
+regression_tolerance = 1.5
+
+# Laufzeiten unter dieser Schwelle (Sekunden) werden beim Vergleich nicht bewertet, sie schwanken zu stark
+min_compare_seconds = 0.05
+
+
+def measure(func, repeat: int = 3) -> dict:
+    """
+    Misst Laufzeit und Spitzenspeicher einer Funktion ohne Argumente.
+
+    Die Laufzeit ist das Minimum aus repeat Läufen ohne tracemalloc, der Spitzenspeicher wird in einem
+    zusätzlichen Lauf mit tracemalloc gemessen (erfasst Python- und NumPy-Allokationen).
+
+    Args:
+        func: Funktion ohne Argumente
+        repeat: Anzahl der Läufe für die Zeitmessung
+
+    Returns:
+        Dictionary mit 'sekunden' und 'peak_mb'
+    """
+    seconds = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        seconds.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {'sekunden': min(seconds), 'peak_mb': peak / 2**20}
+
+
+def benchmark_tier(n_regions: int, root: str, repeat: int = 3, seed: int = 42) -> list:
+    """
+    Erzeugt synthetische Rohdaten mit n_regions Kreisen und misst die einzelnen Aufbereitungsschritte.
+
+    Jeder Schritt erhält die Ergebnisse der vorherigen Schritte als Eingabe, sodass die Messungen
+    den Datenfluss in main.py abbilden.
+
+    Args:
+        n_regions: Anzahl der Kreise
+        root: Verzeichnis für die Rohdaten
+        repeat: Anzahl der Läufe für die Zeitmessung
+        seed: Startwert des Zufallsgenerators
+
+    Returns:
+        Liste von Dictionaries mit 'stufe', 'zeilen' (Eingabezeilen), 'sekunden' und 'peak_mb'
+    """
+    files = generate_raw_data(root, n_regions=n_regions, overwrite=True, seed=seed)[None]
+    results = []
+
+    def run(name, func, n_rows):
+        results.append({'stufe': name, 'zeilen': n_rows, **measure(func, repeat)})
+        return func()
+
+    # Einlesen
+    df_raw = pd.read_csv(files['kfz'], sep=';', dtype=str)
+    run('read_raw_data_kfz', lambda: read_raw_data(files['kfz'], relevant_cols, row_filter=filter_kfz_rows, decimal='.'), len(df_raw))
+    run('select_columns', lambda: select_columns(df_raw, relevant_cols), len(df_raw))
+    df_kfz = read_raw_data(files['kfz'], relevant_cols, row_filter=filter_kfz_rows, decimal='.')
+
+    # Umbenennung, Kategorien und Pivotierung
+    df_kfz = run('rename_columns', lambda: rename_columns(df_kfz, relevant_cols), len(df_kfz))
+    df_kfz = run('remove_leading_zeros', lambda: remove_leading_zeros(df_kfz), len(df_kfz))
+    df_std = run('standardize_kfz_categories', lambda: standardize_kfz_categories(df_kfz), len(df_kfz))
+    run('transform_kfz_data_pandas', lambda: transform_kfz_data(df_std, engine='pandas'), len(df_std))
+    df_pivot = run('transform_kfz_data_matrix', lambda: transform_kfz_data(df_std, engine='matrix'), len(df_std))
+
+    # Einlesen bis Pivotierung als ein Abfrageplan in Polars (ohne Gebietsreform wie read_raw_data oben)
+    run('prepare_kfz_data_polars', lambda: prepare_kfz_data(files['kfz'], relevant_cols, gebietsreform='drop'), len(df_raw))
+
+    # Weitere Quellen
+    inputs = {
+        **stage_ingest_pop({'raw': files['pop']}, relevant_cols),
+        **stage_ingest_vee({'raw': files['vee']}, relevant_cols),
+        **stage_ingest_svu({'raw': files['svu']}, relevant_cols)
+    }
+
+    # Korrektur fehlender Werte: zeilenweise und gesammelt auf denselben Eingaben
+    df_left = df_pivot.merge(inputs['vee'][['landkreis_id', 'vee']], on='landkreis_id', how='left')
+    run('fix_missing_values', lambda: fix_missing_values(df_left.copy(), inputs['vee'], 'vee'), len(df_left))
+    run('fix_missing_values_bulk', lambda: fix_missing_values_bulk(df_left.copy(), inputs['vee'], 'vee'), len(df_left))
+
+    # Zusammenführen und Normierung wie in main.py
+    df_merged = run('merge', lambda: stage_merge({'kfz': df_pivot, **inputs})['kfz_kombiniert'], len(df_pivot))
+    run('normalize', lambda: stage_normalize({'kfz_kombiniert': df_merged}), len(df_merged))
+
+    return results
+
+
+def scaling_exponents(df_results: pd.DataFrame) -> pd.DataFrame:
+    """
+    Schätzt je Stufe den Exponenten k in sekunden ~ zeilen^k über alle Größenstufen
+    (Steigung der Regressionsgeraden im doppelt logarithmischen Maßstab). Werte deutlich über 1
+    weisen auf ein überlineares Wachstum hin.
+
+    Args:
+        df_results: Ergebnisse mit den Spalten 'stufe', 'zeilen', 'sekunden' und 'peak_mb'
+
+    Returns:
+        DataFrame mit den Spalten 'stufe', 'exponent_zeit' und 'exponent_speicher'
+    """
+    rows = []
+    for stage, group in df_results.groupby('stufe', sort=False):
+        if group['zeilen'].nunique() < 2:
+            continue
+        x = np.log(group['zeilen'].to_numpy(dtype='float64'))
+        rows.append({
+            'stufe': stage,
+            'exponent_zeit': np.polyfit(x, np.log(np.maximum(group['sekunden'], 1e-6)), 1)[0],
+            'exponent_speicher': np.polyfit(x, np.log(np.maximum(group['peak_mb'], 1e-6)), 1)[0]
+        })
+    return pd.DataFrame(rows, columns=['stufe', 'exponent_zeit', 'exponent_speicher'])
+
+
+def compare_baseline(df_results: pd.DataFrame, baseline_path: str, tolerance: float = regression_tolerance) -> pd.DataFrame:
+    """
+    Vergleicht die Ergebnisse mit einer gespeicherten Messung und liefert die Verschlechterungen.
+
+    Args:
+        df_results: Aktuelle Ergebnisse
+        baseline_path: CSV-Datei einer früheren Messung (siehe main, Option --output)
+        tolerance: Faktor, ab dem eine Laufzeit oder ein Spitzenspeicher als Verschlechterung gilt
+
+    Returns:
+        DataFrame mit den Stufen, deren Laufzeit oder Speicher um mehr als tolerance gestiegen ist
+    """
+    df_baseline = pd.read_csv(baseline_path)
+    df = df_results.merge(df_baseline, on=['groesse', 'stufe'], suffixes=('', '_vorher'))
+    df['faktor_zeit'] = df['sekunden'] / df['sekunden_vorher']
+    df['faktor_speicher'] = df['peak_mb'] / df['peak_mb_vorher'].where(df['peak_mb_vorher'] > 0)
+
+    slower = (df['faktor_zeit'] > tolerance) & (df['sekunden'] >= min_compare_seconds)
+    larger = df['faktor_speicher'] > tolerance
+    return df.loc[slower | larger, ['groesse', 'stufe', 'sekunden_vorher', 'sekunden', 'faktor_zeit',
+                                    'peak_mb_vorher', 'peak_mb', 'faktor_speicher']]
+
+
+def main(tiers: list, repeat: int, output: str, baseline: str, tolerance: float, seed: int):
+    """
+    Führt den Benchmark für die ausgewählten Größenstufen aus und gibt Laufzeiten,
+    Spitzenspeicher und Skalierungsexponenten aus.
+    """
+    root = tempfile.mkdtemp(prefix='benchmark_')
+    frames = []
+    try:
+        for tier in tiers:
+            print(f"Größenstufe '{tier}' mit {benchmark_tiers[tier]} Kreisen ...")
+            df_tier = pd.DataFrame(benchmark_tier(benchmark_tiers[tier], root, repeat=repeat, seed=seed))
+            df_tier.insert(0, 'groesse', tier)
+            frames.append(df_tier)
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+    df_results = pd.concat(frames, ignore_index=True)
+    with pd.option_context('display.float_format', '{:.3f}'.format, 'display.width', 200):
+        print(df_results.to_string(index=False))
+        if len(tiers) > 1:
+            print("\nSkalierung (Exponent k in Aufwand ~ Zeilen^k):")
+            print(scaling_exponents(df_results).to_string(index=False))
+
+    if output:
+        df_results.to_csv(output, index=False)
+        print(f"Ergebnisse gespeichert in {output}")
+
+    if baseline:
+        df_regressions = compare_baseline(df_results, baseline, tolerance)
+        if not df_regressions.empty:
+            print(f"\nVerschlechterungen gegenüber {baseline} (Faktor > {tolerance}):")
+            print(df_regressions.to_string(index=False))
+            raise SystemExit(1)
+        print(f"\nKeine Verschlechterungen gegenüber {baseline}")
+
+
+def parse_args() -> argparse.Namespace:
+    """
+    Liest die Kommandozeilenargumente.
+    """
+    parser = argparse.ArgumentParser(description="Benchmark der Datenaufbereitung mit synthetischen GENESIS-Rohdaten")
+    parser.add_argument('--tiers', nargs='+', choices=list(benchmark_tiers), default=['klein', 'mittel'],
+                        help=f"Größenstufen ({', '.join(f'{k}: {v} Kreise' for k, v in benchmark_tiers.items())})")
+    parser.add_argument('--repeat', type=int, default=3, help="Anzahl der Läufe für die Zeitmessung")
+    parser.add_argument('--output', metavar='CSV', help="Ergebnisse als CSV speichern (Vergleichsmessung)")
+    parser.add_argument('--baseline', metavar='CSV', help="Mit einer gespeicherten Messung vergleichen, Exit-Code 1 bei Verschlechterung")
+    parser.add_argument('--tolerance', type=float, default=regression_tolerance, help="Faktor für Verschlechterungen")
+    parser.add_argument('--seed', type=int, default=42, help="Startwert des Zufallsgenerators")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    main(**vars(parse_args()))
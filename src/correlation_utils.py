@@ -0,0 +1,214 @@
+import argparse
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+from scipy import stats
+
+
+# Anzahl Zeilen je Block beim Einlesen von Dateien
+correlation_chunksize = 100000
+
+
+# Ein Korrelationszustand wird als Dictionary beschrieben und kann mit merge_states zusammengeführt werden.
+# Alle Kennzahlen gelten paarweise über die Zeilen, in denen beide Spalten einen Wert haben:
+#   'columns':  Liste der Spalten (Reihenfolge der Matrizen)
+#   'n':        k×k Anzahl gemeinsamer Werte
+#   'mean':     k×k, mean[i, j] ist der Mittelwert von Spalte i über die gemeinsamen Zeilen von i und j
+#   'm2':       k×k, Summe der quadrierten Abweichungen von Spalte i über dieselben Zeilen
+#   'comoment': k×k, Summe der Produkte der Abweichungen von Spalte i und j (symmetrisch)
+
+
+def empty_state(columns: list) -> dict:
+    """
+    Erstellt einen leeren Korrelationszustand für die angegebenen Spalten.
+    """
+    k = len(columns)
+    return {'columns': list(columns), 'n': np.zeros((k, k)), 'mean': np.zeros((k, k)),
+            'm2': np.zeros((k, k)), 'comoment': np.zeros((k, k))}
+
+
+def state_from_frame(df: pd.DataFrame, columns: list = None) -> dict:
+    """
+    Berechnet den Korrelationszustand eines Blocks in vektorisierter Form.
+
+    Die Werte werden vor der Summenbildung um den Spaltenmittelwert des Blocks verschoben, damit
+    Summen großer Zahlen nicht zur Auslöschung führen. Fehlende Werte werden paarweise ausgelassen.
+
+    Args:
+        df: Block mit numerischen Spalten
+        columns: Zu korrelierende Spalten, bei None alle numerischen Spalten
+
+    Returns:
+        Korrelationszustand (siehe oben)
+    """
+    columns = list(columns) if columns is not None else list(df.select_dtypes('number').columns)
+    X = df[columns].to_numpy(dtype='float64', na_value=np.nan)
+    present = ~np.isnan(X)
+    M = present.astype('float64')
+
+    # Verschiebung um den Mittelwert des Blocks (Spalten ohne Werte werden nicht verschoben)
+    with np.errstate(invalid='ignore'):
+        counts = present.sum(axis=0)
+        shift = np.where(counts > 0, np.nansum(X, axis=0) / np.maximum(counts, 1), 0.0)
+    Z = np.where(present, X - shift, 0.0)
+
+    n = M.T @ M                     # gemeinsame Werte je Paar
+    S = Z.T @ M                     # S[i, j]: Summe von Spalte i über die gemeinsamen Zeilen von i und j
+    Q = (Z * Z).T @ M               # Summe der Quadrate von Spalte i über dieselben Zeilen
+    P = Z.T @ Z                     # Summe der Produkte (nur Zeilen mit beiden Werten sind ungleich 0)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean_shifted = np.where(n > 0, S / n, 0.0)
+    m2 = Q - S * mean_shifted
+    comoment = P - S * mean_shifted.T
+    return {
+        'columns': columns,
+        'n': n,
+        'mean': mean_shifted + shift[:, None],
+        'm2': np.maximum(m2, 0.0),
+        'comoment': comoment
+    }
+
+
+def merge_states(*states: dict) -> dict:
+    """
+    Führt Korrelationszustände von Blöcken oder Jahrgängen paarweise nach Chan et al. zusammen.
+
+    Args:
+        *states: Zustände mit identischen Spalten
+
+    Returns:
+        Gesamtzustand
+    """
+    if len({tuple(state['columns']) for state in states}) > 1:
+        raise ValueError("Korrelationszustände mit unterschiedlichen Spalten können nicht zusammengeführt werden")
+
+    merged = {key: (value.copy() if isinstance(value, np.ndarray) else list(value)) for key, value in states[0].items()}
+    for state in states[1:]:
+        na, nb = merged['n'], state['n']
+        n = na + nb
+        with np.errstate(invalid='ignore', divide='ignore'):
+            weight = np.where(n > 0, nb / n, 0.0)
+            factor = np.where(n > 0, na * nb / n, 0.0)
+        delta = state['mean'] - merged['mean']
+
+        merged['mean'] = merged['mean'] + delta * weight
+        merged['m2'] = merged['m2'] + state['m2'] + delta ** 2 * factor
+        merged['comoment'] = merged['comoment'] + state['comoment'] + delta * delta.T * factor
+        merged['n'] = n
+    return merged
+
+
+def correlate_chunks(chunks, columns: list = None) -> dict:
+    """
+    Berechnet den Korrelationszustand über beliebig viele Blöcke, ohne sie gemeinsam im Speicher zu halten.
+
+    Args:
+        chunks: Iterable über DataFrames (z.B. pd.read_csv mit chunksize oder Jahrgänge eines Panels)
+        columns: Zu korrelierende Spalten, bei None die numerischen Spalten des ersten Blocks
+
+    Returns:
+        Gesamtzustand
+    """
+    state = None
+    for chunk in chunks:
+        chunk_state = state_from_frame(chunk, columns)
+        columns = chunk_state['columns']
+        state = chunk_state if state is None else merge_states(state, chunk_state)
+    if state is None:
+        return empty_state(columns or [])
+    return state
+
+
+def iter_file_chunks(file_path: str, columns: list = None, chunksize: int = correlation_chunksize, **kwargs):
+    """
+    Liest eine CSV- oder Parquet-Datei blockweise, nur mit den angegebenen Spalten.
+    """
+    if file_path.endswith('.parquet'):
+        for batch in pq.ParquetFile(file_path).iter_batches(batch_size=chunksize, columns=columns):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(file_path, usecols=columns, chunksize=chunksize, **kwargs)
+
+
+def correlation_matrix(state: dict, min_periods: int = 2) -> dict:
+    """
+    Berechnet Korrelationen, Kovarianzen und p-Werte aus einem Korrelationszustand.
+
+    Die Korrelation entspricht DataFrame.corr() (Pearson, paarweise vollständige Zeilen), der p-Wert
+    dem zweiseitigen t-Test aus scipy.stats.pearsonr mit n - 2 Freiheitsgraden.
+
+    Args:
+        state: Korrelationszustand
+        min_periods: Mindestanzahl gemeinsamer Werte, darunter ist das Ergebnis NaN
+
+    Returns:
+        Dictionary mit den DataFrames 'corr', 'p_value', 'cov' und 'n' (Spalten × Spalten)
+    """
+    n, m2, comoment = state['n'], state['m2'], state['comoment']
+    valid = n >= max(min_periods, 2)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        corr = np.where(valid, comoment / np.sqrt(m2 * m2.T), np.nan)
+        corr = np.clip(corr, -1.0, 1.0)
+        cov = np.where(valid, comoment / (n - 1), np.nan)
+
+        # t-Statistik, bei |r| = 1 ist der p-Wert 0
+        dof = n - 2
+        t = corr * np.sqrt(dof / ((1.0 - corr) * (1.0 + corr)))
+        p_value = np.where(valid & (dof > 0), 2 * stats.t.sf(np.abs(t), np.maximum(dof, 1)), np.nan)
+    p_value[valid & (np.abs(corr) == 1.0)] = 0.0
+
+    columns = state['columns']
+    return {
+        'corr': pd.DataFrame(corr, index=columns, columns=columns),
+        'p_value': pd.DataFrame(p_value, index=columns, columns=columns),
+        'cov': pd.DataFrame(cov, index=columns, columns=columns),
+        'n': pd.DataFrame(n.astype('int64'), index=columns, columns=columns)
+    }
+
+
+def correlation_table(state: dict, min_periods: int = 2) -> pd.DataFrame:
+    """
+    Liefert die Korrelationen aller Spaltenpaare im Langformat (ohne Diagonale, jedes Paar einmal).
+
+    Returns:
+        DataFrame mit den Spalten 'spalte_1', 'spalte_2', 'korrelation', 'p_wert' und 'anzahl'
+    """
+    result = correlation_matrix(state, min_periods)
+    i, j = np.triu_indices(len(state['columns']), k=1)
+    columns = np.array(state['columns'], dtype=object)
+    return pd.DataFrame({
+        'spalte_1': columns[i],
+        'spalte_2': columns[j],
+        'korrelation': result['corr'].to_numpy()[i, j],
+        'p_wert': result['p_value'].to_numpy()[i, j],
+        'anzahl': result['n'].to_numpy()[i, j]
+    })
+
+
+def main(file_path: str, columns: list, chunksize: int, sep: str, encoding: str):
+    """
+    Gibt Korrelationen und p-Werte einer Datei aus, ohne sie vollständig in den Speicher zu laden.
+    """
+    kwargs = {} if file_path.endswith('.parquet') else {'sep': sep, 'encoding': encoding}
+    state = correlate_chunks(iter_file_chunks(file_path, columns, chunksize, **kwargs), columns)
+    with pd.option_context('display.float_format', '{:.4f}'.format, 'display.width', 200):
+        print(correlation_table(state).to_string(index=False))
+
+
+def parse_args() -> argparse.Namespace:
+    """
+    Liest die Kommandozeilenargumente.
+    """
+    parser = argparse.ArgumentParser(description="Blockweise Korrelation (Pearson) mit p-Werten für CSV- oder Parquet-Dateien")
+    parser.add_argument('file_path', metavar='DATEI', help="CSV- oder Parquet-Datei (z.B. data/processed/regression_data.parquet)")
+    parser.add_argument('--columns', nargs='+', metavar='SPALTE', help="Zu korrelierende Spalten (Standard: alle numerischen)")
+    parser.add_argument('--chunksize', type=int, default=correlation_chunksize, help="Anzahl Zeilen je Block")
+    parser.add_argument('--sep', default=',', help="Trennzeichen bei CSV (Standard: ',')")
+    parser.add_argument('--encoding', default='utf-8', help="Zeichenkodierung bei CSV")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    main(**vars(parse_args()))
@@ -5,34 +5,126 @@ import altair as alt
 from typing import List, Optional
 
 
-def create_table_figure_matplotlib(df: pd.DataFrame, description: str = '') -> None:
+# Zeilen je Tabellenseite und maximale Zeichen je Zelle (längere Inhalte werden gekürzt)
+table_page_size = 50
+table_max_chars = 60
+
+# Anzahl der Zeilen, an denen die Breite von Textspalten gemessen wird
+width_sample_size = 200
+
+
+def get_table_page(df: pd.DataFrame, page: int = 0, page_size: int = table_page_size) -> tuple:
+    """Liefert eine Seite eines DataFrames
+    
+    Args:
+        df: Der DataFrame
+        page: Nummer der Seite (beginnend bei 0)
+        page_size: Anzahl Zeilen je Seite. Bei None wird der gesamte DataFrame als eine Seite behandelt
+        
+    Returns:
+        Tuple aus der Seite (DataFrame) und der Anzahl der Seiten
+    """
+    if page_size is None or len(df) <= page_size:
+        return df, 1
+    n_pages = -(-len(df) // page_size)
+    if not 0 <= page < n_pages:
+        raise ValueError(f"Seite {page} existiert nicht, die Tabelle hat {n_pages} Seiten")
+    return df.iloc[page * page_size:(page + 1) * page_size], n_pages
+
+
+def get_page_caption(description: str, df: pd.DataFrame, page: int, page_size: int, n_pages: int) -> str:
+    """Ergänzt die Beschreibung einer Tabelle um die Seitenangabe, falls die Tabelle mehrere Seiten hat
+    """
+    if n_pages == 1:
+        return description
+    first = page * page_size + 1
+    last = min((page + 1) * page_size, len(df))
+    return f"{description} (Seite {page + 1} von {n_pages}, Zeilen {first}-{last} von {len(df)})".strip()
+
+
+def truncate_cells(df: pd.DataFrame, max_chars: int = table_max_chars) -> pd.DataFrame:
+    """Wandelt die Zellen in Text um und kürzt Inhalte über max_chars Zeichen
+    
+    Args:
+        df: Der DataFrame (nur die angezeigte Seite)
+        max_chars: Maximale Anzahl Zeichen je Zelle
+        
+    Returns:
+        DataFrame mit Text-Zellen
+    """
+    df = df.astype(str)
+    for col in df.columns:
+        too_long = df[col].str.len() > max_chars
+        if too_long.any():
+            df.loc[too_long, col] = df.loc[too_long, col].str.slice(0, max_chars - 1) + '…'
+    return df
+
+
+def estimate_column_widths(df: pd.DataFrame, max_chars: int = table_max_chars,
+                           sample_size: int = width_sample_size) -> dict:
+    """Schätzt die Textbreite je Spalte ohne alle Zellen in Text umzuwandeln
+    
+    Numerische Spalten werden über Minimum und Maximum bemessen, Kategorien über ihre Ausprägungen
+    und übrige Spalten über eine gleichmäßig verteilte Stichprobe von sample_size Zeilen.
+    
+    Args:
+        df: Der DataFrame
+        max_chars: Obergrenze je Spalte (wie truncate_cells)
+        sample_size: Anzahl der gemessenen Zeilen für Textspalten
+        
+    Returns:
+        Dictionary {Spalte: geschätzte Anzahl Zeichen einschließlich Kopfzeile}
+    """
+    positions = np.unique(np.linspace(0, len(df) - 1, min(len(df), sample_size)).astype(int))
+    widths = {}
+    for i, col in enumerate(df.columns):
+        series = df.iloc[:, i]
+        if pd.api.types.is_bool_dtype(series.dtype):
+            content_length = 5
+        elif pd.api.types.is_numeric_dtype(series.dtype):
+            extremes = series.agg(['min', 'max']).dropna()
+            content_length = int(extremes.astype(str).str.len().max()) if len(extremes) else 3
+        elif isinstance(series.dtype, pd.CategoricalDtype):
+            content_length = int(series.cat.categories.astype(str).str.len().max()) if len(series.cat.categories) else 3
+        else:
+            sample = series.iloc[positions].astype(str)
+            content_length = int(sample.str.len().max()) if len(sample) else 3
+        widths[col] = min(max(len(str(col)), content_length), max_chars)
+    return widths
+
+
+def create_table_figure_matplotlib(df: pd.DataFrame, description: str = '', page: int = 0,
+                                   page_size: int = table_page_size, max_chars: int = table_max_chars) -> None:
     """Erstellt eine Tabellenabbildung mit matplotlib
     
+    Es wird nur die gewählte Seite dargestellt, Zellinhalte werden auf max_chars Zeichen gekürzt.
+    
     Args:
         df: Der zu visualisierende DataFrame
         description: Die Beschreibung unter der Abbildung
+        page: Nummer der dargestellten Seite (beginnend bei 0)
+        page_size: Anzahl Zeilen je Seite, bei None alle Zeilen
+        max_chars: Maximale Anzahl Zeichen je Zelle
     """
-    # Berechne maximale Textlänge für jede Spalte (Header + Inhalt)
-    max_lengths = {}
-    for col in df.columns:
-        # Berücksichtige Kopfzeile und Inhalt
-        header_length = len(str(col))
-        content_length = df[col].astype(str).map(len).max()
-        max_lengths[col] = max(header_length, content_length)
+    df_page, n_pages = get_table_page(df, page, page_size)
+    description = get_page_caption(description, df, page, page_size, n_pages)
+    
+    # Schätze die Textlänge für jede Spalte (Header + Inhalt) ohne alle Zellen umzuwandeln
+    max_lengths = estimate_column_widths(df_page, max_chars)
     
     # Berechne relative Breiten (Total = 1.0)
     total_length = sum(max_lengths.values())
     col_widths = {col: length/total_length for col, length in max_lengths.items()}
     
     # Erstelle Figure mit dynamischer Höhe
-    fig_height = len(df) * 0.25
+    fig_height = len(df_page) * 0.25
     fig, ax = plt.subplots(figsize=(15, fig_height))
     ax.axis('tight')
     ax.axis('off')
     
     # Erstelle Tabelle
-    table = ax.table(cellText=df.values,
-                    colLabels=df.columns,
+    table = ax.table(cellText=truncate_cells(df_page, max_chars).values,
+                    colLabels=df_page.columns,
                     loc='center',
                     cellLoc='left')
     
@@ -42,7 +134,7 @@ def create_table_figure_matplotlib(df: pd.DataFrame, description: str = '') -> N
     
     # Wende berechnete Spaltenbreiten an
     for (row, col), cell in table.get_celld().items():
-        cell.set_width(col_widths[df.columns[col]])
+        cell.set_width(col_widths[df_page.columns[col]])
         cell.PAD = 0.01
         cell.set_text_props(wrap=True)
         if row == 0:  # Kopfzeile
@@ -53,16 +145,20 @@ def create_table_figure_matplotlib(df: pd.DataFrame, description: str = '') -> N
         plt.figtext(0.5, 0.02, description, wrap=True, horizontalalignment='center', fontsize=10)
     plt.show()
 
-def create_table_figure_pandas(df: pd.DataFrame, description: str = '') -> None:
+def style_table(df: pd.DataFrame, description: str = '', max_chars: int = table_max_chars):
     """
-    Erstellt eine formatierte Tabellenansicht mit Pandas Styler.
+    Formatiert einen DataFrame mit Pandas Styler (gekürzte Zellen, ohne Index).
     
     Args:
-        df: Der zu visualisierende DataFrame
+        df: Der zu formatierende DataFrame (nur die angezeigte Seite)
         description: Die Beschreibung unter der Tabelle
+        max_chars: Maximale Anzahl Zeichen je Zelle
+        
+    Returns:
+        pandas Styler
     """
     # Erstelle einen Styler mit angepasstem Format und verstecktem Index
-    styled_df = df.style\
+    return truncate_cells(df, max_chars).style\
         .hide(axis='index')\
         .set_properties(**{
             'text-align': 'left',
@@ -92,11 +188,67 @@ def create_table_figure_pandas(df: pd.DataFrame, description: str = '') -> None:
                  ('border', '1px solid black')
              ]}
         ])
+
+def create_table_figure_pandas(df: pd.DataFrame, description: str = '', page: int = 0,
+                               page_size: int = table_page_size, max_chars: int = table_max_chars) -> None:
+    """
+    Erstellt eine formatierte Tabellenansicht mit Pandas Styler.
+    
+    Es wird nur die gewählte Seite formatiert und ausgegeben.
+    
+    Args:
+        df: Der zu visualisierende DataFrame
+        description: Die Beschreibung unter der Tabelle
+        page: Nummer der dargestellten Seite (beginnend bei 0)
+        page_size: Anzahl Zeilen je Seite, bei None alle Zeilen
+        max_chars: Maximale Anzahl Zeichen je Zelle
+    """
+    df_page, n_pages = get_table_page(df, page, page_size)
+    styled_df = style_table(df_page, get_page_caption(description, df, page, page_size, n_pages), max_chars)
     
     # Zeige die formatierte Tabelle
     display(styled_df)
 
-def create_table_figure(df: pd.DataFrame, description: str = '', use_pandas: bool = False) -> None:
+def create_paged_table(df: pd.DataFrame, description: str = '', page_size: int = table_page_size,
+                       max_chars: int = table_max_chars):
+    """
+    Erstellt eine blätterbare HTML-Tabelle (ipywidgets). Beim Blättern wird jeweils nur die
+    sichtbare Seite formatiert und an das Frontend übertragen.
+    
+    Args:
+        df: Der zu visualisierende DataFrame
+        description: Die Beschreibung unter der Tabelle
+        page_size: Anzahl Zeilen je Seite
+        max_chars: Maximale Anzahl Zeichen je Zelle
+        
+    Returns:
+        ipywidgets.VBox mit Navigation und Tabelle
+    """
+    import ipywidgets as widgets
+    
+    n_pages = get_table_page(df, 0, page_size)[1]
+    table = widgets.HTML()
+    label = widgets.Label()
+    previous_button = widgets.Button(description='Zurück', icon='arrow-left')
+    next_button = widgets.Button(description='Weiter', icon='arrow-right')
+    state = {'page': 0}
+    
+    def show(page):
+        state['page'] = page
+        df_page = get_table_page(df, page, page_size)[0]
+        table.value = style_table(df_page, get_page_caption(description, df, page, page_size, n_pages), max_chars).to_html()
+        label.value = f"Seite {page + 1} von {n_pages}"
+        previous_button.disabled = page == 0
+        next_button.disabled = page == n_pages - 1
+    
+    previous_button.on_click(lambda _: show(state['page'] - 1))
+    next_button.on_click(lambda _: show(state['page'] + 1))
+    show(0)
+    
+    return widgets.VBox([widgets.HBox([previous_button, label, next_button]), table])
+
+def create_table_figure(df: pd.DataFrame, description: str = '', use_pandas: bool = False, page: int = 0,
+                        page_size: int = table_page_size, max_chars: int = table_max_chars) -> None:
     """
     Erstellt eine Tabellenabbildung aus einem DataFrame.
     
@@ -104,11 +256,14 @@ def create_table_figure(df: pd.DataFrame, description: str = '', use_pandas: boo
         df: Der zu visualisierende DataFrame
         description: Die Beschreibung unter der Abbildung
         use_pandas: Wenn True, wird Pandas Styler verwendet, sonst matplotlib (Standard: False)
+        page: Nummer der dargestellten Seite (beginnend bei 0)
+        page_size: Anzahl Zeilen je Seite, bei None alle Zeilen (Standard: table_page_size)
+        max_chars: Maximale Anzahl Zeichen je Zelle (Standard: table_max_chars)
     """
     if use_pandas:
-        create_table_figure_pandas(df, description)
+        create_table_figure_pandas(df, description, page, page_size, max_chars)
     else:
-        create_table_figure_matplotlib(df, description)
+        create_table_figure_matplotlib(df, description, page, page_size, max_chars)
 
 def create_stacked_bar_chart(df, id_vars, var_name, value_name, x_axis_title, chart_title):
     """
@@ -147,11 +302,137 @@ def create_stacked_bar_chart(df, id_vars, var_name, value_name, x_axis_title, ch
     
     return chart
 
+def axis_domain(xmin: float, xmax: float):
+    """Liefert den Wertebereich der x-Achse, ohne Werte (leere oder vollständig fehlende Spalte)
+    bleibt die Skala automatisch und das Diagramm leer
+    """
+    if pd.isna(xmin) or pd.isna(xmax):
+        return alt.Undefined
+    return [xmin, xmax]
+
+
+def nice_bin_edges(values: np.ndarray, maxbins: int = 30) -> np.ndarray:
+    """Bestimmt Klassengrenzen mit "runder" Klassenbreite (1, 2 oder 5 mal Zehnerpotenz) wie alt.Bin(maxbins)
+    
+    Args:
+        values: Endliche Werte
+        maxbins: Maximale Anzahl der Klassen
+        
+    Returns:
+        Array der Klassengrenzen
+    """
+    vmin, vmax = float(values.min()), float(values.max())
+    span = vmax - vmin
+    if span == 0:
+        return np.array([vmin - 0.5, vmin + 0.5])
+    base = 10 ** np.floor(np.log10(span / maxbins))
+    step = next(base * f for f in (1, 2, 5, 10) if span / (base * f) <= maxbins)
+    start = np.floor(vmin / step) * step
+    stop = np.ceil(vmax / step) * step
+    if stop <= vmax:
+        stop += step
+    return np.arange(start, stop + step / 2, step)
+
+
+def compute_histogram(values: np.ndarray, maxbins: int = 30) -> pd.DataFrame:
+    """Berechnet die Häufigkeiten je Klasse
+    
+    Args:
+        values: Werte (fehlende Werte werden ignoriert)
+        maxbins: Maximale Anzahl der Klassen
+        
+    Returns:
+        DataFrame mit den Spalten 'bin_start', 'bin_end' und 'anzahl'
+    """
+    values = values[np.isfinite(values)]
+    if len(values) == 0:
+        return pd.DataFrame({'bin_start': [], 'bin_end': [], 'anzahl': []})
+    counts, edges = np.histogram(values, bins=nice_bin_edges(values, maxbins))
+    return pd.DataFrame({'bin_start': edges[:-1], 'bin_end': edges[1:], 'anzahl': counts})
+
+
+def compute_box_stats(values: np.ndarray, max_outliers: int = 1000) -> tuple:
+    """Berechnet die Kennzahlen eines Boxplots (Whisker nach Tukey, 1,5-facher Quartilsabstand)
+    
+    Args:
+        values: Werte (fehlende Werte werden ignoriert)
+        max_outliers: Maximale Anzahl dargestellter Ausreißer. Bei mehr unterschiedlichen
+            Ausreißern werden gleichmäßig verteilte Quantile der Ausreißer verwendet
+        
+    Returns:
+        Tuple aus:
+        - DataFrame mit einer Zeile und den Spalten 'lower', 'q1', 'median', 'q3', 'upper'
+        - DataFrame mit der Spalte 'value' für die Ausreißer
+    """
+    values = values[np.isfinite(values)]
+    if len(values) == 0:
+        return (pd.DataFrame(columns=['lower', 'q1', 'median', 'q3', 'upper'], dtype='float64'),
+                pd.DataFrame({'value': np.array([], dtype='float64')}))
+    q1, median, q3 = np.quantile(values, [0.25, 0.5, 0.75])
+    iqr = q3 - q1
+    inside = values[(values >= q1 - 1.5 * iqr) & (values <= q3 + 1.5 * iqr)]
+    outliers = np.unique(values[(values < q1 - 1.5 * iqr) | (values > q3 + 1.5 * iqr)])
+    if len(outliers) > max_outliers:
+        outliers = np.quantile(outliers, np.linspace(0, 1, max_outliers))
+    stats = pd.DataFrame({'lower': [inside.min()], 'q1': [q1], 'median': [median], 'q3': [q3], 'upper': [inside.max()]})
+    return stats, pd.DataFrame({'value': outliers})
+
+
+def compute_kde(values: np.ndarray, n_grid: int = 512, bandwidth: float = None) -> pd.DataFrame:
+    """Schätzt die Dichte mit Gauß-Kern über eine FFT-Faltung auf einem festen Gitter
+    
+    Die Werte werden linear auf das Gitter verteilt, die Faltung mit dem Kern kostet dann
+    O(n_grid log n_grid) unabhängig von der Anzahl der Werte.
+    
+    Args:
+        values: Werte (fehlende Werte werden ignoriert)
+        n_grid: Anzahl der Gitterpunkte
+        bandwidth: Bandbreite. Bei None Faustregel wie transform_density in Vega
+            (1,06 · min(Standardabweichung, Quartilsabstand / 1,34) · n^(-1/5))
+        
+    Returns:
+        DataFrame mit den Spalten 'value' und 'density' über dem Wertebereich der Daten
+    """
+    values = values[np.isfinite(values)]
+    n = len(values)
+    if n == 0:
+        return pd.DataFrame({'value': np.array([], dtype='float64'), 'density': np.array([], dtype='float64')})
+    if bandwidth is None:
+        q1, q3 = np.quantile(values, [0.25, 0.75])
+        spread = min(values.std(ddof=1), (q3 - q1) / 1.34) if n > 1 else 0
+        bandwidth = 1.06 * spread * n ** (-0.2) if spread > 0 else 1.0
+    
+    # Gitter um drei Bandbreiten erweitern, damit die Randbereiche vollständig erfasst werden
+    lo, hi = values.min() - 3 * bandwidth, values.max() + 3 * bandwidth
+    grid = np.linspace(lo, hi, n_grid)
+    delta = grid[1] - grid[0]
+    
+    # Lineare Verteilung jedes Werts auf die beiden benachbarten Gitterpunkte
+    position = (values - lo) / delta
+    left = np.clip(np.floor(position).astype(int), 0, n_grid - 2)
+    weight_right = position - left
+    counts = np.bincount(left, weights=1 - weight_right, minlength=n_grid) \
+        + np.bincount(left + 1, weights=weight_right, minlength=n_grid)
+    
+    # Faltung mit dem Gauß-Kern über die FFT (mit Nullen aufgefüllt, keine zyklische Überlappung)
+    offsets = np.arange(-(n_grid - 1), n_grid) * delta
+    kernel = np.exp(-0.5 * (offsets / bandwidth) ** 2) / (np.sqrt(2 * np.pi) * bandwidth * n)
+    size = 2 ** int(np.ceil(np.log2(3 * n_grid)))
+    density = np.fft.irfft(np.fft.rfft(counts, size) * np.fft.rfft(kernel, size), size)[n_grid - 1:2 * n_grid - 1]
+    
+    inside = (grid >= values.min()) & (grid <= values.max())
+    return pd.DataFrame({'value': grid[inside], 'density': np.maximum(density[inside], 0)})
+
+
 def create_distribution_plot(df: pd.DataFrame, column_name: str, observation_label: str, 
-                           xmin: float = None, xmax: float = None, width: int = 400) -> alt.VConcatChart:
+                           xmin: float = None, xmax: float = None, width: int = 400,
+                           precompute: bool = False) -> alt.VConcatChart:
     """
     Erstellt eine kombinierte Visualisierung aus Histogramm und Boxplot.
     
+    Mit precompute=True werden Klassenhäufigkeiten und Boxplot-Kennzahlen in NumPy berechnet und
+    nur diese Tabellen an Altair übergeben, die Diagrammgröße hängt dann nicht von der Zeilenzahl ab.
+    
     Args:
     df (pd.DataFrame): DataFrame mit den zu visualisierenden Daten
     column_name (str): Name der zu visualisierenden Spalte
@@ -159,6 +440,7 @@ def create_distribution_plot(df: pd.DataFrame, column_name: str, observation_lab
     xmin (float, optional): Minimumwert der x-Achse. Bei None wird Auto-Skalierung verwendet
     xmax (float, optional): Maximumwert der x-Achse. Bei None wird Auto-Skalierung verwendet
     width (int): Breite der Diagramme in Pixeln
+    precompute (bool): Kennzahlen vorab berechnen statt im Browser (Standard: False)
     
     Returns:
         alt.VConcatChart: Kombiniertes Diagramm aus Histogramm und Boxplot
@@ -171,31 +453,35 @@ def create_distribution_plot(df: pd.DataFrame, column_name: str, observation_lab
     if xmax is None:
         xmax = df[column_name].max()
     
-    histogram = alt.Chart(df).mark_bar().encode(
-        x=alt.X(f'{column_name}:Q',
-                bin=alt.Bin(maxbins=30),
-                title='',
-                axis=alt.Axis(grid=True),
-                scale=alt.Scale(domain=[xmin, xmax])),
-        y=alt.Y('count():Q',
-                title=f'Anzahl {observation_label}')
-    ).properties(
-        width=width,
-        height=200
-    )
+    if precompute:
+        histogram, boxplot = create_precomputed_distribution_charts(
+            df[column_name].to_numpy(dtype='float64', na_value=np.nan), column_name, observation_label, xmin, xmax, width)
+    else:
+        histogram = alt.Chart(df).mark_bar().encode(
+            x=alt.X(f'{column_name}:Q',
+                    bin=alt.Bin(maxbins=30),
+                    title='',
+                    axis=alt.Axis(grid=True),
+                    scale=alt.Scale(domain=axis_domain(xmin, xmax))),
+            y=alt.Y('count():Q',
+                    title=f'Anzahl {observation_label}')
+        ).properties(
+            width=width,
+            height=200
+        )
 
-    boxplot = alt.Chart(df).mark_boxplot(
-        median={'color': 'white'},
-        color='#57A44C'
-    ).encode(
-        x=alt.X(f'{column_name}:Q',
-                title=f'{column_name} (%)',
-                axis=alt.Axis(grid=True),
-                scale=alt.Scale(domain=[xmin, xmax]))
-    ).properties(
-        width=width,
-        height=50
-    )
+        boxplot = alt.Chart(df).mark_boxplot(
+            median={'color': 'white'},
+            color='#57A44C'
+        ).encode(
+            x=alt.X(f'{column_name}:Q',
+                    title=f'{column_name} (%)',
+                    axis=alt.Axis(grid=True),
+                    scale=alt.Scale(domain=axis_domain(xmin, xmax)))
+        ).properties(
+            width=width,
+            height=50
+        )
 
     combined_chart = alt.vconcat(histogram, boxplot).properties(
         title={
@@ -207,11 +493,55 @@ def create_distribution_plot(df: pd.DataFrame, column_name: str, observation_lab
     
     return combined_chart
 
+def create_precomputed_distribution_charts(values: np.ndarray, column_name: str, observation_label: str,
+                                           xmin: float, xmax: float, width: int) -> tuple:
+    """Erstellt Histogramm und Boxplot aus vorab berechneten Kennzahlen (siehe create_distribution_plot)
+    
+    Returns:
+        Tuple aus Histogramm und Boxplot (alt.Chart bzw. alt.LayerChart)
+    """
+    scale = alt.Scale(domain=axis_domain(xmin, xmax))
+    
+    histogram = alt.Chart(compute_histogram(values)).mark_bar().encode(
+        x=alt.X('bin_start:Q',
+                bin='binned',
+                title='',
+                axis=alt.Axis(grid=True),
+                scale=scale),
+        x2='bin_end:Q',
+        y=alt.Y('anzahl:Q',
+                title=f'Anzahl {observation_label}')
+    ).properties(
+        width=width,
+        height=200
+    )
+    
+    # Boxplot aus Whiskern, Box, Median und Ausreißern zusammensetzen
+    df_stats, df_outliers = compute_box_stats(values)
+    base = alt.Chart(df_stats)
+    whiskers = base.mark_rule(color='#57A44C').encode(
+        x=alt.X('lower:Q', title=f'{column_name} (%)', axis=alt.Axis(grid=True), scale=scale),
+        x2='upper:Q'
+    )
+    box = base.mark_bar(size=14, color='#57A44C').encode(x='q1:Q', x2='q3:Q')
+    median = base.mark_tick(color='white', size=14).encode(x='median:Q')
+    outliers = alt.Chart(df_outliers).mark_point(color='#57A44C').encode(x='value:Q')
+    boxplot = alt.layer(whiskers, box, median, outliers).properties(
+        width=width,
+        height=50
+    )
+    
+    return histogram, boxplot
+
 def create_density_plot(df: pd.DataFrame, column_name: str, observation_label: str, 
-                       xmin: float = None, xmax: float = None, width: int = 400) -> alt.Chart:
+                       xmin: float = None, xmax: float = None, width: int = 400,
+                       precompute: bool = False) -> alt.Chart:
     """
     Erstellt eine Visualisierung der Dichteverteilung (KDE-Plot).
     
+    Mit precompute=True wird die Dichte per FFT auf einem festen Gitter berechnet (compute_kde)
+    und nur das Gitter an Altair übergeben.
+    
     Args:
         df: DataFrame mit den zu visualisierenden Daten
         column_name: Name der zu visualisierenden Spalte
@@ -219,6 +549,7 @@ def create_density_plot(df: pd.DataFrame, column_name: str, observation_label: s
         xmin: Minimumwert der x-Achse. Bei None wird Auto-Skalierung verwendet
         xmax: Maximumwert der x-Achse. Bei None wird Auto-Skalierung verwendet
         width: Breite des Diagramms in Pixeln
+        precompute: Dichte vorab berechnen statt im Browser (Standard: False)
     
     Returns:
         alt.Chart: Dichteverteilungsdiagramm
@@ -231,16 +562,22 @@ def create_density_plot(df: pd.DataFrame, column_name: str, observation_label: s
     if xmax is None:
         xmax = df[column_name].max()
     
-    density_plot = alt.Chart(df).transform_density(
-        column_name,
-        as_=[column_name, 'density']
-    ).mark_area(
+    if precompute:
+        df_kde = compute_kde(df[column_name].to_numpy(dtype='float64', na_value=np.nan))
+        chart = alt.Chart(df_kde.rename(columns={'value': column_name}))
+    else:
+        chart = alt.Chart(df).transform_density(
+            column_name,
+            as_=[column_name, 'density']
+        )
+    
+    density_plot = chart.mark_area(
         opacity=0.7,
         color='#57A44C'
     ).encode(
         x=alt.X(f'{column_name}:Q',
                 title=f'{observation_label}',
-                scale=alt.Scale(domain=[xmin, xmax])),
+                scale=alt.Scale(domain=axis_domain(xmin, xmax))),
         y=alt.Y('density:Q',
                 title='Wahrscheinlichkeitsdichte'),
         tooltip=[
@@ -255,16 +592,103 @@ def create_density_plot(df: pd.DataFrame, column_name: str, observation_label: s
     
     return density_plot
 
+# Zeilenbudget je Diagramm, entspricht der Standardgrenze von Altair (MaxRowsError)
+max_chart_rows = 5000
+
+
+def sample_rows(df: pd.DataFrame, max_points: int, strata: Optional[str] = None, random_state: int = 42) -> pd.DataFrame:
+    """Zieht eine (optional geschichtete) Zufallsstichprobe mit höchstens max_points Zeilen
+    
+    Args:
+        df: Der DataFrame, aus dem gezogen wird
+        max_points: Maximale Anzahl der Zeilen
+        strata: Spalte, deren Gruppen anteilig vertreten sein sollen. Jede Gruppe erhält mindestens eine
+            Zeile, solange das Budget reicht, sonst werden nur die größten Gruppen berücksichtigt
+        random_state: Startwert des Zufallsgenerators
+        
+    Returns:
+        DataFrame mit der Stichprobe in ursprünglicher Reihenfolge
+    """
+    if len(df) <= max_points:
+        return df
+    rng = np.random.default_rng(random_state)
+    if strata is None:
+        positions = rng.choice(len(df), size=max_points, replace=False)
+    else:
+        # Anteilige Ziehung je Gruppe über eine zufällige Reihenfolge innerhalb der Gruppen
+        codes, _ = pd.factorize(df[strata], use_na_sentinel=False)
+        sizes = np.bincount(codes)
+        quota = np.zeros(len(sizes), dtype=int)
+        if len(sizes) >= max_points:
+            # Budget reicht nicht für alle Gruppen: je eine Zeile aus den größten Gruppen
+            quota[np.lexsort((rng.random(len(sizes)), -sizes))[:max_points]] = 1
+        else:
+            # Eine Zeile je Gruppe, der Rest anteilig nach dem Verfahren der größten Reste
+            share = (sizes - 1) * (max_points - len(sizes)) / (len(df) - len(sizes))
+            quota = 1 + np.floor(share).astype(int)
+            remainder = max_points - quota.sum()
+            quota[np.argsort(np.floor(share) - share, kind='stable')[:remainder]] += 1
+        rank = pd.Series(rng.random(len(df))).groupby(codes).rank(method='first').to_numpy()
+        positions = np.flatnonzero(rank <= quota[codes])
+    return df.iloc[np.sort(positions)]
+
+
+def bin_pairs(df: pd.DataFrame, list_row: List[str], list_col: List[str], bins: int) -> pd.DataFrame:
+    """Zählt die Beobachtungen je Spaltenpaar in einem rechteckigen 2D-Raster
+    
+    Args:
+        df: Der DataFrame mit den Daten
+        list_row: Spaltennamen für die Y-Achsen
+        list_col: Spaltennamen für die X-Achsen
+        bins: Anzahl der Klassen je Achse
+        
+    Returns:
+        DataFrame im Langformat mit den Spalten 'zeile', 'spalte', 'x', 'x2', 'y', 'y2', 'anzahl'
+        (nur belegte Zellen)
+    """
+    values = {col: df[col].to_numpy(dtype='float64', na_value=np.nan) for col in set(list_row) | set(list_col)}
+    frames = []
+    for row_name in list_row:
+        for col_name in list_col:
+            x, y = values[col_name], values[row_name]
+            valid = np.isfinite(x) & np.isfinite(y)
+            if not valid.any():
+                continue
+            counts, x_edges, y_edges = np.histogram2d(x[valid], y[valid], bins=bins)
+            ix, iy = np.nonzero(counts)
+            frames.append(pd.DataFrame({
+                'zeile': row_name,
+                'spalte': col_name,
+                'x': x_edges[ix], 'x2': x_edges[ix + 1],
+                'y': y_edges[iy], 'y2': y_edges[iy + 1],
+                'anzahl': counts[ix, iy].astype(int)
+            }))
+    if not frames:
+        return pd.DataFrame(columns=['zeile', 'spalte', 'x', 'x2', 'y', 'y2', 'anzahl'])
+    return pd.concat(frames, ignore_index=True)
+
+
 def create_scatterplot_grid(df: pd.DataFrame, 
                           list_row: Optional[List[str]] = None, 
                           list_col: Optional[List[str]] = None, 
                           width: int = 150, 
-                          height: int = 150) -> alt.Chart:
+                          height: int = 150,
+                          mode: str = 'points',
+                          bins: int = 30,
+                          max_rows: int = max_chart_rows,
+                          strata: Optional[str] = None) -> alt.Chart:
     """
     Erstellt ein Raster von Streudiagrammen für die angegebenen Spalten eines DataFrames.
     Diese Funktion generiert ein Grid von Streudiagrammen unter Verwendung von Altair, 
     wobei jedes Diagramm die Beziehung zwischen zwei Variablen darstellt.
 
+    Für große Datensätze werden die Daten vor der Übergabe an Altair verdichtet, die Größe der
+    Diagramm-Spezifikation bleibt dann unabhängig von der Anzahl der Beobachtungen:
+    - mode='bin': 2D-Häufigkeiten je Spaltenpaar als Rechtecke, die Anzahl der Klassen wird so
+      begrenzt, dass alle Zellen zusammen höchstens max_rows Zeilen ergeben
+    - mode='sample': Streudiagramme einer Stichprobe mit höchstens max_rows Zeilen,
+      mit strata anteilig je Gruppe (z.B. je Jahr)
+
     Args:
         df: Der DataFrame, der die zu plottenden Daten enthält
         list_row: Liste der Spaltennamen für die Y-Achsen. 
@@ -273,6 +697,10 @@ def create_scatterplot_grid(df: pd.DataFrame,
                  Wenn None, werden alle Spalten des DataFrames verwendet
         width: Breite jedes einzelnen Plots in Pixeln (Standard: 150)
         height: Höhe jedes einzelnen Plots in Pixeln (Standard: 150)
+        mode: 'points' (alle Beobachtungen), 'bin' oder 'sample' (Standard: 'points')
+        bins: Maximale Anzahl der Klassen je Achse für mode='bin' (Standard: 30)
+        max_rows: Zeilenbudget der übergebenen Daten für mode='bin' und mode='sample'
+        strata: Spalte für die geschichtete Stichprobe bei mode='sample'
 
     Returns:
         Ein Altair-Chart-Objekt, das das Raster von Streudiagrammen darstellt
@@ -288,6 +716,36 @@ def create_scatterplot_grid(df: pd.DataFrame,
     if list_col is None:
         list_col = df.columns.tolist()
     
+    if mode == 'bin':
+        # Klassenanzahl so wählen, dass alle Spaltenpaare zusammen im Zeilenbudget bleiben
+        bins = max(1, min(bins, int(np.sqrt(max_rows / (len(list_row) * len(list_col))))))
+        df_bins = bin_pairs(df, list_row, list_col, bins)
+        
+        chart = alt.Chart(df_bins).mark_rect().encode(
+            x=alt.X('x:Q', title=None, scale=alt.Scale(zero=False)),
+            x2='x2:Q',
+            y=alt.Y('y:Q', title=None, scale=alt.Scale(zero=False)),
+            y2='y2:Q',
+            color=alt.Color('anzahl:Q', title='Anzahl', scale=alt.Scale(type='log', scheme='blues')),
+            tooltip=['spalte:N', 'zeile:N', 'anzahl:Q']
+        ).properties(
+            width=width,
+            height=height
+        ).facet(
+            row=alt.Row('zeile:N', sort=list_row, title=None),
+            column=alt.Column('spalte:N', sort=list_col, title=None)
+        ).resolve_scale(
+            x='independent',
+            y='independent'
+        )
+        return chart
+    
+    if mode == 'sample':
+        columns = list(dict.fromkeys(list_row + list_col))
+        df = sample_rows(df, max_rows, strata=strata)[columns]
+    elif mode != 'points':
+        raise ValueError(f"Unbekannter mode '{mode}', erlaubt sind 'points', 'bin' und 'sample'")
+    
     chart = alt.Chart(df).mark_circle().encode(
         x=alt.X(alt.repeat("column"),
                 type='quantitative',
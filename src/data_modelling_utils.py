@@ -1,5 +1,789 @@
+import heapq
+import math
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Tuple
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from scipy.linalg import cho_solve, solve_triangular
+from sklearn.linear_model import LinearRegression
+
+
 y_label = "euro4"
 features = ["vee", "unfaelle_je_10k_kfz", "elektro", "pih", "euro2", "euro3", "euro6dt"]
 
 #X = df_regr[features]
-#y = df_regr[y_label]
\ No newline at end of file
+#y = df_regr[y_label]
+
+# Relative Toleranz, unterhalb der ein Feature als linear abhängig von den übrigen gilt
+collinearity_tol = 1e-10
+
+
+def calculate_adjusted_r2(X: pd.DataFrame,
+                        y: pd.Series,
+                        model: LinearRegression = None) -> float:
+    """
+    Berechnet das angepasste R² für ein lineares Regressionsmodell.
+
+    Args:
+        X (pd.DataFrame): Features/Prädiktoren Matrix
+        y (pd.Series): Zielvariable
+        model (LinearRegression, optional): Vortrainiertes lineares Regressionsmodell.
+            Falls None, wird ein neues Modell erstellt und trainiert.
+
+    Returns:
+        float: Angepasstes Bestimmtheitsmaß (R²)
+            - Wertebereich: (-∞, 1]
+            - 1: perfekte Vorhersage
+            - 0: Modell ist nicht besser als der Mittelwert
+            - < 0: Modell ist schlechter als der Mittelwert
+            - Berücksichtigt die Anzahl der Features (p) und Beobachtungen (n)
+            - Formel: 1 - (1 - R²) * (n-1)/(n-p-1)
+    """
+    if model is None:
+        model = LinearRegression()
+        model.fit(X, y)
+    n, p = X.shape  # n: Anzahl der Beobachtungen, p: Anzahl der Features
+    r2 = model.score(X, y)  # Bestimmtheitsmaß R²
+    return 1 - (1 - r2) * (n - 1) / (n - p - 1)
+
+
+def adjusted_r2_from_rss(rss, tss: float, n: int, p) -> np.ndarray:
+    """
+    Berechnet das angepasste R² aus Residuenquadratsumme und totaler Quadratsumme.
+
+    Args:
+        rss: Residuenquadratsumme (Skalar oder Array)
+        tss: Totale Quadratsumme der Zielvariable um ihren Mittelwert
+        n: Anzahl der Beobachtungen
+        p: Anzahl der Features (Skalar oder Array)
+
+    Returns:
+        Angepasstes R², Formel: 1 - (1 - R²) * (n-1)/(n-p-1)
+    """
+    return 1 - (rss / tss) * (n - 1) / (n - np.asarray(p) - 1)
+
+
+def compute_cross_products(X: pd.DataFrame, y: pd.Series) -> dict:
+    """
+    Berechnet die zentrierten Kreuzprodukte XᵀX, Xᵀy und yᵀy einmalig.
+
+    Durch die Zentrierung ist der Achsenabschnitt bereits berücksichtigt, alle weiteren
+    Kennzahlen einer linearen Regression mit Achsenabschnitt lassen sich daraus ableiten.
+
+    Args:
+        X: Feature-Matrix
+        y: Zielvariable
+
+    Returns:
+        Dictionary mit:
+        - 'features': Liste der Featurenamen
+        - 'n': Anzahl der Beobachtungen
+        - 'xtx': zentrierte Matrix XᵀX (p × p)
+        - 'xty': zentrierter Vektor Xᵀy (p)
+        - 'tss': totale Quadratsumme von y
+    """
+    X_values = X.to_numpy(dtype='float64')
+    y_values = np.asarray(y, dtype='float64')
+    X_centered = X_values - X_values.mean(axis=0)
+    y_centered = y_values - y_values.mean()
+
+    return {
+        'features': list(X.columns),
+        'n': X_values.shape[0],
+        'xtx': X_centered.T @ X_centered,
+        'xty': X_centered.T @ y_centered,
+        'tss': float(y_centered @ y_centered)
+    }
+
+
+def find_collinear_features(xtx: np.ndarray, tol: float = collinearity_tol) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Bestimmt über eine schrittweise Cholesky-Zerlegung, welche Features linear von den
+    vorherigen Features abhängen (z.B. Anteile, die sich zu 100 % aufsummieren).
+
+    Args:
+        xtx: zentrierte Matrix XᵀX
+        tol: Relative Toleranz für die Restvarianz eines Features
+
+    Returns:
+        Tuple aus:
+        - Indizes der unabhängigen Features
+        - Cholesky-Faktor L (untere Dreiecksmatrix) von XᵀX der unabhängigen Features
+    """
+    p = xtx.shape[0]
+    kept = []
+    L = np.zeros((p, p))
+    for k in range(p):
+        m = len(kept)
+        if m == 0:
+            l = np.zeros(0)
+        else:
+            l = solve_triangular(L[:m, :m], xtx[kept, k], lower=True)
+        residual = xtx[k, k] - l @ l
+        # Konstante Features und Features, die sich aus den vorherigen ergeben, werden ausgeschlossen
+        if residual > tol * max(xtx[k, k], 1e-300):
+            L[m, :m] = l
+            L[m, m] = np.sqrt(residual)
+            kept.append(k)
+    m = len(kept)
+    return np.array(kept, dtype=int), L[:m, :m]
+
+
+def backward_elimination(X: pd.DataFrame,
+                       y: pd.Series,
+                       verbose: bool = True,
+                       engine: str = 'gram',
+                       n_jobs: int = None) -> Tuple[List[str], float, List[Dict]]:
+    """
+    Führt eine Rückwärtselimination basierend auf dem adjustierten R² durch.
+
+    Mit engine='gram' werden die Kreuzprodukte einmalig berechnet. Die Residuenquadratsumme nach
+    dem Entfernen eines Features j ergibt sich aus RSS + β_j² / (XᵀX)⁻¹_jj, sodass alle Kandidaten
+    einer Runde gemeinsam als Vektoroperation bewertet werden. Nach jedem Ausschluss wird die
+    Inverse per Rang-1-Update verkleinert, statt neu berechnet zu werden. Linear abhängige Features
+    (z.B. vollständige Anteilsgruppen) werden zu Beginn entfernt, da ihr Ausschluss die RSS nicht
+    verändert und das adjustierte R² erhöht.
+
+    Mit engine='sklearn' wird wie bisher je Kandidat ein LinearRegression-Modell angepasst, die
+    Kandidaten einer Runde laufen dabei parallel (n_jobs).
+
+    Args:
+        X (pd.DataFrame): Feature-Matrix
+        y (pd.Series): Zielvariable
+        verbose (bool): Wenn True, werden Zwischenergebnisse ausgegeben
+        engine (str): 'gram' (Kreuzprodukte) oder 'sklearn' (Neuanpassung je Kandidat)
+        n_jobs (int): Anzahl paralleler Prozesse für engine='sklearn' (None: sequentiell)
+
+    Returns:
+        Tuple[List[str], float, List[Dict]]:
+            - Liste der besten Features
+            - Finales adjustiertes R²
+            - Historie der Elimination
+    """
+    if engine == 'sklearn':
+        return backward_elimination_sklearn(X, y, verbose=verbose, n_jobs=n_jobs)
+    if engine != 'gram':
+        raise ValueError(f"Unbekannte engine '{engine}', erlaubt sind 'gram' und 'sklearn'")
+
+    cross = compute_cross_products(X, y)
+    n, tss = cross['n'], cross['tss']
+    features = cross['features'].copy()
+    elimination_history = []
+
+    # Inverse und Koeffizienten des vollständigen Modells (nur unabhängige Features)
+    kept, L = find_collinear_features(cross['xtx'])
+    inverse = cho_solve((L, True), np.eye(len(kept)))
+    beta = inverse @ cross['xty'][kept]
+    rss = tss - cross['xty'][kept] @ beta
+
+    best_adj_r2 = float(adjusted_r2_from_rss(rss, tss, n, len(features)))
+
+    if verbose:
+        print(f"Start mit {len(features)} Features, Adj. R² = {best_adj_r2:.4f}")
+
+    def record(removed_feature):
+        elimination_history.append({
+            'step': len(elimination_history) + 1,
+            'removed_feature': removed_feature,
+            'adj_r2': best_adj_r2,
+            'n_features': len(features)
+        })
+        if verbose:
+            print(f"Feature '{removed_feature}' entfernt: Adj. R² = {best_adj_r2:.4f}")
+
+    # Abhängige Features verändern die RSS nicht, ihr Ausschluss verbessert das adjustierte R²
+    for index in sorted(set(range(len(features))) - set(kept)):
+        if len(features) <= 1:
+            break
+        candidate = float(adjusted_r2_from_rss(rss, tss, n, len(features) - 1))
+        if candidate <= best_adj_r2:
+            break
+        features.remove(cross['features'][index])
+        best_adj_r2 = candidate
+        record(cross['features'][index])
+    features_kept = [cross['features'][k] for k in kept]
+
+    while len(features_kept) > 1 and len(features) == len(features_kept):
+        # Zunahme der RSS für alle Kandidaten gleichzeitig
+        rss_candidates = rss + beta ** 2 / np.diag(inverse)
+        adj_candidates = adjusted_r2_from_rss(rss_candidates, tss, n, len(features) - 1)
+        j = int(np.argmax(adj_candidates))
+
+        # Prüfe ob Verbesserung
+        if adj_candidates[j] <= best_adj_r2:
+            break
+
+        # Rang-1-Update von Inverse und Koeffizienten nach Ausschluss von Feature j
+        rest = np.arange(len(features_kept)) != j
+        column = inverse[rest, j]
+        beta = beta[rest] - column * beta[j] / inverse[j, j]
+        inverse = inverse[np.ix_(rest, rest)] - np.outer(column, column) / inverse[j, j]
+        rss = rss_candidates[j]
+
+        removed_feature = features_kept.pop(j)
+        features.remove(removed_feature)
+        best_adj_r2 = float(adj_candidates[j])
+        record(removed_feature)
+
+    return features.copy(), best_adj_r2, elimination_history
+
+
+def backward_elimination_sklearn(X: pd.DataFrame,
+                               y: pd.Series,
+                               verbose: bool = True,
+                               n_jobs: int = None) -> Tuple[List[str], float, List[Dict]]:
+    """
+    Rückwärtselimination durch Neuanpassung eines LinearRegression-Modells je Kandidat.
+    Referenz für backward_elimination(engine='gram'), Argumente und Rückgabe wie dort.
+    """
+    features = list(X.columns)
+    elimination_history = []
+
+    # Initiales Modell
+    best_adj_r2 = calculate_adjusted_r2(X, y)
+    best_features = features.copy()
+
+    if verbose:
+        print(f"Start mit {len(features)} Features, Adj. R² = {best_adj_r2:.4f}")
+
+    while len(features) > 1:
+        # Evaluiere alle möglichen Feature-Kombinationen parallel
+        scores = Parallel(n_jobs=n_jobs)(
+            delayed(calculate_adjusted_r2)(X[[f for f in features if f != feature]], y) for feature in features)
+        results = dict(zip(features, scores))
+
+        # Finde bestes Ergebnis
+        best_feature = max(results.items(), key=lambda x: x[1])
+
+        # Prüfe ob Verbesserung
+        if best_feature[1] > best_adj_r2:
+            removed_feature = best_feature[0]
+            best_adj_r2 = best_feature[1]
+            features.remove(removed_feature)
+            best_features = features.copy()
+
+            elimination_history.append({
+                'step': len(elimination_history) + 1,
+                'removed_feature': removed_feature,
+                'adj_r2': best_adj_r2,
+                'n_features': len(features)
+            })
+
+            if verbose:
+                print(f"Feature '{removed_feature}' entfernt: Adj. R² = {best_adj_r2:.4f}")
+        else:
+            break
+
+    return best_features, best_adj_r2, elimination_history
+
+
+# Kreuzproduktmatrix, die jeder Prozess der Teilmengensuche einmalig beim Start erhält
+worker_cross_products = None
+
+
+def build_augmented_matrix(cross: dict) -> np.ndarray:
+    """
+    Setzt die zentrierten Kreuzprodukte zur erweiterten Matrix [[XᵀX, Xᵀy], [yᵀX, yᵀy]] zusammen.
+    Die Features werden dabei auf Einheitsvarianz skaliert, was die wiederholten Sweeps stabilisiert.
+    """
+    scale = np.sqrt(np.diag(cross['xtx']))
+    p = len(scale)
+    A = np.empty((p + 1, p + 1))
+    A[:p, :p] = cross['xtx'] / np.outer(scale, scale)
+    A[:p, p] = A[p, :p] = cross['xty'] / scale
+    A[p, p] = cross['tss']
+    return A
+
+
+def sweep(A: np.ndarray, k: int, reverse: bool = False) -> None:
+    """
+    Wendet den Sweep-Operator auf Index k der Matrix A an (in-place).
+
+    Nach dem Sweep aller Indizes einer Teilmenge S steht in A[-1, -1] die Residuenquadratsumme
+    der Regression von y auf die Features in S. Der Rückwärts-Sweep (reverse=True) nimmt ein
+    Feature wieder heraus.
+    """
+    d = A[k, k]
+    col = A[:, k].copy()
+    row = A[k, :].copy()
+    A -= np.outer(col, row) / d
+    sign = -1.0 if reverse else 1.0
+    A[:, k] = sign * col / d
+    A[k, :] = sign * row / d
+    A[k, k] = -1.0 / d
+
+
+def init_subset_worker(cross_products: np.ndarray) -> None:
+    """
+    Initialisiert einen Prozess der Teilmengensuche mit der gemeinsamen Kreuzproduktmatrix.
+    """
+    global worker_cross_products
+    worker_cross_products = cross_products
+
+
+def search_subset_block(prefix: int, n_prefix: int, top_k: int, cross_products: np.ndarray = None) -> dict:
+    """
+    Durchläuft alle Teilmengen mit festgelegten oberen Features in Gray-Code-Reihenfolge.
+
+    Aufeinanderfolgende Teilmengen unterscheiden sich in genau einem Feature, sodass jede Teilmenge
+    mit einem einzigen Sweep (O(p²)) statt einer vollständigen Anpassung bewertet wird.
+
+    Args:
+        prefix: Bitmaske der festgelegten oberen n_prefix Features
+        n_prefix: Anzahl der festgelegten Features (die obersten Bits)
+        top_k: Anzahl der besten Teilmengen je Größe
+        cross_products: erweiterte Kreuzproduktmatrix. Bei None wird die Matrix des Prozesses verwendet
+
+    Returns:
+        Dictionary {Größe: Liste von (-RSS, Bitmaske)} mit den top_k kleinsten RSS je Größe
+    """
+    A = (worker_cross_products if cross_products is None else cross_products).copy()
+    p = A.shape[0] - 1
+    n_free = p - n_prefix
+    best = {}
+
+    def record(mask, size):
+        heap = best.setdefault(size, [])
+        entry = (-A[p, p], mask)
+        if len(heap) < top_k:
+            heapq.heappush(heap, entry)
+        elif entry > heap[0]:
+            heapq.heapreplace(heap, entry)
+
+    # Festgelegte Features aufnehmen
+    mask = 0
+    for bit in range(n_free, p):
+        if prefix >> (bit - n_free) & 1:
+            sweep(A, bit)
+            mask |= 1 << bit
+    size = bin(mask).count('1')
+    record(mask, size)
+
+    # Gray-Code: im Schritt i wird das Bit der niedrigsten gesetzten Stelle von i umgeschaltet
+    for i in range(1, 1 << n_free):
+        bit = (i & -i).bit_length() - 1
+        if mask >> bit & 1:
+            sweep(A, bit, reverse=True)
+            size -= 1
+        else:
+            sweep(A, bit)
+            size += 1
+        mask ^= 1 << bit
+        record(mask, size)
+
+    return best
+
+
+def best_subset_search(X: pd.DataFrame,
+                       y: pd.Series,
+                       top_k: int = 5,
+                       n_jobs: int = None,
+                       verbose: bool = True) -> pd.DataFrame:
+    """
+    Bewertet alle 2^p Teilmengen der Features und liefert die besten Modelle je Teilmengengröße.
+
+    Die Kreuzprodukte werden einmalig berechnet. Die Teilmengen werden in Gray-Code-Reihenfolge
+    durchlaufen, jede Teilmenge kostet einen Sweep der (p+1) × (p+1) Kreuzproduktmatrix. Mit n_jobs
+    wird der Suchraum über die obersten Features in Blöcke geteilt, die in einem Prozesspool laufen.
+    Die Prozesse erhalten beim Start nur die Kreuzproduktmatrix, X selbst wird nicht übertragen.
+
+    Bei fester Größe sind adjustiertes R², AIC und BIC monoton in der RSS, die top_k Teilmengen
+    mit der kleinsten RSS sind daher für alle drei Kriterien die besten.
+
+    Args:
+        X: Feature-Matrix (sinnvoll bis etwa 25 Features)
+        y: Zielvariable
+        top_k: Anzahl der besten Teilmengen je Größe
+        n_jobs: Anzahl der Prozesse (None: sequentiell im aktuellen Prozess)
+        verbose: Wenn True, werden Hinweise ausgegeben
+
+    Returns:
+        DataFrame mit den Spalten 'n_features', 'features', 'rss', 'r2', 'adj_r2', 'aic' und 'bic',
+        sortiert nach Teilmengengröße und RSS
+    """
+    cross = compute_cross_products(X, y)
+    n, tss = cross['n'], cross['tss']
+
+    # Linear abhängige Features machen den Sweep instabil und liefern keine neuen Modelle
+    kept, _ = find_collinear_features(cross['xtx'])
+    feature_names = [cross['features'][k] for k in kept]
+    if len(kept) < len(cross['features']) and verbose:
+        dropped = [f for f in cross['features'] if f not in feature_names]
+        print(f"Linear abhängige Features ausgeschlossen: {dropped}")
+    cross = {**cross, 'xtx': cross['xtx'][np.ix_(kept, kept)], 'xty': cross['xty'][kept]}
+    A = build_augmented_matrix(cross)
+    p = len(feature_names)
+
+    if verbose:
+        print(f"Bewerte {2 ** p} Teilmengen von {p} Features")
+
+    # Suchraum in Blöcke über die obersten Features teilen (mehrere Blöcke je Prozess)
+    n_prefix = min(p, math.ceil(math.log2(4 * n_jobs))) if n_jobs else 0
+    blocks = range(1 << n_prefix)
+    if n_jobs:
+        with ProcessPoolExecutor(max_workers=n_jobs, initializer=init_subset_worker, initargs=(A,)) as executor:
+            results = list(executor.map(search_subset_block, blocks, [n_prefix] * len(blocks), [top_k] * len(blocks)))
+    else:
+        results = [search_subset_block(block, n_prefix, top_k, cross_products=A) for block in blocks]
+
+    # Ergebnisse der Blöcke zusammenführen
+    rows = []
+    for size in range(p + 1):
+        entries = heapq.nlargest(top_k, (entry for result in results for entry in result.get(size, [])))
+        for neg_rss, mask in entries:
+            rows.append({
+                'n_features': size,
+                'features': [feature_names[bit] for bit in range(p) if mask >> bit & 1],
+                'rss': max(-neg_rss, 0.0)
+            })
+
+    df = pd.DataFrame(rows)
+    df['r2'] = 1 - df['rss'] / tss
+    df['adj_r2'] = adjusted_r2_from_rss(df['rss'], tss, n, df['n_features'])
+    # Log-Likelihood des Normalverteilungsmodells, Parameter: Features und Achsenabschnitt
+    log_likelihood = -n / 2 * (np.log(2 * np.pi) + np.log(df['rss'] / n) + 1)
+    df['aic'] = -2 * log_likelihood + 2 * (df['n_features'] + 1)
+    df['bic'] = -2 * log_likelihood + np.log(n) * (df['n_features'] + 1)
+    return df
+
+
+def build_design_products(X: pd.DataFrame, y: pd.Series) -> dict:
+    """
+    Bereitet die zeilenweisen Produkte für gewichtete Normalgleichungen vor.
+
+    Mit einer Gewichtsmatrix W (Stichproben × Beobachtungen) ergeben sich alle Normalgleichungen
+    gleichzeitig als W @ zz (ZᵀWZ) und W @ zy (ZᵀWy), wobei Z die Feature-Matrix mit
+    vorangestellter Einserspalte für den Achsenabschnitt ist.
+
+    Args:
+        X: Feature-Matrix
+        y: Zielvariable
+
+    Returns:
+        Dictionary mit 'z' (n × q), 'y' (n), 'zz' (n × q²), 'zy' (n × q) und 'names'
+        (['intercept'] + Featurenamen)
+    """
+    X_values = X.to_numpy(dtype='float64')
+    z = np.column_stack([np.ones(len(X_values)), X_values])
+    y_values = np.asarray(y, dtype='float64')
+    if np.isnan(z).any() or np.isnan(y_values).any():
+        raise ValueError("X und y dürfen keine fehlenden Werte enthalten")
+    return {
+        'z': z,
+        'y': y_values,
+        'zz': (z[:, :, None] * z[:, None, :]).reshape(len(z), -1),
+        'zy': z * y_values[:, None],
+        'names': ['intercept'] + list(X.columns)
+    }
+
+
+def solve_weighted_ols(design: dict, weights: np.ndarray) -> np.ndarray:
+    """
+    Löst die gewichteten Normalgleichungen für einen Stapel von Gewichtsvektoren.
+
+    Args:
+        design: Ergebnis von build_design_products
+        weights: Gewichte (Stichproben × Beobachtungen), z.B. Bootstrap-Häufigkeiten oder 0/1 für Folds
+
+    Returns:
+        Koeffizienten (Stichproben × q), erste Spalte ist der Achsenabschnitt
+    """
+    q = design['z'].shape[1]
+    gram = (weights @ design['zz']).reshape(-1, q, q)
+    rhs = weights @ design['zy']
+    return np.linalg.solve(gram, rhs[:, :, None])[:, :, 0]
+
+
+def weighted_r2(design: dict, coefficients: np.ndarray, weights: np.ndarray) -> np.ndarray:
+    """
+    Berechnet das R² je Stichprobe auf den mit weights gewichteten Beobachtungen.
+    Der Mittelwert der Zielvariable wird wie bei sklearn auf denselben Beobachtungen bestimmt.
+    """
+    residuals = design['y'][None, :] - coefficients @ design['z'].T
+    total = weights.sum(axis=1)
+    y_mean = weights @ design['y'] / total
+    ss_res = (weights * residuals ** 2).sum(axis=1)
+    ss_tot = weights @ design['y'] ** 2 - total * y_mean ** 2
+    return 1 - ss_res / ss_tot
+
+
+def summarize_coefficients(design: dict, samples: np.ndarray, alpha: float) -> pd.DataFrame:
+    """
+    Fasst Koeffizienten-Stichproben zu Schätzer, Standardfehler und Perzentil-Intervallen zusammen.
+    """
+    estimate = solve_weighted_ols(design, np.ones((1, len(design['y']))))[0]
+    return pd.DataFrame({
+        'estimate': estimate,
+        'std_error': samples.std(axis=0, ddof=1),
+        'ci_lower': np.quantile(samples, alpha / 2, axis=0),
+        'ci_upper': np.quantile(samples, 1 - alpha / 2, axis=0)
+    }, index=pd.Index(design['names'], name='feature'))
+
+
+def bootstrap_ols(X: pd.DataFrame,
+                  y: pd.Series,
+                  n_boot: int = 10000,
+                  alpha: float = 0.05,
+                  batch_size: int = 1000,
+                  random_state: int = 42) -> dict:
+    """
+    Bootstrap der OLS-Koeffizienten als gestapelte Normalgleichungen.
+
+    Jede Bootstrap-Stichprobe wird durch ihre Ziehungshäufigkeiten je Beobachtung dargestellt
+    (multinomial). Für einen Block von Stichproben ergeben sich alle Matrizen ZᵀWZ mit einer
+    einzigen Matrixmultiplikation, die Gleichungssysteme werden gemeinsam gelöst.
+
+    Args:
+        X: Feature-Matrix (z.B. df_regr[features])
+        y: Zielvariable (z.B. df_regr[y_label])
+        n_boot: Anzahl der Bootstrap-Stichproben
+        alpha: Irrtumswahrscheinlichkeit der Konfidenzintervalle
+        batch_size: Anzahl der Stichproben je Block (begrenzt den Speicherbedarf)
+        random_state: Startwert des Zufallsgenerators
+
+    Returns:
+        Dictionary mit:
+        - 'coefficients': DataFrame je Koeffizient mit 'estimate', 'std_error', 'ci_lower', 'ci_upper'
+        - 'samples': Koeffizienten aller Stichproben (n_boot × q)
+        - 'r2': R² je Stichprobe auf der Stichprobe selbst
+        - 'r2_oob': R² je Stichprobe auf den nicht gezogenen Beobachtungen (out-of-bag)
+    """
+    design = build_design_products(X, y)
+    n = len(design['y'])
+    rng = np.random.default_rng(random_state)
+
+    samples, r2, r2_oob = [], [], []
+    for start in range(0, n_boot, batch_size):
+        counts = rng.multinomial(n, np.full(n, 1 / n), size=min(batch_size, n_boot - start)).astype('float64')
+        coefficients = solve_weighted_ols(design, counts)
+        samples.append(coefficients)
+        r2.append(weighted_r2(design, coefficients, counts))
+        r2_oob.append(weighted_r2(design, coefficients, (counts == 0).astype('float64')))
+    samples = np.vstack(samples)
+
+    return {
+        'coefficients': summarize_coefficients(design, samples, alpha),
+        'samples': samples,
+        'r2': np.concatenate(r2),
+        'r2_oob': np.concatenate(r2_oob)
+    }
+
+
+def cross_validate_ols(X: pd.DataFrame,
+                       y: pd.Series,
+                       n_splits: int = 5,
+                       n_repeats: int = 100,
+                       shuffle: bool = True,
+                       alpha: float = 0.05,
+                       random_state: int = 42) -> dict:
+    """
+    Wiederholte K-fache Kreuzvalidierung der OLS-Regression als gestapelte Normalgleichungen.
+
+    Jeder Trainingsfold wird als Gewichtsvektor 1 - Testzuordnung (0/1 je Beobachtung) dargestellt,
+    solve_weighted_ols löst die gewichteten Normalgleichungen aller Folds in einem Schritt.
+    Mit shuffle=False und n_repeats=1 entspricht die Aufteilung cross_val_score(..., cv=n_splits).
+
+    Args:
+        X: Feature-Matrix
+        y: Zielvariable
+        n_splits: Anzahl der Folds
+        n_repeats: Anzahl der Wiederholungen mit neuer Zufallsaufteilung
+        shuffle: Wenn False, werden zusammenhängende Folds wie bei KFold ohne Mischen gebildet
+        alpha: Irrtumswahrscheinlichkeit der Konfidenzintervalle
+        random_state: Startwert des Zufallsgenerators
+
+    Returns:
+        Dictionary mit:
+        - 'coefficients': DataFrame je Koeffizient über alle Trainingsfolds (wie bei bootstrap_ols)
+        - 'samples': Koeffizienten je Trainingsfold (n_repeats · n_splits × q)
+        - 'r2': Test-R² je Wiederholung und Fold (n_repeats × n_splits)
+    """
+    if not shuffle and n_repeats != 1:
+        raise ValueError("Ohne shuffle ist nur n_repeats=1 sinnvoll")
+
+    design = build_design_products(X, y)
+    n = len(design['y'])
+    rng = np.random.default_rng(random_state)
+
+    # Fold-Nummer je Beobachtung, Foldgrößen wie bei KFold
+    fold_of_position = np.repeat(np.arange(n_splits), [len(part) for part in np.array_split(np.arange(n), n_splits)])
+    assignments = np.empty((n_repeats, n), dtype=int)
+    for r in range(n_repeats):
+        order = rng.permutation(n) if shuffle else np.arange(n)
+        assignments[r, order] = fold_of_position
+
+    # 0/1-Matrix der Testbeobachtungen (Wiederholung · Fold × Beobachtung)
+    test_weights = (assignments[:, None, :] == np.arange(n_splits)[None, :, None]).reshape(-1, n).astype('float64')
+    train_weights = 1.0 - test_weights
+
+    samples = solve_weighted_ols(design, train_weights)
+    r2 = weighted_r2(design, samples, test_weights).reshape(n_repeats, n_splits)
+
+    return {
+        'coefficients': summarize_coefficients(design, samples, alpha),
+        'samples': samples,
+        'r2': r2
+    }
+
+
+def online_ols_statistics(X: pd.DataFrame, y: pd.Series, shift_x: np.ndarray, shift_y: float) -> dict:
+    """
+    Berechnet die suffizienten Statistiken eines Blocks für online_ols.
+
+    Die Daten werden um feste Werte verschoben (Mittelwerte des ersten Blocks), damit die Summen
+    nicht von großen Absolutwerten dominiert werden. Die Statistiken bleiben dabei additiv.
+
+    Returns:
+        Dictionary mit 'n', 'xtx' (ZᵀZ, q × q), 'xty' (Zᵀy, q) und 'yty' (Σy²), wobei Z die verschobene
+        Feature-Matrix mit vorangestellter Einserspalte ist
+    """
+    z = np.column_stack([np.ones(len(X)), X.to_numpy(dtype='float64') - shift_x])
+    y_values = np.asarray(y, dtype='float64') - shift_y
+    if np.isnan(z).any() or np.isnan(y_values).any():
+        raise ValueError("X und y dürfen keine fehlenden Werte enthalten")
+    return {'n': len(z), 'xtx': z.T @ z, 'xty': z.T @ y_values, 'yty': float(y_values @ y_values)}
+
+
+def init_online_ols(X: pd.DataFrame, y: pd.Series, partition=None) -> dict:
+    """
+    Erstellt den Zustand einer fortlaufend aktualisierbaren OLS-Regression mit Achsenabschnitt.
+
+    Der Zustand enthält nur suffiziente Statistiken (ZᵀZ, Zᵀy, n, Σy²), neue Landkreise oder
+    Jahrgänge werden mit update_online_ols hinzugefügt, mit downdate_online_ols wieder entfernt.
+    Eine Aktualisierung kostet O(neue Zeilen · p²), die Lösung in solve_online_ols O(p³),
+    unabhängig von der Anzahl bereits aufgenommener Zeilen.
+
+    Args:
+        X: Feature-Matrix des ersten Blocks (z.B. df_regr[features])
+        y: Zielvariable des ersten Blocks (z.B. df_regr[y_label])
+        partition: Bezeichnung des Blocks (z.B. Jahrgang), um ihn später mit downdate_online_ols
+            ohne seine Zeilen entfernen zu können
+
+    Returns:
+        Dictionary mit 'features', 'shift_x', 'shift_y', den Statistiken aus online_ols_statistics
+        und 'partitions' ({Bezeichnung: Statistiken})
+    """
+    state = {
+        'features': list(X.columns),
+        'shift_x': X.to_numpy(dtype='float64').mean(axis=0),
+        'shift_y': float(np.mean(np.asarray(y, dtype='float64'))),
+        'n': 0,
+        'xtx': np.zeros((X.shape[1] + 1, X.shape[1] + 1)),
+        'xty': np.zeros(X.shape[1] + 1),
+        'yty': 0.0,
+        'partitions': {}
+    }
+    return update_online_ols(state, X, y, partition=partition)
+
+
+def combine_statistics(left: dict, right: dict, sign: int = 1) -> dict:
+    """
+    Addiert (sign=1) oder subtrahiert (sign=-1) die Statistiken zweier Blöcke.
+    """
+    return {key: left[key] + sign * right[key] for key in ['n', 'xtx', 'xty', 'yty']}
+
+
+def update_online_ols(state: dict, X: pd.DataFrame, y: pd.Series, partition=None) -> dict:
+    """
+    Nimmt neue Beobachtungen in den Zustand auf.
+
+    Args:
+        state: Zustand aus init_online_ols
+        X: Feature-Matrix der neuen Zeilen (Spalten wie state['features'])
+        y: Zielvariable der neuen Zeilen
+        partition: Bezeichnung des Blocks, Statistiken mehrerer Blöcke mit derselben Bezeichnung werden addiert
+
+    Returns:
+        Aktualisierter Zustand (neues Dictionary)
+    """
+    block = online_ols_statistics(X[state['features']], y, state['shift_x'], state['shift_y'])
+    partitions = dict(state['partitions'])
+    if partition is not None:
+        partitions[partition] = combine_statistics(partitions[partition], block) if partition in partitions else block
+    return {**state, **combine_statistics(state, block), 'partitions': partitions}
+
+
+def downdate_online_ols(state: dict, X: pd.DataFrame = None, y: pd.Series = None, partition=None) -> dict:
+    """
+    Entfernt Beobachtungen aus dem Zustand, entweder einen benannten Block oder die übergebenen Zeilen.
+    Zeilen eines benannten Blocks sollten über partition entfernt werden, sonst bleiben seine
+    Statistiken in state['partitions'] unverändert.
+
+    Args:
+        state: Zustand aus init_online_ols
+        X: Feature-Matrix der zu entfernenden Zeilen (wenn partition None ist)
+        y: Zielvariable der zu entfernenden Zeilen
+        partition: Bezeichnung eines mit update_online_ols aufgenommenen Blocks (z.B. Jahrgang)
+
+    Returns:
+        Aktualisierter Zustand (neues Dictionary)
+    """
+    partitions = dict(state['partitions'])
+    if partition is not None:
+        if partition not in partitions:
+            raise ValueError(f"Unbekannter Block '{partition}', vorhanden sind {list(partitions)}")
+        block = partitions.pop(partition)
+    elif X is not None and y is not None:
+        block = online_ols_statistics(X[state['features']], y, state['shift_x'], state['shift_y'])
+    else:
+        raise ValueError("Entweder partition oder X und y angeben")
+
+    if block['n'] > state['n']:
+        raise ValueError(f"Es können nicht mehr Zeilen entfernt werden ({block['n']}) als enthalten sind ({state['n']})")
+    return {**state, **combine_statistics(state, block, sign=-1), 'partitions': partitions}
+
+
+def solve_online_ols(state: dict) -> dict:
+    """
+    Berechnet Koeffizienten, R² und angepasstes R² aus dem Zustand.
+
+    Gelöst werden die zentrierten Normalgleichungen wie in backward_elimination. Linear abhängige
+    Features (siehe find_collinear_features) erhalten den Koeffizienten 0.
+
+    Args:
+        state: Zustand aus init_online_ols
+
+    Returns:
+        Dictionary mit 'intercept', 'coefficients' (pd.Series je Feature), 'n', 'rss', 'r2' und 'adj_r2'
+    """
+    n, xtx, xty = state['n'], state['xtx'], state['xty']
+    p = len(state['features'])
+    if n <= p + 1:
+        raise ValueError(f"Zu wenige Beobachtungen ({n}) für {p} Features")
+
+    # Zentrierte Kreuzprodukte aus den Summen: XᵀX - n·x̄x̄ᵀ, Xᵀy - n·x̄ȳ, Σ(y - ȳ)²
+    x_mean, y_mean = xtx[0, 1:] / n, xty[0] / n
+    xtx_c = xtx[1:, 1:] - n * np.outer(x_mean, x_mean)
+    xty_c = xty[1:] - n * x_mean * y_mean
+    tss = state['yty'] - n * y_mean ** 2
+
+    kept, L = find_collinear_features(xtx_c)
+    beta = np.zeros(p)
+    beta[kept] = cho_solve((L, True), xty_c[kept])
+    rss = max(tss - xty_c @ beta, 0.0)
+
+    # Achsenabschnitt auf den unverschobenen Daten
+    intercept = y_mean + state['shift_y'] - (x_mean + state['shift_x']) @ beta
+    return {
+        'intercept': float(intercept),
+        'coefficients': pd.Series(beta, index=state['features']),
+        'n': n,
+        'rss': float(rss),
+        'r2': float(1 - rss / tss),
+        'adj_r2': float(adjusted_r2_from_rss(rss, tss, n, p))
+    }
+
+
+def online_ols_to_sklearn(state: dict) -> LinearRegression:
+    """
+    Erstellt aus dem Zustand ein angepasstes LinearRegression-Modell, das wie die Modelle in
+    models/ mit joblib gespeichert und in scoring_utils verwendet werden kann.
+    """
+    result = solve_online_ols(state)
+    model = LinearRegression()
+    model.coef_ = result['coefficients'].to_numpy()
+    model.intercept_ = result['intercept']
+    model.n_features_in_ = len(state['features'])
+    model.feature_names_in_ = np.array(state['features'], dtype=object)
+    return model
@@ -0,0 +1,402 @@
+import argparse
+import pandas as pd
+import polars as pl
+
+from data_preparation_utils import root_raw, data_kfz, relevant_cols, numeric_dtypes, numeric_placeholders
+from region_key_utils import crosswalk_path, load_crosswalk
+
+
+# Alternative Umsetzung der KFZ-Aufbereitung (Einlesen -> Filter -> Umbenennung -> Kategorien -> Pivotierung)
+# als ein einziger Lazy-Abfrageplan in Polars. Die Funktionen tragen dieselben Namen wie in
+# data_preparation_utils, arbeiten aber auf pl.LazyFrame: Spalten- und Zeilenfilter werden bis in das
+# Einlesen der CSV-Datei verschoben (Projection/Predicate Pushdown), ausgeführt wird erst beim collect
+# auf allen Kernen (Anzahl über die Umgebungsvariable POLARS_MAX_THREADS begrenzbar).
+#
+# Kategoriale Spalten werden als Text geführt, das Ergebnis von transform_kfz_data ist wieder ein
+# pandas DataFrame, der dem der pandas-Umsetzung entspricht (siehe check_parity).
+
+# Datentypen aus relevant_cols in Polars, kategoriale Spalten bleiben Text
+polars_dtypes = {'category': pl.String, 'str': pl.String, 'float64': pl.Float64, 'Float64': pl.Float64,
+                 'Int64': pl.Int64, 'Int32': pl.Int32}
+
+# Gültiges Zahlenformat nach Ersetzen des Dezimalkommas, wie in parse_numeric_column
+number_pattern = r'^[+-]?(\d+\.?\d*|\.\d+)([eE][+-]?\d+)?$'
+
+
+def scan_raw_data(file_path: str, relevant_cols: list) -> pl.LazyFrame:
+    """
+    Erstellt den Abfrageplan zum Einlesen einer GENESIS-Flatfile (UTF-8), beschränkt auf die relevanten Spalten.
+
+    Alle Spalten werden als Text gelesen, damit führende Nullen erhalten bleiben. Gelesen wird erst
+    beim collect und nur die Spalten, die der Plan tatsächlich verwendet.
+
+    Args:
+        file_path: Pfad zur Rohdatei
+        relevant_cols: Liste mit Dictionaries, die die relevanten Spalten definieren
+
+    Returns:
+        LazyFrame mit den relevanten Spalten
+    """
+    return select_columns(pl.scan_csv(file_path, separator=';', infer_schema=False), relevant_cols)
+
+
+def select_columns(lf: pl.LazyFrame, relevant_cols: list) -> pl.LazyFrame:
+    """
+    Extrahiert die relevanten Spalten gemäß der Festlegung in relevant_cols (siehe data_preparation_utils).
+    """
+    names = lf.collect_schema().names()
+    return lf.select([d['name'] for d in relevant_cols if d['name'] in names])
+
+
+def is_gebietsreform_label(label: pl.Expr) -> pl.Expr:
+    """
+    Erkennt Landkreise mit Gebietsreform an ihrer Bezeichnung, diese enden beispielsweise mit "(bis 03.09.2011)".
+    """
+    return label.str.contains(r'\)\s*$').fill_null(False)
+
+
+def kfz_row_flags(keep_gebietsreform: bool = False) -> dict:
+    """
+    Ausdrücke für die Ausschlussgründe von filter_kfz_rows auf den Originalspaltennamen.
+
+    Returns:
+        Dictionary {Grund: pl.Expr} mit 'rows_aggregated', 'rows_placeholder' und 'rows_gebietsreform'
+    """
+    aggregated = pl.any_horizontal(pl.all().is_null())
+    invalid = ~aggregated & pl.col('value').str.strip_chars().cast(pl.Float64, strict=False).is_null()
+    reform = ~aggregated & ~invalid & is_gebietsreform_label(pl.col('1_variable_attribute_label')) & pl.lit(not keep_gebietsreform)
+    return {'rows_aggregated': aggregated, 'rows_placeholder': invalid, 'rows_gebietsreform': reform}
+
+
+def filter_kfz_rows(lf: pl.LazyFrame, keep_gebietsreform: bool = False) -> pl.LazyFrame:
+    """
+    Schließt aggregierte Zeilen, Platzhalter und Landkreise mit Gebietsreform aus den KFZ-Rohdaten aus.
+
+    Die Anzahl der ausgeschlossenen Zeilen je Grund liefert filter_kfz_report.
+    """
+    return lf.filter(~pl.any_horizontal(list(kfz_row_flags(keep_gebietsreform).values())))
+
+
+def filter_kfz_report(lf: pl.LazyFrame, keep_gebietsreform: bool = False) -> pl.LazyFrame:
+    """
+    Abfrage mit der Anzahl gelesener und je Grund ausgeschlossener Zeilen wie read_report in read_raw_data.
+    """
+    flags = kfz_row_flags(keep_gebietsreform)
+    return lf.select(pl.len().alias('rows_read'), *[flag.sum().alias(name) for name, flag in flags.items()],
+                     (~pl.any_horizontal(list(flags.values()))).sum().alias('rows_kept'))
+
+
+def parse_numeric_column(column: str, dtype: str = 'float64') -> pl.Expr:
+    """
+    Wandelt eine Text-Spalte mit GENESIS-Zahlen um (Dezimalkomma, Platzhalter und ungültige Einträge
+    werden wie in data_preparation_utils.parse_numeric_column behandelt).
+    """
+    text = pl.col(column).str.strip_chars().str.replace_all(',', '.', literal=True)
+    return pl.when(text.str.contains(number_pattern)).then(text).cast(pl.Float64).cast(polars_dtypes[dtype]).alias(column)
+
+
+def parse_report(lf: pl.LazyFrame, column: str) -> pl.LazyFrame:
+    """
+    Abfrage mit der Anzahl 'missing', 'placeholder' und 'coerced' Einträge einer Text-Spalte wie parse_report in rename_columns.
+    """
+    text = pl.col(column).str.strip_chars().str.replace_all(',', '.', literal=True)
+    placeholder = text.is_in(numeric_placeholders).fill_null(False)
+    number = text.str.contains(number_pattern).fill_null(False)
+    return lf.select(text.null_count().alias('missing'), placeholder.sum().alias('placeholder'),
+                     (text.is_not_null() & ~placeholder & ~number).sum().alias('coerced'))
+
+
+def rename_columns(lf: pl.LazyFrame, relevant_cols: list) -> pl.LazyFrame:
+    """
+    Benennt die Spalten um und setzt die Datentypen gemäß der Festlegung in relevant_cols.
+    Numerische Spalten werden mit parse_numeric_column umgewandelt.
+    """
+    names = lf.collect_schema().names()
+    matched_cols = [d for d in relevant_cols if d['name'] in names]
+    lf = lf.rename({d['name']: d['rename'] for d in matched_cols})
+    return lf.with_columns([
+        parse_numeric_column(d['rename'], d['dtype']) if d['dtype'] in numeric_dtypes
+        else pl.col(d['rename']).cast(polars_dtypes[d['dtype']])
+        for d in matched_cols
+    ])
+
+
+def remove_leading_zeros(lf: pl.LazyFrame) -> pl.LazyFrame:
+    """
+    Entfernt führende Nullen aus der Spalte 'landkreis_id'.
+    """
+    if 'landkreis_id' in lf.collect_schema().names():
+        lf = lf.with_columns(pl.col('landkreis_id').str.strip_chars_start('0'))
+    return lf
+
+
+def apply_crosswalk(lf: pl.LazyFrame, crosswalk: pd.DataFrame, value_columns: list,
+                    code_column: str = 'landkreis_id', label_column: str = 'landkreis') -> pl.LazyFrame:
+    """
+    Ordnet als Altkreis bezeichnete Zeilen ihren Nachfolgern zu wie region_key_utils.apply_crosswalk.
+
+    Die Werte werden mit dem Gewicht multipliziert (bei ganzzahligen Spalten gerundet), Code und
+    Bezeichnung durch die des Nachfolgers ersetzt. Altkreise ohne Eintrag in der Zuordnung bleiben
+    unverändert und behalten die Bezeichnung mit Gebietsreform.
+
+    Args:
+        lf: KFZ-Daten im Langformat nach remove_leading_zeros
+        crosswalk: Zuordnung aus region_key_utils.load_crosswalk
+        value_columns: Zu gewichtende Wertspalten
+        code_column: Spalte mit den Codes ohne führende Nullen
+        label_column: Spalte mit den Bezeichnungen
+
+    Returns:
+        LazyFrame mit zugeordneten Zeilen und der zusätzlichen Spalte '_alt_key' (Schlüssel des
+        Altkreises, sonst null) für crosswalk_report
+    """
+    schema = lf.collect_schema()
+    columns = schema.names()
+    links = pl.from_pandas(crosswalk[['alt_key', 'neu_key', 'neu_name', 'gewicht']]).lazy()
+
+    key = pl.col(code_column).cast(pl.Int64, strict=False)
+    lf = lf.with_columns(pl.when(is_gebietsreform_label(pl.col(label_column)) & key.is_in(crosswalk['alt_key'].tolist()))
+                         .then(key).alias('_alt_key'))
+    old = lf.filter(pl.col('_alt_key').is_not_null())
+    kept = lf.filter(pl.col('_alt_key').is_null())
+
+    # Bezeichnung des Nachfolgers aus den Daten, sonst aus der Zuordnung
+    labels = (kept.select(key.alias('neu_key'), pl.col(label_column).alias('_label'))
+              .group_by('neu_key', maintain_order=True).first())
+    new = (old.join(links, left_on='_alt_key', right_on='alt_key', how='inner')
+           .join(labels, on='neu_key', how='left')
+           .with_columns(pl.col('neu_key').cast(pl.String).alias(code_column),
+                         pl.coalesce('_label', 'neu_name').alias(label_column),
+                         *[(pl.col(col).cast(pl.Float64) * pl.col('gewicht')).round().cast(schema[col])
+                           if schema[col].is_integer() else (pl.col(col) * pl.col('gewicht')).cast(schema[col])
+                           for col in value_columns]))
+    return pl.concat([kept, new.select(columns + ['_alt_key'])])
+
+
+def crosswalk_report(lf: pl.LazyFrame, label_column: str = 'landkreis') -> pl.LazyFrame:
+    """
+    Abfrage mit 'rows_mapped', 'regions_mapped' und 'rows_unmapped' zum Ergebnis von apply_crosswalk.
+    """
+    mapped = pl.col('_alt_key').is_not_null()
+    return lf.select(mapped.sum().alias('rows_mapped'), pl.col('_alt_key').drop_nulls().n_unique().alias('regions_mapped'),
+                     (~mapped & is_gebietsreform_label(pl.col(label_column))).sum().alias('rows_unmapped'))
+
+
+def sum_kfz_rows(lf: pl.LazyFrame) -> pl.LazyFrame:
+    """
+    Summiert die Zeilen der Altkreise und ihres Nachfolgers je Kombination wie main.stage_ingest_kfz,
+    aggregate_kfz_cells würde mehrfach vorhandene Kombinationen sonst mitteln.
+    """
+    keys = ['landkreis_id', 'landkreis', 'antrieb', 'emissionsgruppen']
+    return lf.group_by(keys, maintain_order=True).agg(pl.col('anzahl_fahrzeuge').sum())
+
+
+def standardize_kfz_categories(lf: pl.LazyFrame) -> pl.LazyFrame:
+    """
+    Standardisiert die Kategorien 'antrieb' und 'emissionsgruppen' wie in data_preparation_utils.
+    """
+    return lf.with_columns(
+        pl.col('antrieb').str.to_lowercase()
+        .str.replace(r'^ks-', '')
+        .str.replace_all('-', '', literal=True)
+        .replace({'sonst': 'sonstigeantriebe'}),
+        pl.col('emissionsgruppen').str.to_lowercase()
+        .str.replace(r'^pkw-', '')
+        .str.replace_all('-', '', literal=True)
+        .replace({'euro6r': 'euro6', 'sonst': 'sonstigeemissionsgruppen'})
+    )
+
+
+def aggregate_kfz_cells(lf: pl.LazyFrame) -> pl.LazyFrame:
+    """
+    Mittelwert je Landkreis, Antrieb und Emissionsgruppe wie pivot_table (ganzzahlig abgeschnitten).
+    """
+    keys = ['landkreis_id', 'landkreis', 'antrieb', 'emissionsgruppen']
+    return (lf.filter(pl.col('anzahl_fahrzeuge').is_not_null())
+            .group_by(keys).agg(pl.col('anzahl_fahrzeuge').mean().cast(pl.Int64)))
+
+
+def transform_kfz_data(cells: pl.DataFrame, regions: pl.DataFrame) -> pd.DataFrame:
+    """
+    Pivotiert die Zellen aus aggregate_kfz_cells und ergänzt die Summen je Antrieb, Emissionsgruppe
+    und insgesamt. Die Spalten, ihre Reihenfolge und die Sortierung der Landkreise entsprechen
+    data_preparation_utils.transform_kfz_data.
+
+    Die Pivotierung läuft auf den bereits aggregierten Zellen (Landkreise × Kombinationen) und
+    ist daher unabhängig von der Größe der Rohdaten.
+
+    Args:
+        cells: Ergebnis von aggregate_kfz_cells
+        regions: Alle Landkreise (landkreis_id, landkreis), auch solche ohne gültigen Wert
+
+    Returns:
+        Transformierter pandas DataFrame
+    """
+    # Beobachtete Kombinationen sortiert nach Antrieb und Emissionsgruppe wie bei build_kfz_cube
+    combos = sorted(cells.select('antrieb', 'emissionsgruppen').unique().iter_rows())
+    columns = [f"{antrieb}_{emission}" for antrieb, emission in combos]
+    antriebe = list(dict.fromkeys(antrieb for antrieb, _ in combos))
+    emissionen = list(dict.fromkeys(emission for _, emission in combos))
+
+    wide = (cells.with_columns(pl.concat_str(['antrieb', 'emissionsgruppen'], separator='_').alias('kombination'))
+            .pivot(on='kombination', index=['landkreis_id', 'landkreis'], values='anzahl_fahrzeuge'))
+    wide = (regions.unique().join(wide, on=['landkreis_id', 'landkreis'], how='left')
+            .sort(['landkreis_id', 'landkreis'])
+            .select('landkreis_id', 'landkreis', *[pl.col(col).fill_null(0) for col in columns]))
+
+    wide = wide.with_columns(
+        pl.sum_horizontal(columns).alias('anzahl_kfz'),
+        *[pl.sum_horizontal([f"{antrieb}_{e}" for a, e in combos if a == antrieb]).alias(antrieb) for antrieb in antriebe],
+        *[pl.sum_horizontal([f"{a}_{emission}" for a, e in combos if e == emission]).alias(emission) for emission in emissionen]
+    )
+
+    df = wide.to_pandas()
+    df[['landkreis_id', 'landkreis']] = df[['landkreis_id', 'landkreis']].astype(object)
+    return df
+
+
+def prepare_kfz_data(file_path: str, relevant_cols: list, gebietsreform: str = 'crosswalk',
+                     crosswalk_file: str = crosswalk_path, streaming: bool = False) -> tuple:
+    """
+    Führt Einlesen, Filter, Umbenennung, Gebietsreform, Standardisierung und Aggregation der
+    KFZ-Rohdaten als ein Abfrageplan aus, die Rohdatei wird dabei einmal gelesen.
+
+    Args:
+        file_path: Pfad zur KFZ-Rohdatei (UTF-8)
+        relevant_cols: Liste mit Dictionaries, die die relevanten Spalten definieren
+        gebietsreform: 'crosswalk' oder 'drop', siehe main.stage_ingest_kfz
+        crosswalk_file: Zuordnung der Altkreise für gebietsreform='crosswalk'
+        streaming: Wenn True, wird die Rohdatei blockweise verarbeitet (Streaming-Engine von Polars)
+
+    Returns:
+        tuple: (Transformierter pandas DataFrame wie nach stage_pivot, Kennzahlen wie stage_ingest_kfz)
+    """
+    keep_gebietsreform = gebietsreform == 'crosswalk'
+
+    # Zwischenstände, auf die mehrere Abfragen zugreifen, werden nur einmal berechnet (cache)
+    lf_raw = scan_raw_data(file_path, relevant_cols).cache()
+    lf = remove_leading_zeros(rename_columns(filter_kfz_rows(lf_raw, keep_gebietsreform), relevant_cols)).cache()
+
+    queries = {'read': filter_kfz_report(lf_raw, keep_gebietsreform),
+               'anzahl_fahrzeuge': parse_report(filter_kfz_rows(lf_raw, keep_gebietsreform), 'value')}
+    if keep_gebietsreform:
+        lf = apply_crosswalk(lf, load_crosswalk(crosswalk_file), ['anzahl_fahrzeuge'])
+        queries['crosswalk'] = crosswalk_report(lf)
+        lf = lf.filter(~is_gebietsreform_label(pl.col('landkreis'))).drop('_alt_key')
+        lf = sum_kfz_rows(lf)
+    lf = standardize_kfz_categories(lf).cache()
+
+    # Alle Abfragen gemeinsam ausführen, die Rohdatei wird dabei einmal gelesen
+    results = pl.collect_all([aggregate_kfz_cells(lf), lf.select('landkreis_id', 'landkreis').unique(), *queries.values()],
+                             engine='streaming' if streaming else 'auto')
+    cells, regions, reports = results[0], results[1], results[2:]
+    metrics = {name: report.row(0, named=True) for name, report in zip(queries, reports)}
+    return transform_kfz_data(cells, regions), metrics
+
+
+def check_parity(df_pandas: pd.DataFrame, df_polars: pd.DataFrame) -> list:
+    """
+    Vergleicht die Ergebnisse der pandas- und der Polars-Umsetzung.
+
+    Returns:
+        Liste der Abweichungen (leer bei Übereinstimmung)
+    """
+    differences = []
+    if list(df_pandas.columns) != list(df_polars.columns):
+        differences.append(f"Spalten: {sorted(set(df_pandas.columns) ^ set(df_polars.columns)) or 'Reihenfolge'}")
+        return differences
+    if len(df_pandas) != len(df_polars):
+        differences.append(f"Zeilen: {len(df_pandas)} (pandas) != {len(df_polars)} (polars)")
+        return differences
+    for col in df_pandas.columns:
+        left, right = df_pandas[col].reset_index(drop=True), df_polars[col].reset_index(drop=True)
+        unequal = ~((left == right) | (left.isna() & right.isna()))
+        if unequal.any():
+            differences.append(f"Spalte '{col}': {int(unequal.sum())} abweichende Werte")
+    return differences
+
+
+def crosswalk_totals(file_path: str, crosswalk: pd.DataFrame) -> pd.Series:
+    """
+    Bestimmt die erwartete Fahrzeugzahl der Nachfolgekreise direkt aus den Rohdaten: eigene Zeilen
+    plus die gewichteten (je Zeile gerundeten) Zeilen ihrer Altkreise. Dient als Kontrolle, dass
+    beide Umsetzungen die Altkreise zu ihren Nachfolgern addieren.
+
+    Args:
+        file_path: Pfad zur KFZ-Rohdatei
+        crosswalk: Zuordnung aus region_key_utils.load_crosswalk
+
+    Returns:
+        Series {landkreis_id (ohne führende Nullen): anzahl_kfz} der Nachfolger, die in den Daten vorkommen
+    """
+    links = pl.from_pandas(crosswalk[['alt_key', 'neu_key', 'gewicht']])
+    df = (remove_leading_zeros(rename_columns(filter_kfz_rows(scan_raw_data(file_path, relevant_cols), True), relevant_cols))
+          .select(pl.col('landkreis_id').cast(pl.Int64, strict=False).alias('key'),
+                  is_gebietsreform_label(pl.col('landkreis')).alias('reform'),
+                  pl.col('anzahl_fahrzeuge').cast(pl.Float64))
+          .collect())
+
+    own = df.filter(~pl.col('reform') & pl.col('key').is_in(links['neu_key'].implode())).rename({'key': 'neu_key'})
+    old = (df.filter(pl.col('reform')).join(links, left_on='key', right_on='alt_key', how='inner')
+           .with_columns((pl.col('anzahl_fahrzeuge') * pl.col('gewicht')).round()))
+    totals = (pl.concat([own.select('neu_key', 'anzahl_fahrzeuge'), old.select('neu_key', 'anzahl_fahrzeuge')])
+              .group_by('neu_key').agg(pl.col('anzahl_fahrzeuge').sum()))
+    return pd.Series(totals['anzahl_fahrzeuge'].cast(pl.Int64).to_list(),
+                     index=totals['neu_key'].cast(pl.String).to_list(), name='anzahl_kfz').sort_index()
+
+
+def check_crosswalk_totals(df_kfz: pd.DataFrame, expected: pd.Series) -> list:
+    """
+    Vergleicht 'anzahl_kfz' der Nachfolgekreise mit crosswalk_totals.
+
+    Returns:
+        Liste der Abweichungen (leer bei Übereinstimmung)
+    """
+    actual = df_kfz.set_index('landkreis_id')['anzahl_kfz'].reindex(expected.index)
+    unequal = actual.ne(expected)
+    return [f"Nachfolger {key}: anzahl_kfz {actual[key]} statt {expected[key]}" for key in expected.index[unequal]]
+
+
+def main(file_path: str, gebietsreform: str, streaming: bool):
+    """
+    Prüft, ob die Polars-Umsetzung dieselben KFZ-Daten liefert wie die Stufen ingest_kfz bis pivot in main.py.
+    """
+    # Erst hier importieren, main.py verwendet dieses Modul selbst
+    from main import stage_ingest_kfz, stage_standardize, stage_pivot
+
+    inputs = {'raw': file_path, 'crosswalk': crosswalk_path}
+    outputs = stage_ingest_kfz(inputs, relevant_cols, gebietsreform=gebietsreform)
+    df_pandas = stage_pivot(stage_standardize(outputs))['kfz']
+    df_polars, metrics = prepare_kfz_data(file_path, relevant_cols, gebietsreform=gebietsreform, streaming=streaming)
+
+    differences = check_parity(df_pandas, df_polars)
+    if metrics != outputs['_metrics']:
+        differences.append(f"Kennzahlen: {outputs['_metrics']} (pandas) != {metrics} (polars)")
+    if gebietsreform == 'crosswalk':
+        # Beide Umsetzungen gegen die direkt aus den Rohdaten summierten Nachfolger prüfen
+        expected = crosswalk_totals(file_path, load_crosswalk(crosswalk_path))
+        for backend, df in [('pandas', df_pandas), ('polars', df_polars)]:
+            differences += [f"{backend}: {difference}" for difference in check_crosswalk_totals(df, expected)]
+        print(f"Zuordnung: {metrics['crosswalk']['rows_mapped']} Zeilen aus {metrics['crosswalk']['regions_mapped']} "
+              f"Altkreisen, {len(expected)} Nachfolger geprüft")
+    for difference in differences:
+        print(difference)
+    if differences:
+        raise SystemExit(1)
+    print(f"Übereinstimmung: {len(df_polars)} Landkreise, {len(df_polars.columns)} Spalten")
+
+
+def parse_args() -> argparse.Namespace:
+    """
+    Liest die Kommandozeilenargumente.
+    """
+    parser = argparse.ArgumentParser(description="Vergleich der Polars- und pandas-Aufbereitung der KFZ-Daten")
+    parser.add_argument('--file', dest='file_path', default=f"{root_raw}/{data_kfz}", help="KFZ-Rohdatei")
+    parser.add_argument('--gebietsreform', choices=['crosswalk', 'drop'], default='crosswalk',
+                        help="Landkreise mit Gebietsreform zuordnen (crosswalk) oder ausschließen (drop)")
+    parser.add_argument('--streaming', action='store_true', help="Streaming-Engine von Polars verwenden")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    main(**vars(parse_args()))
@@ -1,5 +1,9 @@
 import os
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import scipy.sparse as sp
 
 
 # Absoluter Pfad zum Skriptverzeichnis und Datenordner
@@ -7,6 +11,7 @@ script_dir = os.path.dirname(os.path.abspath(__file__))
 root_raw = os.path.join(script_dir, '..', 'data', 'raw')
 root_interim = os.path.join(script_dir, '..', 'data', 'interim')
 root_processed = os.path.join(script_dir, '..', 'data', 'processed')
+root_cache = os.path.join(script_dir, '..', 'data', 'interim', 'cache') # Cache der Pipeline-Stufen
 
 # Rohdaten
 data_kfz = '46251-0021_de_2020_flat.csv' # Daten über Fahrzeugbestand
@@ -14,14 +19,22 @@ data_pop = '12211-Z-03_flat.csv' # Bevölkerungsdaten
 data_vee = 'AI-S-01_flat.csv' # Daten über Einkommen der privaten Haushalte
 data_svu = 'AI013-3_flat.csv' # Straßenverkehrsunfälle
 
+# Dateinamen der Rohdaten je Jahrgang für den Aufbau eines Panels über mehrere Jahre
+vintage_file_templates = {
+    'kfz': '46251-0021_de_{year}_flat.csv',
+    'pop': '12211-Z-03_{year}_flat.csv',
+    'vee': 'AI-S-01_{year}_flat.csv',
+    'svu': 'AI013-3_{year}_flat.csv'
+}
+
 # Relevante Spaltennamen, Beschreibungen und Umbenennungen in den Rohdatensätzen
 relevant_cols = [
-    # kfz
-    {'name': '1_variable_attribute_code', 'description': 'Landkreis ID', 'rename': 'landkreis_id', 'dtype': 'str'},
-    {'name': '1_variable_attribute_label', 'description': 'Landkreis Name', 'rename': 'landkreis', 'dtype': 'str'},
-    {'name': '2_variable_attribute_code', 'description': 'Kraftstoffarten -> Antriebe', 'rename': 'antrieb', 'dtype': 'str'},
-    {'name': '3_variable_attribute_code', 'description': 'Emissionsgruppen', 'rename': 'emissionsgruppen', 'dtype': 'str'},
-    {'name': 'value', 'description': 'Anzahl der Fahrzeuge', 'rename': 'anzahl_fahrzeuge', 'dtype': 'Int64'},
+    # kfz (Langformat mit vielen Wiederholungen, daher kategorial und mit kleinem Ganzzahltyp)
+    {'name': '1_variable_attribute_code', 'description': 'Landkreis ID', 'rename': 'landkreis_id', 'dtype': 'category'},
+    {'name': '1_variable_attribute_label', 'description': 'Landkreis Name', 'rename': 'landkreis', 'dtype': 'category'},
+    {'name': '2_variable_attribute_code', 'description': 'Kraftstoffarten -> Antriebe', 'rename': 'antrieb', 'dtype': 'category'},
+    {'name': '3_variable_attribute_code', 'description': 'Emissionsgruppen', 'rename': 'emissionsgruppen', 'dtype': 'category'},
+    {'name': 'value', 'description': 'Anzahl der Fahrzeuge', 'rename': 'anzahl_fahrzeuge', 'dtype': 'Int32'},
     # Gemeinsam pop, vee, svu
     {'name': '1_Auspraegung_Code', 'description': 'Landkreis ID', 'rename': 'landkreis_id', 'dtype': 'str'},
     {'name': '1_Auspraegung_Label', 'description': 'Landkreis Name', 'rename': 'landkreis', 'dtype': 'str'},
@@ -37,6 +50,27 @@ relevant_cols = [
     {'name': 'AI1303__Strassenverkehrsunfaelle_je_10.000_Kfz__Anzahl', 'description': 'Unfaelle je 10000 Kfz', 'rename': 'unfaelle_je_10k_kfz', 'dtype': 'float64'}
 ]
 
+# Numerische Datentypen in relevant_cols
+numeric_dtypes = ['float64', 'Float64', 'Int64', 'Int32']
+
+# Platzhalter der GENESIS-Daten für fehlende oder gesperrte Werte
+# ('-' nichts vorhanden, '.' unbekannt/geheim, 'x' nicht sinnvoll, '...' noch nicht verfügbar)
+numeric_placeholders = ['-', '.', 'x', '...']
+
+
+def get_vintage_files(year: int, root: str = root_raw) -> dict:
+    """
+    Liefert die Pfade der Rohdateien eines Jahrgangs gemäß vintage_file_templates.
+    
+    Args:
+        year: Jahrgang der Daten (z.B. 2020)
+        root: Verzeichnis der Rohdaten
+        
+    Returns:
+        Dictionary {Quelle: Dateipfad} für 'kfz', 'pop', 'vee' und 'svu'
+    """
+    return {source: os.path.join(root, template.format(year=year)) for source, template in vintage_file_templates.items()}
+
 
 def select_columns(df: pd.DataFrame, relevant_cols: list) -> pd.DataFrame:
     """
@@ -56,6 +90,167 @@ def select_columns(df: pd.DataFrame, relevant_cols: list) -> pd.DataFrame:
     return df[selected_cols]
 
 
+def read_raw_data(file_path: str, relevant_cols: list, row_filter=None, chunksize: int = None, **kwargs) -> pd.DataFrame:
+    """
+    Liest eine GENESIS-Flatfile ein und beschränkt sie bereits beim Einlesen auf die relevanten Spalten.
+    
+    Mit chunksize wird die Datei blockweise gelesen und row_filter auf jeden Block angewendet, bevor
+    der nächste Block gelesen wird. Der Speicherbedarf hängt dann von der Blockgröße und der Anzahl
+    der behaltenen Zeilen ab, nicht von der Dateigröße.
+    
+    Args:
+        file_path: Pfad zur Rohdatei
+        relevant_cols: Liste mit Dictionaries, die die relevanten Spalten definieren
+        row_filter: Funktion DataFrame -> DataFrame zum Ausschließen von Zeilen (arbeitet auf den Originalspaltennamen)
+        chunksize: Anzahl Zeilen je Block. Bei None wird die Datei in einem Stück gelesen
+        **kwargs: Weitere Argumente für pd.read_csv (z.B. encoding, decimal)
+        
+    Returns:
+        DataFrame mit den relevanten Spalten und den gefilterten Zeilen. In df.attrs['read_report']
+        stehen die Anzahl gelesener und behaltener Zeilen sowie die Zählungen aus
+        df.attrs['filter_report'] der Zeilenfilter, summiert über alle Blöcke
+    """
+    relevant_names = {d['name'] for d in relevant_cols}
+    
+    # Schlüssel- und Bezeichnungsspalten als Text bzw. kategorial einlesen, damit führende Nullen erhalten bleiben
+    dtype_dict = {d['name']: d['dtype'] for d in relevant_cols if d['dtype'] in ['str', 'category']}
+    
+    # Numerische Spalten als Arrow-Strings einlesen, sie werden in parse_numeric_column umgewandelt.
+    # Dezimalkomma und Platzhalter werden dort behandelt, ohne Umweg über Python-Strings
+    dtype_dict.update({d['name']: 'string[pyarrow]' for d in relevant_cols if d['dtype'] in numeric_dtypes})
+    
+    reader = pd.read_csv(
+        file_path,
+        sep=";",
+        usecols=lambda col: col in relevant_names,
+        dtype=dtype_dict,
+        chunksize=chunksize,
+        **kwargs
+    )
+    chunks = [reader] if chunksize is None else reader
+    
+    # Blockweise filtern, der ursprüngliche Zeilenindex bleibt erhalten
+    read_report = {'rows_read': 0}
+    filtered = []
+    for chunk in chunks:
+        read_report['rows_read'] += len(chunk)
+        chunk = row_filter(chunk) if row_filter is not None else chunk
+        for key, count in chunk.attrs.pop('filter_report', {}).items():
+            read_report[key] = read_report.get(key, 0) + count
+        filtered.append(chunk)
+    
+    # Kategoriale Spalten aller Blöcke auf gemeinsame, sortierte Kategorien bringen,
+    # sonst fällt pd.concat auf object zurück (die gefilterten Blöcke sind Ausschnitte, daher astype)
+    if len(filtered) > 1:
+        unified = {}
+        for col in filtered[0].columns:
+            if isinstance(filtered[0][col].dtype, pd.CategoricalDtype):
+                categories = sorted(set().union(*(chunk[col].cat.remove_unused_categories().cat.categories for chunk in filtered)))
+                unified[col] = pd.CategoricalDtype(categories)
+        filtered = [chunk.astype(unified) for chunk in filtered]
+    
+    df = pd.concat(filtered) if len(filtered) > 1 else filtered[0]
+    
+    # Spaltenreihenfolge wie bei select_columns
+    df = select_columns(df, relevant_cols)
+    read_report['rows_kept'] = len(df)
+    df.attrs['read_report'] = read_report
+    return df
+
+
+def is_gebietsreform_label(labels: pd.Series) -> pd.Series:
+    """
+    Erkennt Landkreise mit Gebietsreform an ihrer Bezeichnung, diese enden beispielsweise mit "(bis 03.09.2011)".
+    """
+    return labels.str.contains(r'\)\s*$', na=False)
+
+
+def filter_kfz_rows(df: pd.DataFrame, keep_gebietsreform: bool = False) -> pd.DataFrame:
+    """
+    Schließt aggregierte Zeilen und Landkreise mit Gebietsreform aus den KFZ-Rohdaten aus.
+    
+    Args:
+        df: DataFrame mit den Originalspaltennamen der KFZ-Rohdaten
+        keep_gebietsreform: Wenn True, bleiben Landkreise mit Gebietsreform erhalten, damit sie
+            über region_key_utils.apply_crosswalk ihren Nachfolgern zugeordnet werden können
+        
+    Returns:
+        DataFrame ohne aggregierte Zeilen, ungültige Werte und Landkreise mit Gebietsreform. In
+        df.attrs['filter_report'] steht die Anzahl der ausgeschlossenen Zeilen je Grund
+    """
+    # Aggregierte Zeilen haben NaN in den Spalten für Antrieb und Emissionsgruppe,
+    # Platzhalter wie '-' in 'value' gelten ebenfalls als fehlend
+    aggregated = df.isna().any(axis=1)
+    invalid = ~aggregated & pd.to_numeric(df['value'], errors='coerce').isna()
+    
+    # Ausschluss von Landkreisen mit Gebietsreform, diese enden beispielsweise mit "(bis 03.09.2011)"
+    reform = ~aggregated & ~invalid & is_gebietsreform_label(df['1_variable_attribute_label']) & (not keep_gebietsreform)
+    
+    df = df[~(aggregated | invalid | reform)]
+    df.attrs['filter_report'] = {
+        'rows_aggregated': int(aggregated.sum()),
+        'rows_placeholder': int(invalid.sum()),
+        'rows_gebietsreform': int(reform.sum())
+    }
+    return df
+
+
+def filter_pop_rows(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Behält in den Bevölkerungsdaten nur die Zeilen der Gesamteinwohnerzahl.
+    
+    Args:
+        df: DataFrame mit den Originalspaltennamen der Bevölkerungsdaten
+        
+    Returns:
+        DataFrame mit den über Alter und Geschlecht aggregierten Zeilen, in df.attrs['filter_report']
+        die Anzahl der ausgeschlossenen Teilgruppen-Zeilen
+    """
+    # Aggregierte Zeilen haben weder eine Alters- noch eine Geschlechts-ID
+    mask = df['2_Auspraegung_Code'].isna() & df['3_Auspraegung_Code'].isna()
+    df = df[mask]
+    df.attrs['filter_report'] = {'rows_subgroup': int((~mask).sum())}
+    return df
+
+
+def parse_numeric_column(series: pd.Series, dtype: str = 'float64') -> tuple:
+    """
+    Wandelt eine Text-Spalte mit GENESIS-Zahlen in einen numerischen Datentyp um.
+    
+    Die Umwandlung läuft vollständig in pyarrow.compute: Dezimalkommas werden durch Punkte
+    ersetzt, Platzhalter (siehe numeric_placeholders) werden zu fehlenden Werten und die
+    übrigen Einträge werden auf ein gültiges Zahlenformat geprüft, bevor sie umgewandelt werden.
+    
+    Args:
+        series: Spalte mit Zahlen als Text (idealerweise string[pyarrow])
+        dtype: Ziel-Datentyp (z.B. 'float64', 'Int64')
+        
+    Returns:
+        Tuple aus:
+        - Umgewandelte Spalte
+        - Dictionary mit der Anzahl der 'missing' (leer), 'placeholder' (Platzhalter) und
+          'coerced' (nicht lesbar und auf NaN gesetzt) Einträge
+    """
+    # Bereits numerische Spalten nur im Datentyp anpassen
+    if pd.api.types.is_numeric_dtype(series.dtype):
+        return series.astype(dtype), {'missing': int(series.isna().sum()), 'placeholder': 0, 'coerced': 0}
+    
+    text = pc.utf8_trim_whitespace(pa.array(series.astype('string[pyarrow]'), from_pandas=True))
+    text = pc.replace_substring(text, ',', '.')
+    
+    is_placeholder = pc.fill_null(pc.is_in(text, value_set=pa.array(numeric_placeholders)), False)
+    is_number = pc.fill_null(pc.match_substring_regex(text, r'^[+-]?(\d+\.?\d*|\.\d+)([eE][+-]?\d+)?$'), False)
+    
+    # Nur gültige Einträge umwandeln, alle anderen werden zu fehlenden Werten
+    values = pc.cast(pc.if_else(is_number, text, pa.scalar(None, pa.string())), pa.float64())
+    result = pd.Series(values.to_numpy(zero_copy_only=False), index=series.index, name=series.name).astype(dtype)
+    
+    n_missing = text.null_count
+    n_placeholder = pc.sum(is_placeholder).as_py() or 0
+    n_coerced = len(text) - n_missing - n_placeholder - (pc.sum(is_number).as_py() or 0)
+    return result, {'missing': n_missing, 'placeholder': n_placeholder, 'coerced': n_coerced}
+
+
 def rename_columns(df: pd.DataFrame, relevant_cols: list) -> pd.DataFrame:
     """
     Benennt die Spalten eines DataFrames um und setzt die Datentypen gemäß der Festlegung in relevant_cols.
@@ -65,32 +260,68 @@ def rename_columns(df: pd.DataFrame, relevant_cols: list) -> pd.DataFrame:
         relevant_cols: Liste mit Dictionaries, die die Umbenennung und Datentypen definieren
         
     Returns:
-        DataFrame mit umbenannten Spalten und korrekten Datentypen
+        DataFrame mit umbenannten Spalten und korrekten Datentypen. In df.attrs['parse_report']
+        steht je numerischer Spalte, wie viele Einträge Platzhalter waren bzw. auf NaN gesetzt wurden
     """
+    # Nur Einträge berücksichtigen, deren ursprüngliche Spalte vorhanden ist, da derselbe
+    # neue Name (z.B. landkreis_id) in mehreren Datensätzen mit unterschiedlichem Datentyp vorkommt
+    matched_cols = [d for d in relevant_cols if d['name'] in df.columns]
+    
     # Erstelle Dictionary für Umbenennung (alt -> neu)
-    rename_dict = {d['name']: d['rename'] for d in relevant_cols if d['name'] in df.columns}
+    rename_dict = {d['name']: d['rename'] for d in matched_cols}
     
     # Benenne Spalten um
     df = df.rename(columns=rename_dict)
     
     # Erstelle Dictionary für Datentypen (neu -> dtype)
-    dtype_dict = {d['rename']: d['dtype'] for d in relevant_cols if d['rename'] in df.columns}
+    dtype_dict = {d['rename']: d['dtype'] for d in matched_cols}
     
     # Setze Datentypen für jede Spalte
+    parse_report = {}
     for col, dtype in dtype_dict.items():
-        if dtype in ['float64', 'Float64', 'Int64']:
-            # Behandle numerische Spalten
-            df[col] = pd.to_numeric(
-                df[col].astype(str).str.replace(',', '.'),
-                errors='coerce'
-            ).astype(dtype)
+        if dtype in numeric_dtypes:
+            # Behandle numerische Spalten (Dezimalkomma und Platzhalter)
+            df[col], parse_report[col] = parse_numeric_column(df[col], dtype)
+            if parse_report[col]['coerced'] > 0:
+                print(f"Warnung: {parse_report[col]['coerced']} Werte in '{col}' nicht als Zahl lesbar, auf NaN gesetzt")
         else:
             # Behandle nicht-numerische Spalten
             df[col] = df[col].astype(dtype)
     
+    df.attrs['parse_report'] = parse_report
     return df
 
 
+def map_unique_values(series: pd.Series, func) -> pd.Series:
+    """
+    Wendet eine Bereinigung nur auf die eindeutigen Werte einer Spalte an und überträgt das
+    Ergebnis über die Codes auf alle Zeilen. Der Aufwand hängt damit von der Anzahl der
+    Ausprägungen ab, nicht von der Anzahl der Zeilen.
+    
+    Args:
+        series: Kategoriale oder Text-Spalte
+        func: Funktion pd.Series -> pd.Series, die auf die eindeutigen Werte angewendet wird
+        
+    Returns:
+        Bereinigte Spalte; kategoriale Spalten bleiben kategorial (mit sortierten Kategorien)
+    """
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        codes = series.cat.codes.to_numpy()
+        uniques = pd.Series(series.cat.categories)
+    else:
+        codes, uniques = pd.factorize(series)
+        uniques = pd.Series(uniques)
+    
+    # Bereinigte Werte können zusammenfallen (z.B. '01' und '1'), daher neu codieren
+    new_codes, new_categories = pd.factorize(func(uniques), sort=True)
+    result = pd.Categorical.from_codes(np.where(codes >= 0, new_codes[codes], -1), categories=new_categories)
+    result = pd.Series(result, index=series.index, name=series.name)
+    
+    if not isinstance(series.dtype, pd.CategoricalDtype):
+        result = result.astype(object)
+    return result
+
+
 def remove_leading_zeros(df: pd.DataFrame) -> pd.DataFrame:
     """
     Entfernt führende Nullen aus der Spalte 'landkreis_id'.
@@ -102,7 +333,7 @@ def remove_leading_zeros(df: pd.DataFrame) -> pd.DataFrame:
         DataFrame mit bereinigter landkreis_id Spalte
     """
     if 'landkreis_id' in df.columns:
-        df['landkreis_id'] = df['landkreis_id'].astype(str).str.lstrip('0')
+        df['landkreis_id'] = map_unique_values(df['landkreis_id'], lambda ids: ids.astype(str).str.lstrip('0'))
     return df
 
 
@@ -110,44 +341,48 @@ def standardize_kfz_categories(df: pd.DataFrame) -> pd.DataFrame:
     """
     Standardisiert die Kategorien 'antrieb' und 'emissionsgruppen' im KFZ-DataFrame.
     
+    Die Bereinigung läuft nur über die eindeutigen Ausprägungen (siehe map_unique_values).
+    
     Args:
         df: DataFrame mit den Spalten 'antrieb' und 'emissionsgruppen'
         
     Returns:
         DataFrame mit standardisierten Kategoriespalten
     """
-    # Kopie des DataFrames erstellen
-    df = df.copy()
+    # Flache Kopie des DataFrames erstellen, die Spalten werden anschließend ersetzt
+    df = df.copy(deep=False)
     
     # Antriebe standardisieren
-    df['antrieb'] = (
-        df['antrieb']
+    df['antrieb'] = map_unique_values(df['antrieb'], lambda antriebe: (
+        antriebe
         .str.lower()                                    # Konvertiere in Kleinbuchstaben
         .str.replace(r'^ks-', '', regex=True)           # Entferne vorangestelltes 'ks-'
         .str.replace('-', '', regex=False)              # Entferne alle '-' Zeichen
         .replace({'sonst': 'sonstigeantriebe'})         # Ersetze 'sonst' mit 'sonstigeantriebe'
-    )
+    ))
     
     # Emissionsgruppen standardisieren
-    df['emissionsgruppen'] = (
-        df['emissionsgruppen']
+    df['emissionsgruppen'] = map_unique_values(df['emissionsgruppen'], lambda emissionen: (
+        emissionen
         .str.lower()                                    # Konvertiere in Kleinbuchstaben
         .str.replace(r'^pkw-', '', regex=True)          # Entferne vorangestelltes 'pkw-'
         .str.replace('-', '', regex=False)              # Entferne alle '-' Zeichen
         .replace({'euro6r': 'euro6'})                   # Ersetze 'euro6r' mit 'euro6'
         .replace({'sonst': 'sonstigeemissionsgruppen'}) # Ersetze 'sonst' mit 'sonstigeemissionsgruppen'
-    )
+    ))
     
     return df
 
 
-def transform_kfz_data(df: pd.DataFrame) -> pd.DataFrame:
+def transform_kfz_data(df: pd.DataFrame, engine: str = 'pandas', sparse: bool = False) -> pd.DataFrame:
     """
     Transformiert den KFZ-DataFrame durch Pivotierung und Summierung.
     
     Args:
         df: DataFrame mit den Spalten 'landkreis_id', 'landkreis', 'antrieb', 
             'emissionsgruppen' und 'anzahl_fahrzeuge'
+        engine: 'pandas' (pivot_table) oder 'matrix' (Kreuztabelle als Array, siehe build_kfz_cube)
+        sparse: Nur für engine='matrix': Kombinationsspalten als dünn besetzte Spalten (SparseDtype)
         
     Returns:
         Transformierter DataFrame mit:
@@ -155,12 +390,18 @@ def transform_kfz_data(df: pd.DataFrame) -> pd.DataFrame:
         - Summen für einzelne Antriebsarten und Emissionsgruppen
         - Gesamtanzahl der Fahrzeuge
     """
+    if engine == 'matrix':
+        return transform_kfz_cube(build_kfz_cube(df, sparse=sparse))
+    if engine != 'pandas':
+        raise ValueError(f"Unbekannte engine '{engine}', erlaubt sind 'pandas' und 'matrix'")
+    
     # Pivotieren des DataFrame
     df = df.pivot_table(
         index=['landkreis_id', 'landkreis'], 
         columns=['antrieb', 'emissionsgruppen'], 
         values='anzahl_fahrzeuge', 
-        fill_value=0)
+        fill_value=0,
+        observed=True)
     
     # MultiIndex der Spalten flach machen
     df.columns = [f"{antrieb.lower()}_{emission.lower()}" for antrieb, emission in df.columns]
@@ -185,7 +426,131 @@ def transform_kfz_data(df: pd.DataFrame) -> pd.DataFrame:
         emission_spalten = [col for col in df.columns if col.endswith(f"_{emission}")]
         df[emission] = df[emission_spalten].sum(axis=1).astype(int)
     
-    # MultiIndex in Spalten umwandeln
+    # MultiIndex in Spalten umwandeln, kategoriale Schlüssel werden wieder zu einfachen Werten
+    df = df.reset_index()
+    df[['landkreis_id', 'landkreis']] = df[['landkreis_id', 'landkreis']].astype(object)
+    
+    # Spalte 'gesamt' umbenennen
+    df = df.rename(columns={'gesamt': 'anzahl_kfz'})
+    
+    return df
+
+def build_kfz_cube(df: pd.DataFrame, sparse: bool = False) -> dict:
+    """
+    Erstellt die Kreuztabelle Landkreis × Antrieb × Emissionsgruppe als Array.
+    
+    Mehrfach vorhandene Kombinationen werden wie bei pivot_table gemittelt. Mit sparse=True wird
+    nur für tatsächlich vorkommende Zellen Speicher belegt, da viele Kombinationen strukturell
+    leer sind (z.B. elektro_euro1).
+    
+    Args:
+        df: DataFrame mit den Spalten 'landkreis_id', 'landkreis', 'antrieb', 
+            'emissionsgruppen' und 'anzahl_fahrzeuge'
+        sparse: Wenn True, werden die Werte als scipy.sparse.csr_matrix (Landkreis × Antrieb·Emission) abgelegt
+        
+    Returns:
+        Dictionary mit:
+        - 'regions': MultiIndex (landkreis_id, landkreis), sortiert
+        - 'antriebe': Index der Antriebe, sortiert
+        - 'emissionsgruppen': Index der Emissionsgruppen, sortiert
+        - 'values': np.ndarray (Landkreis × Antrieb × Emission) oder csr_matrix (Landkreis × Antrieb·Emission)
+        - 'observed': bool-Array (Antrieb × Emission), True für Kombinationen mit mindestens einem Wert
+    """
+    # Ganzzahlige Codes für alle drei Dimensionen
+    # Landkreise über kombinierte Codes von ID und Name, sortiert wie der Index von pivot_table
+    # Bei kategorialen Spalten liefert factorize einen CategoricalIndex, die Regionen werden als Werte geführt
+    id_codes, ids = pd.factorize(df['landkreis_id'], sort=True)
+    label_codes, labels = pd.factorize(df['landkreis'], sort=True)
+    ids, labels = np.asarray(ids), np.asarray(labels)
+    region_keys, region_codes = np.unique(id_codes.astype('int64') * len(labels) + label_codes, return_inverse=True)
+    regions = pd.MultiIndex.from_arrays(
+        [ids[region_keys // len(labels)], labels[region_keys % len(labels)]],
+        names=['landkreis_id', 'landkreis'])
+    antrieb_codes, antriebe = pd.factorize(df['antrieb'], sort=True)
+    emission_codes, emissionen = pd.factorize(df['emissionsgruppen'], sort=True)
+    n_regions, n_antriebe, n_emissionen = len(regions), len(antriebe), len(emissionen)
+    
+    # Zeilen ohne Wert gehen wie bei pivot_table nicht in den Mittelwert ein
+    values = df['anzahl_fahrzeuge'].to_numpy(dtype='float64', na_value=np.nan)
+    valid = ~np.isnan(values)
+    cells = (region_codes[valid] * n_antriebe + antrieb_codes[valid]) * n_emissionen + emission_codes[valid]
+    
+    # Summe und Anzahl je belegter Zelle, Mittelwert wie pivot_table (aggfunc='mean')
+    unique_cells, inverse = np.unique(cells, return_inverse=True)
+    sums = np.bincount(inverse, weights=values[valid], minlength=len(unique_cells))
+    counts = np.bincount(inverse, minlength=len(unique_cells))
+    means = np.trunc(sums / counts).astype('int64')
+    
+    combination_codes = unique_cells % (n_antriebe * n_emissionen)
+    observed = np.zeros(n_antriebe * n_emissionen, dtype=bool)
+    observed[combination_codes] = True
+    
+    if sparse:
+        cube = sp.csr_matrix(
+            (means, (unique_cells // (n_antriebe * n_emissionen), combination_codes)),
+            shape=(n_regions, n_antriebe * n_emissionen))
+    else:
+        cube = np.zeros(n_regions * n_antriebe * n_emissionen, dtype='int64')
+        cube[unique_cells] = means
+        cube = cube.reshape(n_regions, n_antriebe, n_emissionen)
+    
+    return {
+        'regions': regions,
+        'antriebe': pd.Index(antriebe),
+        'emissionsgruppen': pd.Index(emissionen),
+        'values': cube,
+        'observed': observed.reshape(n_antriebe, n_emissionen)
+    }
+
+
+def transform_kfz_cube(cube: dict) -> pd.DataFrame:
+    """
+    Erzeugt aus der Kreuztabelle von build_kfz_cube denselben DataFrame wie transform_kfz_data.
+    
+    Die Summen je Antrieb und Emissionsgruppe sowie die Gesamtanzahl ergeben sich aus je einer
+    Reduktion entlang einer Achse.
+    
+    Args:
+        cube: Dictionary von build_kfz_cube
+        
+    Returns:
+        Transformierter DataFrame wie bei transform_kfz_data
+    """
+    values = cube['values']
+    antriebe = cube['antriebe'].str.lower()
+    emissionen = cube['emissionsgruppen'].str.lower()
+    n_antriebe, n_emissionen = len(antriebe), len(emissionen)
+    
+    # Nur beobachtete Kombinationen werden zu Spalten (wie pivot_table mit dropna=True)
+    antrieb_idx, emission_idx = np.nonzero(cube['observed'])
+    columns = [f"{antriebe[a]}_{emissionen[e]}" for a, e in zip(antrieb_idx, emission_idx)]
+    flat_idx = antrieb_idx * n_emissionen + emission_idx
+    
+    if sp.issparse(values):
+        df = pd.DataFrame.sparse.from_spmatrix(values[:, flat_idx], columns=columns)
+        # Zuordnungsmatrizen Kombination -> Antrieb bzw. Emissionsgruppe
+        combos = np.arange(n_antriebe * n_emissionen)
+        to_antrieb = sp.csr_matrix((np.ones(len(combos)), (combos, combos // n_emissionen)), shape=(len(combos), n_antriebe))
+        to_emission = sp.csr_matrix((np.ones(len(combos)), (combos, combos % n_emissionen)), shape=(len(combos), n_emissionen))
+        antrieb_sums = np.asarray((values @ to_antrieb).todense()).astype('int64')
+        emission_sums = np.asarray((values @ to_emission).todense()).astype('int64')
+        total = np.asarray(values.sum(axis=1)).ravel().astype('int64')
+    else:
+        df = pd.DataFrame(values.reshape(len(values), -1)[:, flat_idx], columns=columns)
+        antrieb_sums = values.sum(axis=2)
+        emission_sums = values.sum(axis=1)
+        total = antrieb_sums.sum(axis=1)
+    
+    # Summenspalten in derselben Reihenfolge wie transform_kfz_data
+    totals = {'gesamt': total}
+    for a in pd.unique(antrieb_idx):
+        totals[antriebe[a]] = antrieb_sums[:, a]
+    for e in pd.unique(emission_idx):
+        totals[emissionen[e]] = emission_sums[:, e]
+    df = pd.concat([df, pd.DataFrame(totals)], axis=1)
+    
+    # Landkreis-Schlüssel voranstellen
+    df.index = cube['regions']
     df = df.reset_index()
     
     # Spalte 'gesamt' umbenennen
@@ -249,4 +614,90 @@ def fix_missing_values(df_combined: pd.DataFrame, df_reference: pd.DataFrame, co
         print(f"Es gibt noch Landkreise mit fehlenden '{column_name}' Werten:")
         print(still_missing[['landkreis_id', 'landkreis']])
     
-    return df_combined
\ No newline at end of file
+    return df_combined
+
+def fix_missing_values_bulk(df_combined: pd.DataFrame, df_reference: pd.DataFrame, column_name: str) -> tuple:
+    """
+    Korrigiert fehlende Werte wie fix_missing_values, aber in einer einzigen ausgerichteten Operation.
+    
+    Statt für jede fehlende Zeile den Referenz-DataFrame zu durchsuchen, wird einmalig ein
+    Nachschlage-Index über die landkreis_id aufgebaut und alle Lücken werden gemeinsam gefüllt.
+    
+    Args:
+        df_combined (pd.DataFrame): DataFrame mit zu korrigierenden fehlenden Werten (wird direkt geändert)
+        df_reference (pd.DataFrame): Referenz-DataFrame mit korrekten Werten
+        column_name (str): Name der zu korrigierenden Spalte
+    
+    Returns:
+        tuple: (DataFrame mit korrigierten Werten, Bericht als Dictionary mit den Schlüsseln
+            'column', 'missing', 'repaired' (Liste der korrigierten landkreis_id) und
+            'still_missing' (Liste der weiterhin fehlenden landkreis_id))
+    
+    Hinweise:
+        - Wie bei fix_missing_values werden Nullen am Ende der landkreis_id für die Suche entfernt
+        - Bei mehrfach vorhandener landkreis_id in der Referenz gilt der erste Eintrag
+    """
+    missing_mask = df_combined[column_name].isna()
+    
+    if missing_mask.any():
+        # Nachschlage-Index einmalig aufbauen (erster Eintrag je landkreis_id)
+        reference = df_reference.drop_duplicates('landkreis_id', keep='first')
+        lookup = pd.Series(reference[column_name].to_numpy(), index=reference['landkreis_id'].astype(str))
+        
+        # Entferne Nullen am Ende der landkreis_id für die Suche und fülle alle Lücken auf einmal
+        keys = df_combined.loc[missing_mask, 'landkreis_id'].astype(str).str.rstrip('0')
+        df_combined.loc[missing_mask, column_name] = keys.map(lookup).to_numpy()
+    
+    still_missing_mask = df_combined[column_name].isna()
+    report = {
+        'column': column_name,
+        'missing': int(missing_mask.sum()),
+        'repaired': df_combined.loc[missing_mask & ~still_missing_mask, 'landkreis_id'].astype(str).tolist(),
+        'still_missing': df_combined.loc[still_missing_mask, 'landkreis_id'].astype(str).tolist()
+    }
+    
+    return df_combined, report
+
+
+def normalize_shares(df: pd.DataFrame, columns: list, axis: str = 'row', total: str = None,
+                     scale: float = 100, zero_total: float = np.nan, inplace: bool = False) -> pd.DataFrame:
+    """
+    Normiert eine Spaltengruppe auf Anteile in einer einzigen Array-Operation.
+    
+    Args:
+        df: DataFrame mit den zu normierenden Spalten
+        columns: Liste der Spalten der Gruppe (z.B. die Antriebe)
+        axis: 'row' für Anteile an der Zeilensumme der Gruppe, 'column' für Anteile an der Spaltensumme
+        total: Name einer Spalte mit einer übergeordneten Summe (z.B. 'anzahl_kfz'). Wenn angegeben,
+            wird jede Zeile auf diesen Wert bezogen und axis wird ignoriert
+        scale: Skalierungsfaktor, 100 ergibt Prozent (Standard: 100)
+        zero_total: Wert für Anteile, deren Bezugssumme 0 ist (Standard: NaN wie bei x / x.sum())
+        inplace: Wenn True, werden die Spalten in df überschrieben, statt eine Kopie anzulegen
+        
+    Returns:
+        DataFrame mit den normierten Spalten
+    """
+    values = df[columns].to_numpy(dtype='float64', na_value=np.nan)
+    
+    # Bezugssummen bestimmen, fehlende Werte werden wie bei x.sum() übergangen
+    if total is not None:
+        totals = df[total].to_numpy(dtype='float64', na_value=np.nan)[:, np.newaxis]
+    elif axis == 'row':
+        totals = np.nansum(values, axis=1, keepdims=True)
+    elif axis == 'column':
+        totals = np.nansum(values, axis=0, keepdims=True)
+    else:
+        raise ValueError(f"Unbekannte axis '{axis}', erlaubt sind 'row' und 'column'")
+    
+    # Anteile berechnen, Bezugssumme 0 wird explizit behandelt
+    with np.errstate(divide='ignore', invalid='ignore'):
+        shares = values / totals * scale
+    shares = np.where(totals == 0, zero_total, shares)
+    
+    if not inplace:
+        df = df.copy()
+    # Spalten positionsbasiert ersetzen, damit auch eine Spaltenauswahl direkt überschrieben werden kann
+    for i, col in enumerate(columns):
+        df.isetitem(df.columns.get_loc(col), shares[:, i])
+    
+    return df
@@ -0,0 +1,180 @@
+import os
+import json
+import time
+import uuid
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+import pandas as pd
+import psutil
+
+
+# Schlüssel, unter dem eine Stufe zusätzliche Kennzahlen zurückgeben kann (z.B. Trefferquoten beim Zusammenführen)
+stage_metrics_key = '_metrics'
+
+# Abstand der Speichermessungen in Sekunden
+rss_interval = 0.01
+
+
+# Ein Messdatensatz wird als Dictionary beschrieben und als JSON-Zeile gespeichert:
+#   'run_id', 'timestamp', 'stage', 'status'
+#   'seconds':                      Laufzeit der Stufe
+#   'rss_start_mb', 'rss_peak_mb', 'rss_end_mb': Arbeitsspeicher des Prozesses (RSS)
+#   'inputs', 'outputs':            {Artefakt: {'rows', 'cols', 'memory_mb'}}
+#   'details':                      Kennzahlen der Stufe aus stage_metrics_key
+
+
+def get_rss_mb() -> float:
+    """
+    Liefert den aktuellen Arbeitsspeicher (RSS) des Prozesses in MB.
+    """
+    return psutil.Process().memory_info().rss / 2**20
+
+
+@contextmanager
+def track_rss(interval: float = rss_interval):
+    """
+    Misst den Arbeitsspeicher des Prozesses, während der Block ausgeführt wird.
+
+    Ein Hintergrund-Thread fragt den RSS in festen Abständen ab, die Spitze kurzer Allokationen
+    zwischen zwei Abfragen kann daher unterschätzt werden.
+
+    Args:
+        interval: Abstand der Messungen in Sekunden
+
+    Returns:
+        Dictionary, das nach dem Block 'rss_start_mb', 'rss_peak_mb' und 'rss_end_mb' enthält
+    """
+    result = {'rss_start_mb': get_rss_mb()}
+    peak = [result['rss_start_mb']]
+    stop = threading.Event()
+
+    def sample():
+        while not stop.wait(interval):
+            peak[0] = max(peak[0], get_rss_mb())
+
+    thread = threading.Thread(target=sample, daemon=True)
+    thread.start()
+    try:
+        yield result
+    finally:
+        stop.set()
+        thread.join()
+        result['rss_end_mb'] = get_rss_mb()
+        result['rss_peak_mb'] = max(peak[0], result['rss_end_mb'])
+
+
+def describe_frames(frames: dict) -> dict:
+    """
+    Beschreibt die DataFrames eines Dictionaries mit Zeilen, Spalten und Speicherbedarf.
+    Andere Werte (z.B. Dateipfade der Rohdaten) werden übergangen.
+    """
+    return {
+        name: {'rows': len(df), 'cols': len(df.columns), 'memory_mb': df.memory_usage(deep=True).sum() / 2**20}
+        for name, df in frames.items() if isinstance(df, pd.DataFrame)
+    }
+
+
+@contextmanager
+def record_stage(name: str, inputs: dict, records: list):
+    """
+    Zeichnet Laufzeit, Speicher sowie Zeilen und Spalten der Ein- und Ausgaben einer Stufe auf.
+
+    Im Block müssen die Ausgaben der Stufe unter record['outputs'] abgelegt werden. Kennzahlen
+    unter stage_metrics_key werden dabei aus den Ausgaben entfernt und als 'details' gespeichert.
+    Der Datensatz wird auch bei einem Fehler mit Status 'fehler' an records angehängt.
+
+    Args:
+        name: Name der Stufe
+        inputs: Eingaben der Stufe {Artefakt: DataFrame}
+        records: Liste, an die der Messdatensatz angehängt wird
+
+    Returns:
+        Messdatensatz (Dictionary)
+    """
+    record = {'stage': name, 'status': 'ausgeführt', 'inputs': describe_frames(inputs), 'outputs': {}}
+    start = time.perf_counter()
+    try:
+        with track_rss() as rss:
+            yield record
+    except Exception as e:
+        record['status'] = 'fehler'
+        record['error'] = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        record['seconds'] = time.perf_counter() - start
+        record.update(rss)
+        outputs = record['outputs']
+        record['details'] = outputs.pop(stage_metrics_key, {}) if isinstance(outputs, dict) else {}
+        record['outputs'] = describe_frames(outputs)
+        records.append(record)
+
+
+def write_metrics(records: list, path: str, run_id: str = None) -> str:
+    """
+    Hängt die Messdatensätze eines Laufs als JSON-Zeilen an eine Datei an.
+
+    Args:
+        records: Liste der Messdatensätze
+        path: Pfad der JSON-Lines-Datei
+        run_id: Kennung des Laufs, bei None wird eine neue erzeugt
+
+    Returns:
+        Kennung des Laufs
+    """
+    run_id = run_id or uuid.uuid4().hex[:12]
+    timestamp = datetime.now().isoformat(timespec='seconds')
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'a', encoding='utf-8') as f:
+        for record in records:
+            f.write(json.dumps({'run_id': run_id, 'timestamp': timestamp, **record}, ensure_ascii=False, default=str) + '\n')
+    return run_id
+
+
+def read_metrics(path: str) -> list:
+    """
+    Liest alle Messdatensätze einer JSON-Lines-Datei.
+    """
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def format_details(details: dict) -> str:
+    """
+    Fasst die Kennzahlen einer Stufe in einer Zeile zusammen (z.B. 'vee: 97.5 %').
+    """
+    parts = []
+    for key, value in details.items():
+        if isinstance(value, dict):
+            parts.append(f"{key}: " + ', '.join(f"{k}={v:.3g}" if isinstance(v, float) else f"{k}={v}" for k, v in value.items()))
+        else:
+            parts.append(f"{key}={value:.3g}" if isinstance(value, float) else f"{key}={value}")
+    return '; '.join(parts)
+
+
+def summarize_metrics(records: list) -> pd.DataFrame:
+    """
+    Fasst die Messdatensätze in einer Tabelle mit einer Zeile je Stufe zusammen.
+
+    Args:
+        records: Liste der Messdatensätze
+
+    Returns:
+        DataFrame mit den Spalten 'Stufe', 'Status', 'Sekunden', 'RSS_Spitze_MB', 'RSS_Zuwachs_MB',
+        'Zeilen_ein', 'Zeilen_aus', 'Speicher_aus_MB' und 'Details'
+    """
+    rows = []
+    for record in records:
+        inputs, outputs = record.get('inputs', {}), record.get('outputs', {})
+        rows.append({
+            'Stufe': record['stage'],
+            'Status': record['status'],
+            'Sekunden': record.get('seconds'),
+            'RSS_Spitze_MB': record.get('rss_peak_mb'),
+            'RSS_Zuwachs_MB': record['rss_peak_mb'] - record['rss_start_mb'] if 'rss_peak_mb' in record else None,
+            'Zeilen_ein': sum(d['rows'] for d in inputs.values()) if inputs else None,
+            'Zeilen_aus': sum(d['rows'] for d in outputs.values()) if outputs else None,
+            'Speicher_aus_MB': sum(d['memory_mb'] for d in outputs.values()) if outputs else None,
+            'Details': format_details(record.get('details', {}))
+        })
+    return pd.DataFrame(rows)
@@ -1,122 +1,448 @@
 import os
+import argparse
+import traceback
+from functools import partial
 import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
 
 from data_preparation_utils import *
+from storage_utils import default_format, get_table_path, write_table
+from pipeline_utils import run_pipeline
+from instrumentation_utils import stage_metrics_key, record_stage, write_metrics, summarize_metrics
+from region_key_utils import crosswalk_path, load_crosswalk, apply_crosswalk, add_region_key, join_sources
+from correlation_utils import state_from_frame, merge_states, correlation_table
+from data_preparation_polars import prepare_kfz_data
 
 
-def main():
+# Gliederung der Daten zur explorativen Analyse, Normierung und Modellerstellung
+list_kfz_aggr_antriebe = ["benzin", "diesel", "elektro", "gas", "hybrid", "pih", "sonstigeantriebe"]
+list_kfz_aggr_eg = ["euro1", "euro2", "euro3", "euro4", "euro5", "euro6", "euro6dt", "euro6d", "sonstigeemissionsgruppen"]
+list_corr = ['anzahl_personen_1000', 'vee', 'anzahl_kfz_je_person', 'unfaelle_je_10k_kfz',
+             'elektro', 'pih', 'euro2', 'euro3', 'euro4', 'euro6', 'euro6dt']
+
+# Behandlung von Landkreisen mit Gebietsreform in den KFZ-Daten
+gebietsreform_modes = ['crosswalk', 'drop']
+
+# Umsetzung der KFZ-Aufbereitung (ingest_kfz bis pivot): pandas oder ein Lazy-Abfrageplan in Polars
+backends = ['pandas', 'polars']
+
+# Datensätze, die die Stufe export in data/interim bzw. data/processed schreibt
+export_interim = ['kfz', 'vee', 'pop', 'svu', 'antriebe', 'antriebe_prozent', 'emissionsgruppen', 'emissionsgruppen_prozent']
+export_processed = ['kfz_kombiniert', 'regression_data', 'scoring_data', 'korrelation']
+
+# Messdatensätze der Stufen (JSON Lines, ein Datensatz je Stufe und Lauf)
+default_metrics_path = os.path.join(root_interim, 'pipeline_metrics.jsonl')
+
+
+def stage_ingest_kfz(inputs: dict, relevant_cols: list, gebietsreform: str = 'crosswalk', chunksize: int = None) -> dict:
+    """
+    Liest die KFZ-Rohdaten ein und bringt sie in das Langformat mit einheitlichen Spaltennamen.
+
+    Landkreise mit Gebietsreform werden mit gebietsreform='crosswalk' über die Zuordnung in
+    data/external ihren Nachfolgern zugerechnet, mit 'drop' (bisheriges Verhalten) ausgeschlossen.
+    Altkreise ohne Eintrag in der Zuordnung werden in beiden Fällen ausgeschlossen.
+    """
+    if gebietsreform not in gebietsreform_modes:
+        raise ValueError(f"Unbekannte Behandlung der Gebietsreform '{gebietsreform}', erlaubt sind {gebietsreform_modes}")
+    keep_gebietsreform = gebietsreform == 'crosswalk'
+
+    # Aggregierte Zeilen (und ggf. Landkreise mit Gebietsreform) werden bereits beim Einlesen gefiltert
+    row_filter = partial(filter_kfz_rows, keep_gebietsreform=keep_gebietsreform)
+    df_kfz = read_raw_data(inputs['raw'], relevant_cols, row_filter=row_filter, chunksize=chunksize, decimal='.') # Fahrzeugbestand
+
+    # Umbenennung und Datentypen (kategorial, Int32) gemäß relevant_cols
+    read_report = df_kfz.attrs['read_report']
+    df_kfz = rename_columns(df_kfz, relevant_cols)
+    df_kfz = remove_leading_zeros(df_kfz)
+    metrics = {'read': read_report, **df_kfz.attrs['parse_report']}
+
+    if keep_gebietsreform:
+        # Nur als Altkreis bezeichnete Zeilen umschlüsseln, manche Quellen führen alte Codes als gültige Kreise
+        reform = is_gebietsreform_label(df_kfz['landkreis'])
+        df_kfz, metrics['crosswalk'] = apply_crosswalk(df_kfz, load_crosswalk(inputs['crosswalk']), ['anzahl_fahrzeuge'],
+                                                       rows=reform)
+        unmapped = is_gebietsreform_label(df_kfz['landkreis'])
+        metrics['crosswalk']['rows_unmapped'] = int(unmapped.sum())
+        df_kfz = df_kfz[~unmapped]
+        df_kfz['landkreis_id'] = df_kfz['landkreis_id'].cat.remove_unused_categories()
+        df_kfz['landkreis'] = df_kfz['landkreis'].cat.remove_unused_categories()
+
+        # Zeilen der Altkreise und ihres Nachfolgers je Kombination summieren, die Pivotierung
+        # würde mehrfach vorhandene Kombinationen sonst mitteln
+        value_dtype = df_kfz['anzahl_fahrzeuge'].dtype
+        df_kfz = df_kfz.groupby(['landkreis_id', 'landkreis', 'antrieb', 'emissionsgruppen'], observed=True, sort=False,
+                                as_index=False)['anzahl_fahrzeuge'].sum(min_count=1)
+        df_kfz['anzahl_fahrzeuge'] = df_kfz['anzahl_fahrzeuge'].astype(value_dtype)
+
+    return {'kfz_lang': df_kfz, stage_metrics_key: metrics}
+
+
+def stage_ingest_kfz_polars(inputs: dict, relevant_cols: list, gebietsreform: str = 'crosswalk', chunksize: int = None) -> dict:
+    """
+    Führt ingest_kfz, standardize und pivot als ein Abfrageplan in Polars aus (siehe data_preparation_polars).
+
+    Das Ergebnis entspricht dem von stage_pivot. Mit chunksize wird die Streaming-Engine von Polars verwendet,
+    die Blockgröße bestimmt Polars selbst.
+    """
+    if gebietsreform not in gebietsreform_modes:
+        raise ValueError(f"Unbekannte Behandlung der Gebietsreform '{gebietsreform}', erlaubt sind {gebietsreform_modes}")
+    df_kfz, metrics = prepare_kfz_data(inputs['raw'], relevant_cols, gebietsreform=gebietsreform,
+                                       crosswalk_file=inputs['crosswalk'], streaming=chunksize is not None)
+    return {'kfz': df_kfz, stage_metrics_key: metrics}
+
+
+def stage_ingest_pop(inputs: dict, relevant_cols: list, chunksize: int = None) -> dict:
+    """
+    Liest die Bevölkerungsdaten ein, übrig bleiben die Zeilen der Gesamteinwohnerzahl.
+    """
+    df_pop = read_raw_data(inputs['raw'], relevant_cols, row_filter=filter_pop_rows, chunksize=chunksize, decimal='.', encoding='ISO-8859-1') # Bevölkerungsdaten
+
+    #df_pop = rename_columns(df_pop, relevant_cols)
+    df_pop.rename(columns= {
+        '1_Auspraegung_Code' : 'landkreis_id',
+        '1_Auspraegung_Label': 'landkreis',
+        '2_Auspraegung_Code': 'alter_id',
+        '2_Auspraegung_Label': 'alter',
+        '3_Auspraegung_Code': 'geschlecht_id',
+        '3_Auspraegung_Label': 'geschlecht',
+        'BEVMZ11__Bevoelkerung_am_Hauptwohnort__1000': 'anzahl_personen_1000'
+        }, inplace=True)
+    df_pop['anzahl_personen_1000'], parse_report = parse_numeric_column(df_pop['anzahl_personen_1000'], 'float64')
+    df_pop = add_region_key(df_pop)
+    df_pop = remove_leading_zeros(df_pop)
+
+    return {'pop': df_pop, stage_metrics_key: {'read': df_pop.attrs['read_report'], 'anzahl_personen_1000': parse_report}}
+
+
+def stage_ingest_vee(inputs: dict, relevant_cols: list, chunksize: int = None) -> dict:
+    """
+    Liest die Daten über das verfügbare Einkommen der privaten Haushalte ein.
+    """
+    df_vee = read_raw_data(inputs['raw'], relevant_cols, chunksize=chunksize, decimal='.', encoding='ISO-8859-1') # Einkommen
+    read_report = df_vee.attrs['read_report']
+    df_vee = rename_columns(df_vee, relevant_cols)
+    df_vee = add_region_key(df_vee)
+    df_vee = remove_leading_zeros(df_vee)
+
+    return {'vee': df_vee, stage_metrics_key: {'read': read_report, **df_vee.attrs['parse_report']}}
+
+
+def stage_ingest_svu(inputs: dict, relevant_cols: list, chunksize: int = None) -> dict:
+    """
+    Liest die Daten über Straßenverkehrsunfälle ein.
+    """
+    df_svu = read_raw_data(inputs['raw'], relevant_cols, chunksize=chunksize, decimal='.', encoding='ISO-8859-1') # Straßenverkehrsunfälle
+    read_report = df_svu.attrs['read_report']
+    df_svu = rename_columns(df_svu, relevant_cols)
+    df_svu = add_region_key(df_svu)
+    df_svu = remove_leading_zeros(df_svu)
+
+    return {'svu': df_svu, stage_metrics_key: {'read': read_report, **df_svu.attrs['parse_report']}}
+
+
+def stage_standardize(inputs: dict) -> dict:
+    """
+    Vereinheitlicht die Kategorien für Antrieb und Emissionsgruppe.
+    """
+    return {'kfz_standardisiert': standardize_kfz_categories(inputs['kfz_lang'])}
+
+
+def stage_pivot(inputs: dict) -> dict:
+    """
+    Pivotierung und Summierung des KFZ-DataFrame.
+    """
+    return {'kfz': transform_kfz_data(inputs['kfz_standardisiert'], engine='matrix')}
+
+
+def stage_merge(inputs: dict) -> dict:
+    """
+    Führt die KFZ-Daten mit Einkommen, Bevölkerung und Unfällen zusammen und ergänzt fehlende Werte.
+    """
+    # Zusammenführen über kanonische Regionalschlüssel in einem Durchgang, fehlende Werte von Kreisen,
+    # die in einer Quelle nur als Land geführt werden (Berlin, Hamburg), werden dabei ergänzt
+    # (es verbleiben Landkreise, zu denen keine Daten in df_pop gefunden werden können -> Bericht 'still_missing')
+    df_merged, metrics = join_sources(inputs['kfz'], {
+        'vee': (inputs['vee'], ['vee']),
+        'pop': (inputs['pop'], ['anzahl_personen_1000']),
+        'svu': (inputs['svu'], ['unfaelle_je_10k_kfz'])
+    })
+
+    # Feature Engineering: Neue Spalte 'anzahl_kfz_je_person' erstellen
+    df_merged['anzahl_kfz_je_person'] = df_merged['anzahl_kfz'] / (df_merged['anzahl_personen_1000'] * 1000)
+
+    return {'kfz_kombiniert': df_merged, stage_metrics_key: metrics}
+
+
+def stage_normalize(inputs: dict) -> dict:
+    """
+    Gliedert die Daten nach Antrieben und Emissionsgruppen, normiert sie und erstellt die Regressionsdaten.
+    """
+    df_merged = inputs['kfz_kombiniert']
+
+    df_antriebe = df_merged[['landkreis'] + list_kfz_aggr_antriebe]
+    df_eg = df_merged[['landkreis'] + list_kfz_aggr_eg]
+
+    # Anteile in Prozent je Landkreis. Die Spaltenauswahl ist bereits eine Kopie, inplace vermeidet nur
+    # eine zweite Kopie in normalize_shares; absolute und prozentuale Tabellen liegen gleichzeitig vor
+    df_antriebe_prozent = normalize_shares(df_merged[['landkreis'] + list_kfz_aggr_antriebe], list_kfz_aggr_antriebe, inplace=True)
+    df_eg_prozent = normalize_shares(df_merged[['landkreis'] + list_kfz_aggr_eg], list_kfz_aggr_eg, inplace=True)
+
+    # Dataframe für die Korrelation erstellen
+    df_corr = pd.DataFrame(pd.concat([df_merged[['anzahl_personen_1000', 'vee', 'anzahl_kfz', 'anzahl_kfz_je_person', 'unfaelle_je_10k_kfz']],
+                                      df_antriebe_prozent[list_kfz_aggr_antriebe],
+                                      df_eg_prozent[list_kfz_aggr_eg]], axis=1))
+    df_corr = df_corr[list_corr]
+
+    # Regressionsdaten mit Landkreis als Eingabe für scoring_utils
+    df_scoring = pd.concat([df_merged[['landkreis_id', 'landkreis']], df_corr], axis=1)
+
+    return {
+        'antriebe': df_antriebe,
+        'antriebe_prozent': df_antriebe_prozent,
+        'emissionsgruppen': df_eg,
+        'emissionsgruppen_prozent': df_eg_prozent,
+        'regression_data': df_corr,
+        'scoring_data': df_scoring,
+        # Korrelationen mit p-Werten aller Variablenpaare der Regressionsdaten
+        'korrelation': correlation_table(state_from_frame(df_corr, list_corr)),
+        # Zeilen mit fehlenden Werten, die bei der Modellerstellung entfallen (dropna)
+        stage_metrics_key: {'rows_incomplete': int(df_corr.isna().any(axis=1).sum())}
+    }
+
+
+def stage_export(inputs: dict) -> dict:
+    """
+    Speichert alle Zwischen- und Endergebnisse in data/interim und data/processed (Parquet, zusätzlich als CSV).
+    """
+    for name in export_interim:
+        # Hilfsspalten aus add_region_key werden nur zum Zusammenführen benötigt, nicht exportiert
+        write_table(inputs[name].drop(columns=['region_key', 'ebene'], errors='ignore'), root_interim, name, csv_export=True)
+    for name in export_processed:
+        write_table(inputs[name], root_processed, name, csv_export=True)
+
+    print(inputs['regression_data'].info())
+    return {}
+
+
+def get_export_paths() -> list:
+    """
+    Liefert die Pfade aller Dateien, die die Stufe export schreibt (Standardformat und CSV).
+    """
+    return [get_table_path(root, name, fmt)
+            for root, names in [(root_interim, export_interim), (root_processed, export_processed)]
+            for name in names for fmt in dict.fromkeys([default_format, 'csv'])]
+
+
+def make_stages(files: dict, gebietsreform: str = 'crosswalk', backend: str = 'pandas') -> list:
+    """
+    Erstellt die Stufen der Aufbereitung mit deklarierten Ein- und Ausgaben.
+
+    Args:
+        files: Dictionary {Quelle: Dateipfad} der Rohdaten für 'kfz', 'pop', 'vee' und 'svu'
+        gebietsreform: Behandlung von Landkreisen mit Gebietsreform, siehe stage_ingest_kfz
+        backend: 'pandas' oder 'polars'. Mit 'polars' erzeugt ingest_kfz direkt das Artefakt 'kfz',
+            die Stufen standardize und pivot entfallen
+
+    Returns:
+        Liste der Stufen-Dictionaries für run_pipeline
+    """
+    if backend not in backends:
+        raise ValueError(f"Unbekanntes Backend '{backend}', erlaubt sind {backends}")
+    kfz_params = {'relevant_cols': relevant_cols, 'gebietsreform': gebietsreform}
+    kfz_files = {'raw': files['kfz'], 'crosswalk': crosswalk_path}
+    if backend == 'polars':
+        kfz_stages = [
+            {'name': 'ingest_kfz', 'func': stage_ingest_kfz_polars, 'inputs': [], 'files': kfz_files,
+             'outputs': ['kfz'], 'params': kfz_params}
+        ]
+    else:
+        kfz_stages = [
+            {'name': 'ingest_kfz', 'func': stage_ingest_kfz, 'inputs': [], 'files': kfz_files,
+             'outputs': ['kfz_lang'], 'params': kfz_params},
+            {'name': 'standardize', 'func': stage_standardize, 'inputs': ['kfz_lang'], 'outputs': ['kfz_standardisiert']},
+            {'name': 'pivot', 'func': stage_pivot, 'inputs': ['kfz_standardisiert'], 'outputs': ['kfz']}
+        ]
+    return kfz_stages + [
+        {'name': 'ingest_pop', 'func': stage_ingest_pop, 'inputs': [], 'files': {'raw': files['pop']},
+         'outputs': ['pop'], 'params': {'relevant_cols': relevant_cols}},
+        {'name': 'ingest_vee', 'func': stage_ingest_vee, 'inputs': [], 'files': {'raw': files['vee']},
+         'outputs': ['vee'], 'params': {'relevant_cols': relevant_cols}},
+        {'name': 'ingest_svu', 'func': stage_ingest_svu, 'inputs': [], 'files': {'raw': files['svu']},
+         'outputs': ['svu'], 'params': {'relevant_cols': relevant_cols}},
+        {'name': 'merge', 'func': stage_merge, 'inputs': ['kfz', 'vee', 'pop', 'svu'], 'outputs': ['kfz_kombiniert']},
+        {'name': 'normalize', 'func': stage_normalize, 'inputs': ['kfz_kombiniert'],
+         'outputs': ['antriebe', 'antriebe_prozent', 'emissionsgruppen', 'emissionsgruppen_prozent', 'regression_data',
+                     'scoring_data', 'korrelation']},
+        {'name': 'export', 'func': stage_export, 'inputs': export_interim + export_processed,
+         'outputs': [], 'exports': get_export_paths()}
+    ]
+
+
+# Rohdaten und Stufen für den einzelnen Jahrgang in data/raw
+raw_files = {'kfz': os.path.join(root_raw, data_kfz), 'pop': os.path.join(root_raw, data_pop),
+             'vee': os.path.join(root_raw, data_vee), 'svu': os.path.join(root_raw, data_svu)}
+stages = make_stages(raw_files)
+
+# Stufen, die je Jahrgang für das Panel ausgeführt werden (bis einschließlich merge)
+vintage_stage_names = ['ingest_kfz', 'ingest_pop', 'ingest_vee', 'ingest_svu', 'standardize', 'pivot', 'merge']
+
+
+def build_vintage(year: int, chunksize: int = None, force: bool = False, gebietsreform: str = 'crosswalk',
+                  backend: str = 'pandas') -> pd.DataFrame:
+    """
+    Führt ingest, standardize, pivot und merge für einen Jahrgang aus (eigener Cache je Jahrgang).
+
+    Args:
+        year: Jahrgang der Rohdaten, siehe vintage_file_templates
+        chunksize: Anzahl Zeilen je Block beim Einlesen der Rohdaten
+        force: Wenn True, werden alle Stufen trotz Cache ausgeführt
+        gebietsreform: Behandlung von Landkreisen mit Gebietsreform, siehe stage_ingest_kfz
+        backend: Umsetzung der KFZ-Aufbereitung, siehe make_stages
+
+    Returns:
+        Zusammengeführter DataFrame des Jahrgangs mit zusätzlicher Spalte 'jahr'
+    """
+    vintage_stages = [stage for stage in make_stages(get_vintage_files(year), gebietsreform, backend)
+                      if stage['name'] in vintage_stage_names]
+    result = run_pipeline(vintage_stages, os.path.join(root_cache, str(year)), force=force,
+                          options={'chunksize': chunksize}, collect=['kfz_kombiniert'], verbose=False)
+
+    df_year = result['artifacts']['kfz_kombiniert']
+    df_year.insert(2, 'jahr', year)
+    return df_year
+
+
+def build_panel(years: list, workers: int = None, chunksize: int = None, force: bool = False,
+                gebietsreform: str = 'crosswalk', backend: str = 'pandas') -> pd.DataFrame:
+    """
+    Baut ein Panel über mehrere Jahrgänge auf. Die Jahrgänge sind bis zum Zusammenfügen
+    unabhängig und werden parallel in einem Prozesspool verarbeitet.
+
+    Args:
+        years: Liste der Jahrgänge
+        workers: Anzahl paralleler Prozesse. Bei None die Anzahl der CPU-Kerne (höchstens Anzahl Jahrgänge)
+        chunksize: Anzahl Zeilen je Block beim Einlesen der Rohdaten
+        force: Wenn True, werden alle Stufen trotz Cache ausgeführt
+        gebietsreform: Behandlung von Landkreisen mit Gebietsreform, siehe stage_ingest_kfz.
+            Mit 'crosswalk' sind die Landkreise aller Jahrgänge auf den aktuellen Gebietsstand bezogen
+        backend: Umsetzung der KFZ-Aufbereitung, siehe make_stages
+
+    Returns:
+        Panel im Langformat, eine Zeile je (landkreis_id, jahr)
+    """
+    years = sorted(set(years))
+    workers = min(workers or os.cpu_count() or 1, len(years))
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        frames = list(executor.map(build_vintage, years, [chunksize] * len(years), [force] * len(years),
+                                   [gebietsreform] * len(years), [backend] * len(years)))
+
+    # Jahrgänge untereinander anfügen, Schlüssel des Panels ist (landkreis_id, jahr)
+    df_panel = pd.concat(frames, ignore_index=True)
+    df_panel = df_panel.sort_values(['landkreis_id', 'jahr'], ignore_index=True)
+    return df_panel
+
+
+def panel_correlation(df_panel: pd.DataFrame) -> pd.DataFrame:
+    """
+    Berechnet die Korrelationen der Regressionsvariablen über alle Jahrgänge eines Panels.
+
+    Je Jahrgang wird nur ein Korrelationszustand aus Mittelwerten, Summen der Abweichungsquadrate und
+    paarweisen Anzahlen gebildet, die Zustände werden anschließend zusammengeführt. Die Anteile der
+    Antriebe und Emissionsgruppen werden dafür je Jahrgang berechnet, ohne das Panel zu erweitern.
+
+    Args:
+        df_panel: Panel aus build_panel
+
+    Returns:
+        Korrelationen im Langformat, siehe correlation_utils.correlation_table
+    """
+    states = []
+    for _, df_year in df_panel.groupby('jahr', sort=True):
+        df_corr = pd.concat([df_year[['anzahl_personen_1000', 'vee', 'anzahl_kfz_je_person', 'unfaelle_je_10k_kfz']],
+                             normalize_shares(df_year[list_kfz_aggr_antriebe], list_kfz_aggr_antriebe),
+                             normalize_shares(df_year[list_kfz_aggr_eg], list_kfz_aggr_eg)], axis=1)
+        states.append(state_from_frame(df_corr, list_corr))
+    return correlation_table(merge_states(*states))
+
+
+def main(chunksize: int = None, only: list = None, start: str = None, force: bool = False,
+         years: list = None, workers: int = None, metrics_path: str = default_metrics_path, summary: bool = False,
+         gebietsreform: str = 'crosswalk', backend: str = 'pandas'):
     """
     Hauptfunktion, die als Einstiegspunkt für das Programm dient.
+
+    Args:
+        chunksize: Anzahl Zeilen je Block beim Einlesen der Rohdaten. Bei None werden die Dateien
+            in einem Stück gelesen, sonst blockweise mit Spalten- und Zeilenfilter (Streaming)
+        only: Nur diese Stufen ausführen (z.B. ['pivot'] oder ['ingest'] für alle Einlese-Stufen)
+        start: Ab dieser Stufe alle nachgelagerten Stufen ausführen
+        force: Wenn True, werden die ausgewählten Stufen auch bei unveränderten Eingaben ausgeführt
+        years: Liste von Jahrgängen. Wenn angegeben, wird statt des Einzeljahrgangs ein Panel
+            über alle Jahrgänge erstellt und als 'kfz_panel' gespeichert (Korrelationen als 'panel_korrelation')
+        workers: Anzahl paralleler Prozesse für das Panel
+        metrics_path: JSON-Lines-Datei, an die je Stufe Laufzeit, Speicher, Zeilen und Kennzahlen
+            angehängt werden. Bei None werden keine Messdaten gespeichert
+        summary: Wenn True, werden die Messdaten am Ende als Tabelle ausgegeben
+        gebietsreform: 'crosswalk' ordnet Landkreise mit Gebietsreform ihren Nachfolgern zu,
+            'drop' schließt sie aus
+        backend: 'pandas' oder 'polars' für die KFZ-Aufbereitung (ingest_kfz bis pivot), siehe make_stages
     """
+    records = []
+    failed = False
     try:
-        # Dataframes der Rohdaten
-        df_kfz = pd.read_csv(os.path.join(root_raw, data_kfz), sep=";", decimal='.') # Fahrzeugbestand
-        df_pop = pd.read_csv(os.path.join(root_raw, data_pop), sep=";", decimal='.', encoding='ISO-8859-1') # Bevölkerungsdaten
-        df_vee = pd.read_csv(os.path.join(root_raw, data_vee), sep=";", decimal='.', encoding='ISO-8859-1') # Einkommen
-        df_svu = pd.read_csv(os.path.join(root_raw, data_svu), sep=";", decimal='.', encoding='ISO-8859-1') # Straßenverkehrsunfälle
-
-        # Daten vorverarbeiten
-        df_kfz = select_columns(df_kfz, relevant_cols)
-        #df_kfz = rename_columns(df_kfz, relevant_cols)
-        df_kfz.rename(columns= {
-            '1_variable_attribute_code' : 'landkreis_id',
-            '1_variable_attribute_label': 'landkreis',
-            '2_variable_attribute_code': 'antrieb',
-            '3_variable_attribute_code': 'emissionsgruppen',
-            'value': 'anzahl_fahrzeuge'
-            }, inplace=True)
-        df_kfz['anzahl_fahrzeuge']= pd.to_numeric(df_kfz['anzahl_fahrzeuge'], errors='coerce').astype('Int64')
-        #
-        df_kfz = standardize_kfz_categories(df_kfz)
-        df_kfz = remove_leading_zeros(df_kfz)
-
-        df_pop = select_columns(df_pop, relevant_cols)
-        #df_pop = rename_columns(df_pop, relevant_cols)
-        df_pop.rename(columns= {
-            '1_Auspraegung_Code' : 'landkreis_id',
-            '1_Auspraegung_Label': 'landkreis',
-            '2_Auspraegung_Code': 'alter_id',
-            '2_Auspraegung_Label': 'alter',
-            '3_Auspraegung_Code': 'geschlecht_id',
-            '3_Auspraegung_Label': 'geschlecht',
-            'BEVMZ11__Bevoelkerung_am_Hauptwohnort__1000': 'anzahl_personen_1000'
-            }, inplace=True)
-        df_pop['anzahl_personen_1000'] = pd.to_numeric(df_pop['anzahl_personen_1000'], errors='coerce').astype('float64')
-        #
-        df_pop = remove_leading_zeros(df_pop)
-
-        df_vee = select_columns(df_vee, relevant_cols)
-        df_vee = rename_columns(df_vee, relevant_cols)
-        df_vee = remove_leading_zeros(df_vee)
-
-        df_svu = select_columns(df_svu, relevant_cols)
-        df_svu = rename_columns(df_svu, relevant_cols)
-        df_svu = remove_leading_zeros(df_svu)
-
-        # Daten auschließen
-        df_kfz = df_kfz.dropna() # aggregierte Zeilen haben NaN in den Spalten 'antriebe' und 'emissionsgruppen'
-        df_kfz = df_kfz[~df_kfz['landkreis'].str.contains(r'\)\s*$', na=False)] # Ausschluss von Landkreisen mit Gebietsreform, diese enden beispielsweise mit "(bis 03.09.2011)"
-
-        df_pop = df_pop[df_pop['alter_id'].isna()] # Nur aggregierte Zeilen behalten (alter_id ist NaN)
-        df_pop = df_pop[df_pop['geschlecht_id'].isna()] # Nur aggregierte Zeilen behalten (geschlecht_id ist NaN), übrig bleiben Zeilen der Gesamteinwohnerzahl
-
-        # Pivotierung und Summierung des KFZ-DataFrame
-        df_kfz = transform_kfz_data(df_kfz)
-
-        # Transformierte Daten zwischenspeichern
-        df_kfz.to_csv(os.path.join(root_interim, 'kfz.csv'))
-        df_vee.to_csv(os.path.join(root_interim, 'vee.csv'))
-        df_pop.to_csv(os.path.join(root_interim, 'pop.csv'))
-        df_svu.to_csv(os.path.join(root_interim, 'svu.csv'))
-
-        # Zusammenführen der Dataframes mit Hilfe der landkreis_id
-        df_merged = df_kfz.merge(df_vee[['landkreis_id', 'vee']], on='landkreis_id', how='left')
-        df_merged = df_merged.merge(df_pop[['landkreis_id', 'anzahl_personen_1000']], on='landkreis_id', how='left')
-        df_merged = df_merged.merge(df_svu[['landkreis_id', 'unfaelle_je_10k_kfz']], on='landkreis_id', how='left')
-        
-        # Suche nach Daten, die aufgrund inkonsistenter `landkreis_id` nicht gemerged werden konnten
-        # (es verbleiben Landkreise, zu denen keine Daten in df_pop gefunden werden können -> Ausgabe mit verbose=True )
-        df_merged = fix_missing_values(df_merged, df_vee, 'vee')
-        df_merged = fix_missing_values(df_merged, df_pop, 'anzahl_personen_1000')
-        df_merged = fix_missing_values(df_merged, df_svu, 'unfaelle_je_10k_kfz')
-
-        # Feature Engineering: Neue Spalte 'anzahl_kfz_je_person' erstellen
-        df_merged['anzahl_kfz_je_person'] = df_merged['anzahl_kfz'] / (df_merged['anzahl_personen_1000'] * 1000)
-
-        # Zusammengesetzen aufbereiteten Datensatz speichern
-        df_merged.to_csv(os.path.join(root_processed, 'kfz_kombiniert.csv'), index=False, encoding='utf-8')
-
-        # Gliederung der Daten zur explorativen Analyse, Normierung und Modellerstellung
-        list_kfz_aggr_antriebe = ["benzin", "diesel", "elektro", "gas", "hybrid", "pih", "sonstigeantriebe"]
-        list_kfz_aggr_eg = ["euro1", "euro2", "euro3", "euro4", "euro5", "euro6", "euro6dt", "euro6d", "sonstigeemissionsgruppen"]
-
-        df_antriebe = df_merged[['landkreis'] + list_kfz_aggr_antriebe]
-        df_eg = df_merged[['landkreis'] + list_kfz_aggr_eg]
-
-        df_antriebe_prozent = df_antriebe.copy()
-        df_antriebe_prozent[list_kfz_aggr_antriebe] = df_antriebe[list_kfz_aggr_antriebe].apply(lambda x: x / x.sum() * 100, axis=1)
-        df_eg_prozent = df_eg.copy()
-        df_eg_prozent[list_kfz_aggr_eg] = df_eg[list_kfz_aggr_eg].apply(lambda x: x / x.sum() * 100, axis=1)
-
-        # Dataframe für die Korrelation erstellen
-        df_corr = pd.DataFrame(pd.concat([df_merged[['anzahl_personen_1000', 'vee', 'anzahl_kfz', 'anzahl_kfz_je_person', 'unfaelle_je_10k_kfz']],
-                                          df_antriebe_prozent[list_kfz_aggr_antriebe],
-                                          df_eg_prozent[list_kfz_aggr_eg]], axis=1))
-        df_corr = df_corr[['anzahl_personen_1000', 'vee', 'anzahl_kfz_je_person', 'unfaelle_je_10k_kfz',
-                                    'elektro', 'pih',
-                                    'euro2', 'euro3', 'euro4', 'euro6', 'euro6dt']]
-        
-        # Datensätze speichern
-        df_antriebe.to_csv(os.path.join(root_interim, 'antriebe.csv'), index=False, encoding='utf-8')
-        df_antriebe_prozent.to_csv(os.path.join(root_interim, 'antriebe_prozent.csv'), index=False, encoding='utf-8')
-        df_eg.to_csv(os.path.join(root_interim, 'emissionsgruppen.csv'), index=False, encoding='utf-8')
-        df_eg_prozent.to_csv(os.path.join(root_interim, 'emissionsgruppen_prozent.csv'), index=False, encoding='utf-8')
-        df_corr.to_csv(os.path.join(root_processed, 'regression_data.csv'), index=False, encoding='utf-8')
-
-        print(df_corr.info())
+        if years:
+            with record_stage('panel', {}, records) as record:
+                df_panel = build_panel(years, workers=workers, chunksize=chunksize, force=force,
+                                       gebietsreform=gebietsreform, backend=backend)
+                record['outputs'] = {'kfz_panel': df_panel}
+            write_table(df_panel, root_processed, 'kfz_panel', csv_export=True)
+            write_table(panel_correlation(df_panel), root_processed, 'panel_korrelation', csv_export=True)
+            print(f"Panel mit {len(df_panel)} Zeilen für die Jahrgänge {sorted(set(years))} erstellt")
+        else:
+            run_pipeline(make_stages(raw_files, gebietsreform, backend), root_cache, only=only, start=start, force=force,
+                         options={'chunksize': chunksize}, metrics=records)
         print("Programm erfolgreich beendet!")
     except Exception as e:
+        failed = True
         print(f"Ein Fehler ist aufgetreten: {e}")
+        traceback.print_exc()
+    finally:
+        # Messdaten auch bei einem Fehler speichern, der letzte Datensatz hat dann den Status 'fehler'
+        if metrics_path and records:
+            run_id = write_metrics(records, metrics_path)
+            print(f"Messdaten des Laufs {run_id} gespeichert in {metrics_path}")
+        if summary and records:
+            with pd.option_context('display.float_format', '{:.2f}'.format, 'display.width', 200,
+                                   'display.max_colwidth', 120):
+                print(summarize_metrics(records).to_string(index=False))
+
+    if failed:
+        raise SystemExit(1)
+
+
+def parse_args() -> argparse.Namespace:
+    """
+    Liest die Kommandozeilenargumente.
+    """
+    stage_names = ', '.join(stage['name'] for stage in stages)
+    parser = argparse.ArgumentParser(description="Aufbereitung der Daten über Fahrzeugflotten in deutschen Landkreisen")
+    parser.add_argument('--only', nargs='+', metavar='STUFE', help=f"Nur diese Stufen ausführen ({stage_names})")
+    parser.add_argument('--from', dest='start', metavar='STUFE', help="Ab dieser Stufe alle nachgelagerten Stufen ausführen")
+    parser.add_argument('--force', action='store_true', help="Ausgewählte Stufen trotz Cache ausführen")
+    parser.add_argument('--chunksize', type=int, default=None, help="Rohdaten blockweise mit dieser Zeilenanzahl einlesen")
+    parser.add_argument('--years', nargs='+', type=int, metavar='JAHR', help="Panel über diese Jahrgänge erstellen")
+    parser.add_argument('--workers', type=int, default=None, help="Anzahl paralleler Prozesse für das Panel")
+    parser.add_argument('--metrics', dest='metrics_path', metavar='DATEI', default=default_metrics_path,
+                        help="Messdaten je Stufe als JSON Lines an diese Datei anhängen (Standard: data/interim/pipeline_metrics.jsonl)")
+    parser.add_argument('--no-metrics', dest='metrics_path', action='store_const', const=None, help="Keine Messdaten speichern")
+    parser.add_argument('--summary', action='store_true', help="Messdaten je Stufe am Ende als Tabelle ausgeben")
+    parser.add_argument('--gebietsreform', choices=gebietsreform_modes, default='crosswalk',
+                        help="Landkreise mit Gebietsreform den Nachfolgern zuordnen (crosswalk) oder ausschließen (drop)")
+    parser.add_argument('--backend', choices=backends, default='pandas',
+                        help="KFZ-Aufbereitung mit pandas oder als Lazy-Abfrageplan mit Polars (mehrere Kerne)")
+    return parser.parse_args()
+
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main(**vars(parse_args()))
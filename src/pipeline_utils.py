@@ -0,0 +1,325 @@
+import hashlib
+import inspect
+import json
+import os
+import shutil
+
+from storage_utils import read_table, write_table
+from instrumentation_utils import record_stage
+
+
+# Eine Stufe der Pipeline wird als Dictionary beschrieben:
+#   'name':    eindeutiger Name der Stufe (z.B. 'pivot')
+#   'func':    Funktion func(inputs, **params) -> Dictionary {Artefaktname: DataFrame}
+#   'inputs':  Liste der Artefakte, die von vorherigen Stufen erzeugt werden
+#   'files':   Dictionary {Alias: Dateipfad} der gelesenen Rohdateien (optional)
+#   'outputs': Liste der erzeugten Artefakte
+#   'params':  Dictionary mit Parametern, die in den Cache-Schlüssel eingehen (optional)
+#   'exports': Liste der Dateien, die die Stufe außerhalb des Caches schreibt (optional). Fehlt eine
+#              davon, gilt die Stufe als nicht im Cache vorhanden und wird erneut ausgeführt
+
+manifest_name = 'manifest.json'
+
+# Verzeichnis der Module, deren Funktionen in den Code-Fingerabdruck der Stufen eingehen
+script_dir = os.path.dirname(os.path.abspath(__file__))
+file_index_name = 'file_hashes.json'
+
+
+def hash_file(path: str, file_index: dict = None, block_size: int = 1 << 20) -> str:
+    """
+    Berechnet den SHA-256-Hash des Inhalts einer Datei.
+
+    Ist ein file_index angegeben, wird der Hash anhand von Größe und Änderungszeit wiederverwendet,
+    sodass unveränderte Rohdateien nicht bei jedem Lauf neu gelesen werden.
+
+    Args:
+        path: Pfad zur Datei
+        file_index: Dictionary {Pfad: {'size', 'mtime_ns', 'sha256'}}, wird aktualisiert
+        block_size: Anzahl Bytes je Leseschritt
+
+    Returns:
+        Hexadezimaler Hash des Dateiinhalts
+    """
+    stat = os.stat(path)
+    entry = (file_index or {}).get(os.path.abspath(path))
+    if entry and entry['size'] == stat.st_size and entry['mtime_ns'] == stat.st_mtime_ns:
+        return entry['sha256']
+
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+
+    if file_index is not None:
+        file_index[os.path.abspath(path)] = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sha256': digest.hexdigest()}
+    return digest.hexdigest()
+
+
+def resolve_order(stages: list) -> list:
+    """
+    Sortiert die Stufen topologisch anhand ihrer deklarierten Ein- und Ausgaben.
+
+    Args:
+        stages: Liste der Stufen-Dictionaries
+
+    Returns:
+        Liste der Stufen in ausführbarer Reihenfolge
+    """
+    producer = {}
+    for stage in stages:
+        for output in stage['outputs']:
+            if output in producer:
+                raise ValueError(f"Artefakt '{output}' wird von '{producer[output]}' und '{stage['name']}' erzeugt")
+            producer[output] = stage['name']
+
+    # Abhängigkeiten zwischen Stufen (Stufe -> Menge der vorgelagerten Stufen)
+    dependencies = {}
+    for stage in stages:
+        missing = [name for name in stage['inputs'] if name not in producer]
+        if missing:
+            raise ValueError(f"Stufe '{stage['name']}' benötigt unbekannte Artefakte: {missing}")
+        dependencies[stage['name']] = {producer[name] for name in stage['inputs']}
+
+    # Kahn-Algorithmus, bei Gleichstand bleibt die deklarierte Reihenfolge erhalten
+    order = []
+    done = set()
+    while len(order) < len(stages):
+        ready = [s for s in stages if s['name'] not in done and dependencies[s['name']] <= done]
+        if not ready:
+            raise ValueError("Zyklische Abhängigkeit zwischen den Stufen")
+        order.append(ready[0])
+        done.add(ready[0]['name'])
+    return order
+
+
+def match_stage(stage_name: str, selector: str) -> bool:
+    """
+    Prüft, ob ein Stufenname zu einer Auswahl passt. 'ingest' passt z.B. zu 'ingest_kfz'.
+    """
+    return stage_name == selector or stage_name.startswith(selector + '_')
+
+
+def select_stages(stages: list, only: list = None, start: str = None) -> set:
+    """
+    Bestimmt die auszuführenden Stufen.
+
+    Args:
+        stages: Liste der Stufen in topologischer Reihenfolge
+        only: Liste von Stufennamen (oder Präfixen), die ausschließlich ausgeführt werden
+        start: Stufenname (oder Präfix), ab dem alle nachgelagerten Stufen ausgeführt werden
+
+    Returns:
+        Menge der ausgewählten Stufennamen
+    """
+    names = [stage['name'] for stage in stages]
+    selected = set(names)
+
+    if only:
+        selected = {name for name in names if any(match_stage(name, sel) for sel in only)}
+        unknown = [sel for sel in only if not any(match_stage(name, sel) for name in names)]
+        if unknown:
+            raise ValueError(f"Unbekannte Stufen: {unknown}")
+
+    if start:
+        downstream = {name for name in names if match_stage(name, start)}
+        if not downstream:
+            raise ValueError(f"Unbekannte Stufe: {start}")
+        # Alle Stufen, die direkt oder indirekt von der Startstufe abhängen
+        produced = {out for stage in stages if stage['name'] in downstream for out in stage['outputs']}
+        for stage in stages:
+            if set(stage['inputs']) & produced:
+                downstream.add(stage['name'])
+                produced.update(stage['outputs'])
+        selected &= downstream
+
+    return selected
+
+
+def referenced_names(code) -> set:
+    """
+    Liefert alle globalen Namen eines Code-Objekts einschließlich verschachtelter Funktionen,
+    Lambdas und Comprehensions (diese haben eigene Code-Objekte).
+    """
+    names = set(code.co_names)
+    for const in code.co_consts:
+        if inspect.iscode(const):
+            names |= referenced_names(const)
+    return names
+
+
+def collect_sources(func, sources: dict = None) -> dict:
+    """
+    Sammelt den Quelltext einer Funktion und aller transitiv von ihr aufgerufenen Funktionen
+    aus den Modulen des Projekts (Verzeichnis src) sowie die Werte der verwendeten Konstanten.
+
+    Args:
+        func: Funktion, deren Aufrufgraph durchlaufen wird
+        sources: Bereits gesammelte Einträge {Modul.Name: Quelltext bzw. Wert}, wird ergänzt
+
+    Returns:
+        Dictionary {Modul.Name: Quelltext bzw. Wert}
+    """
+    sources = {} if sources is None else sources
+    func = inspect.unwrap(func)
+    sources[f'{func.__module__}.{func.__qualname__}'] = inspect.getsource(func)
+
+    for name in sorted(referenced_names(func.__code__)):
+        if name not in func.__globals__:
+            continue
+        obj = inspect.unwrap(func.__globals__[name]) if callable(func.__globals__[name]) else func.__globals__[name]
+        if inspect.isfunction(obj):
+            # Nur Funktionen aus src verfolgen, Bibliotheken (pandas, numpy, ...) nicht
+            key = f'{obj.__module__}.{obj.__qualname__}'
+            if key not in sources and os.path.dirname(inspect.getfile(obj)) == script_dir:
+                collect_sources(obj, sources)
+        elif isinstance(obj, (str, int, float, bool, list, tuple, dict, set, frozenset)):
+            # Konstanten wie Spaltenlisten oder Zuordnungen gehen mit ihrem Wert ein
+            key = f'{func.__module__}.{name}'
+            sources[key] = json.dumps(sorted(obj, key=str) if isinstance(obj, (set, frozenset)) else obj,
+                                      sort_keys=True, default=str)
+    return sources
+
+
+def compute_stage_key(stage: dict, input_keys: dict) -> str:
+    """
+    Berechnet den Cache-Schlüssel einer Stufe aus Code, Parametern und den Schlüsseln der Eingaben.
+
+    In den Code-Fingerabdruck gehen der Quelltext der Stufenfunktion und aller transitiv von ihr
+    aufgerufenen Funktionen aus src sowie die verwendeten Konstanten ein, siehe collect_sources.
+    Aufrufe über Modulattribute (modul.funktion) werden dabei nicht verfolgt.
+
+    Args:
+        stage: Stufen-Dictionary
+        input_keys: Dictionary {Eingabe: Schlüssel bzw. Dateihash}
+
+    Returns:
+        Hexadezimaler Schlüssel
+    """
+    sources = collect_sources(stage['func'])
+
+    material = json.dumps({
+        'name': stage['name'],
+        'code': sources,
+        'params': stage.get('params', {}),
+        'inputs': input_keys
+    }, sort_keys=True, default=str)
+    return hashlib.sha256(material.encode('utf-8')).hexdigest()[:16]
+
+
+def call_stage(stage: dict, inputs: dict, options: dict) -> dict:
+    """
+    Ruft die Funktion einer Stufe auf. Optionen, die nicht in den Cache-Schlüssel eingehen
+    (z.B. chunksize), werden nur übergeben, wenn die Funktion sie als Parameter kennt.
+    """
+    accepted = inspect.signature(stage['func']).parameters
+    kwargs = {name: value for name, value in options.items() if name in accepted}
+    outputs = stage['func'](inputs, **stage.get('params', {}), **kwargs)
+
+    missing = set(stage['outputs']) - set(outputs)
+    if missing:
+        raise ValueError(f"Stufe '{stage['name']}' hat die Artefakte {sorted(missing)} nicht erzeugt")
+    return outputs
+
+
+def run_pipeline(stages: list, cache_dir: str, only: list = None, start: str = None,
+                 force: bool = False, options: dict = None, collect: list = None, verbose: bool = True,
+                 metrics: list = None) -> dict:
+    """
+    Führt die Stufen einer Pipeline mit inhaltsadressiertem Cache aus.
+
+    Jede Stufe wird über einen Hash ihrer Eingaben und Parameter identifiziert. Liegt das
+    Ergebnis bereits im Cache, wird die Stufe übersprungen und ihre Artefakte werden nur
+    geladen, wenn eine nachgelagerte Stufe sie benötigt.
+
+    Args:
+        stages: Liste der Stufen-Dictionaries
+        cache_dir: Verzeichnis des Caches
+        only: Nur diese Stufen ausführen (Namen oder Präfixe)
+        start: Ab dieser Stufe alle nachgelagerten Stufen ausführen
+        force: Wenn True, werden ausgewählte Stufen auch bei vorhandenem Cache ausgeführt
+        options: Laufzeitoptionen, die nicht in den Cache-Schlüssel eingehen (z.B. chunksize)
+        collect: Liste von Artefakten, die nach dem Lauf zurückgegeben werden sollen
+        verbose: Wenn True, wird der Status jeder Stufe ausgegeben
+        metrics: Liste, an die die Messdatensätze angehängt werden. Sie ist auch nach einem
+            Fehler in einer Stufe vollständig bis einschließlich der fehlerhaften Stufe
+
+    Returns:
+        Dictionary mit:
+        - 'status': {Stufenname: Status}, Status ist 'ausgeführt', 'übersprungen' oder 'nicht ausgewählt'
+        - 'artifacts': {Artefaktname: DataFrame} für alle Artefakte aus collect
+        - 'metrics': Liste der Messdatensätze je Stufe (siehe instrumentation_utils)
+    """
+    options = options or {}
+    order = resolve_order(stages)
+    selected = select_stages(order, only, start)
+
+    os.makedirs(cache_dir, exist_ok=True)
+    file_index_path = os.path.join(cache_dir, file_index_name)
+    file_index = {}
+    if os.path.exists(file_index_path):
+        with open(file_index_path, encoding='utf-8') as f:
+            file_index = json.load(f)
+
+    keys = {}      # Artefakt -> Schlüssel der erzeugenden Stufe
+    locations = {} # Artefakt -> Cache-Verzeichnis
+    frames = {}    # bereits im Speicher vorhandene Artefakte
+    status = {}
+    records = metrics if metrics is not None else []
+
+    def load(name):
+        if name not in frames:
+            frames[name] = read_table(locations[name], name)
+        return frames[name]
+
+    for stage in order:
+        input_keys = {name: keys[name] for name in stage['inputs']}
+        files = stage.get('files', {})
+        input_keys.update({alias: hash_file(path, file_index) for alias, path in files.items()})
+
+        key = compute_stage_key(stage, input_keys)
+        stage_root = os.path.join(cache_dir, stage['name'])
+        stage_dir = os.path.join(stage_root, key)
+        cached = os.path.exists(os.path.join(stage_dir, manifest_name))
+        # Stufen, deren exportierte Dateien gelöscht wurden, müssen erneut ausgeführt werden
+        exports = stage.get('exports', [])
+        exported = all(os.path.exists(path) for path in exports)
+
+        if stage['name'] not in selected:
+            if not cached:
+                raise RuntimeError(f"Stufe '{stage['name']}' ist nicht ausgewählt und nicht im Cache vorhanden")
+            status[stage['name']] = 'nicht ausgewählt'
+            records.append({'stage': stage['name'], 'status': status[stage['name']]})
+        elif cached and exported and not force:
+            status[stage['name']] = 'übersprungen'
+            records.append({'stage': stage['name'], 'status': status[stage['name']]})
+        else:
+            inputs = {name: load(name) for name in stage['inputs']}
+            inputs.update(files)
+            # Laufzeit, Speicher und Zeilen der Stufe aufzeichnen, Kennzahlen werden aus outputs entfernt
+            with record_stage(stage['name'], inputs, records) as record:
+                record['outputs'] = outputs = call_stage(stage, inputs, options)
+
+            # Ergebnisse speichern, ältere Einträge der Stufe werden ersetzt
+            if os.path.exists(stage_root):
+                shutil.rmtree(stage_root)
+            os.makedirs(stage_dir)
+            for name in stage['outputs']:
+                write_table(outputs[name], stage_dir, name)
+            with open(os.path.join(stage_dir, manifest_name), 'w', encoding='utf-8') as f:
+                json.dump({'stage': stage['name'], 'inputs': input_keys, 'outputs': stage['outputs'],
+                           'exports': [os.path.abspath(path) for path in exports]}, f, indent=2)
+
+            frames.update({name: outputs[name] for name in stage['outputs']})
+            status[stage['name']] = 'ausgeführt'
+
+        for name in stage['outputs']:
+            keys[name] = key
+            locations[name] = stage_dir
+
+        if verbose:
+            print(f"Stufe '{stage['name']}': {status[stage['name']]}")
+
+    with open(file_index_path, 'w', encoding='utf-8') as f:
+        json.dump(file_index, f, indent=2)
+
+    return {'status': status, 'artifacts': {name: load(name) for name in (collect or [])}, 'metrics': records}
@@ -0,0 +1,268 @@
+import argparse
+import numpy as np
+import pandas as pd
+
+
+# Genauigkeit der HyperLogLog-Skizzen: 2^precision Register, Standardfehler etwa 1,04 / sqrt(2^precision)
+hll_precision = 12
+
+# Anzahl Zeilen je Block beim Profilieren von Dateien
+profile_chunksize = 100000
+
+
+# Ein Profil wird als Dictionary beschrieben und kann mit merge_profiles zusammengeführt werden:
+#   'n_rows':  Anzahl der Zeilen
+#   'approx':  True, wenn die Ausprägungen mit HyperLogLog geschätzt werden
+#   'columns': {Spalte: {'dtype', 'null', 'min', 'max', 'distinct'}}
+#              'distinct' enthält die eindeutigen Werte (exakt) bzw. die HLL-Register (approx)
+
+
+def hash_values(series: pd.Series) -> np.ndarray:
+    """
+    Berechnet 64-Bit-Hashes der nicht fehlenden Werte einer Spalte.
+
+    Zahlen werden einheitlich als float64 und alle übrigen Werte als Text gehasht, damit derselbe
+    Wert in verschiedenen Blöcken oder Jahrgängen unabhängig vom eingelesenen Datentyp denselben
+    Hash erhält.
+    """
+    series = series.dropna()
+    if pd.api.types.is_numeric_dtype(series.dtype):
+        series = series.astype('float64')
+    else:
+        series = series.astype(str)
+    return pd.util.hash_pandas_object(series, index=False).to_numpy()
+
+
+def hll_registers(hashes: np.ndarray, precision: int = hll_precision) -> np.ndarray:
+    """
+    Erstellt die Register einer HyperLogLog-Skizze aus 64-Bit-Hashes.
+
+    Die oberen precision Bits wählen das Register, im Register steht die größte Position des
+    ersten gesetzten Bits der übrigen Bits.
+
+    Args:
+        hashes: Hashes als uint64-Array
+        precision: Anzahl der Bits für die Registerauswahl
+
+    Returns:
+        Register als uint8-Array der Länge 2^precision
+    """
+    registers = np.zeros(1 << precision, dtype=np.uint8)
+    if len(hashes) == 0:
+        return registers
+    index = (hashes >> np.uint64(64 - precision)).astype(np.int64)
+    rest = hashes << np.uint64(precision)
+
+    # Position des höchsten gesetzten Bits; float-Rundung knapp unter Zweierpotenzen wird korrigiert
+    nonzero = rest > 0
+    bit = np.zeros(len(rest), dtype=np.int64)
+    bit[nonzero] = np.floor(np.log2(rest[nonzero].astype('float64'))).astype(np.int64)
+    too_high = nonzero & (np.left_shift(np.uint64(1), bit.astype(np.uint64)) > rest)
+    bit[too_high] -= 1
+    rank = np.where(nonzero, 64 - bit, 64 - precision + 1).astype(np.uint8)
+
+    np.maximum.at(registers, index, rank)
+    return registers
+
+
+def hll_estimate(registers: np.ndarray) -> int:
+    """
+    Schätzt die Anzahl unterschiedlicher Werte aus den Registern einer HyperLogLog-Skizze.
+    """
+    m = len(registers)
+    alpha = 0.7213 / (1 + 1.079 / m)
+    estimate = alpha * m * m / np.sum(np.ldexp(1.0, -registers.astype(np.int64)))
+    zeros = np.count_nonzero(registers == 0)
+    # Korrektur für kleine Anzahlen (Linear Counting)
+    if estimate <= 2.5 * m and zeros > 0:
+        estimate = m * np.log(m / zeros)
+    return int(round(estimate))
+
+
+def profile_frame(df: pd.DataFrame, approx: bool = False, precision: int = hll_precision) -> dict:
+    """
+    Erstellt das Profil eines DataFrames: Datentyp, fehlende Werte, Minimum, Maximum und Ausprägungen.
+
+    Nur die fehlenden Werte aller Spalten sowie Minimum und Maximum der numerischen Spalten werden
+    gemeinsam in einem Schritt berechnet. Die Ausprägungen sowie Minimum und Maximum von Textspalten
+    werden weiterhin je Spalte ermittelt: exakt als eindeutige Werte (pd.unique), die für
+    merge_profiles erhalten bleiben müssen, oder mit approx=True über eine HyperLogLog-Skizze mit
+    festem Speicherbedarf.
+
+    Args:
+        df: Zu profilierender DataFrame
+        approx: Wenn True, werden die Ausprägungen geschätzt
+        precision: Genauigkeit der HyperLogLog-Skizzen
+
+    Returns:
+        Profil-Dictionary (siehe oben)
+    """
+    null_counts = df.isna().sum()
+
+    # Minimum und Maximum aller numerischen Spalten in einem Schritt
+    numeric = df.select_dtypes(include=['number', 'bool', 'datetime'])
+    minima = numeric.min() if len(numeric.columns) else pd.Series(dtype=object)
+    maxima = numeric.max() if len(numeric.columns) else pd.Series(dtype=object)
+
+    # Ausprägungen und Extremwerte von Textspalten je Spalte
+    columns = {}
+    for i, col in enumerate(df.columns):
+        series = df.iloc[:, i]
+        if col in minima.index:
+            col_min, col_max = minima[col], maxima[col]
+        else:
+            # Textspalten: Minimum und Maximum nur bei vergleichbaren Werten
+            try:
+                values = series.dropna()
+                col_min, col_max = (values.min(), values.max()) if len(values) else (None, None)
+            except TypeError:
+                col_min, col_max = None, None
+
+        if approx:
+            distinct = hll_registers(hash_values(series), precision)
+        else:
+            distinct = pd.unique(series.dropna())
+
+        columns[col] = {
+            'dtype': str(series.dtype),
+            'null': int(null_counts.iloc[i]),
+            'min': None if pd.isna(col_min) else col_min,
+            'max': None if pd.isna(col_max) else col_max,
+            'distinct': distinct
+        }
+
+    return {'n_rows': len(df), 'approx': approx, 'columns': columns}
+
+
+def merge_extreme(a, b, func):
+    """
+    Kombiniert zwei Minima bzw. Maxima, fehlende oder nicht vergleichbare Werte werden übergangen.
+    """
+    if a is None:
+        return b
+    if b is None:
+        return a
+    try:
+        return func(a, b)
+    except TypeError:
+        return None
+
+
+def merge_profiles(*profiles: dict) -> dict:
+    """
+    Führt Profile von Blöcken oder Jahrgängen zu einem Gesamtprofil zusammen.
+
+    Exakte Profile werden über die Vereinigung der eindeutigen Werte, geschätzte Profile über das
+    Maximum der HyperLogLog-Register kombiniert. Spalten, die nur in einem Teil der Profile
+    vorkommen, gelten in den übrigen als vollständig fehlend.
+
+    Args:
+        *profiles: Profile aus profile_frame bzw. profile_csv
+
+    Returns:
+        Gesamtprofil
+    """
+    if len({profile['approx'] for profile in profiles}) > 1:
+        raise ValueError("Exakte und geschätzte Profile können nicht zusammengeführt werden")
+
+    merged = {'n_rows': 0, 'approx': profiles[0]['approx'], 'columns': {}}
+    for profile in profiles:
+        for col, stats in profile['columns'].items():
+            if col not in merged['columns']:
+                # Zeilen vorheriger Profile ohne diese Spalte zählen als fehlend
+                merged['columns'][col] = {**stats, 'null': stats['null'] + merged['n_rows']}
+                continue
+            current = merged['columns'][col]
+            if profile['approx']:
+                distinct = np.maximum(current['distinct'], stats['distinct'])
+            else:
+                distinct = pd.unique(np.concatenate([np.asarray(current['distinct'], dtype=object),
+                                                     np.asarray(stats['distinct'], dtype=object)]))
+            merged['columns'][col] = {
+                'dtype': current['dtype'] if current['dtype'] == stats['dtype'] else f"{current['dtype']}/{stats['dtype']}",
+                'null': current['null'] + stats['null'],
+                'min': merge_extreme(current['min'], stats['min'], min),
+                'max': merge_extreme(current['max'], stats['max'], max),
+                'distinct': distinct
+            }
+        # Spalten, die in diesem Profil fehlen
+        for col in set(merged['columns']) - set(profile['columns']):
+            merged['columns'][col]['null'] += profile['n_rows']
+        merged['n_rows'] += profile['n_rows']
+    return merged
+
+
+def profile_csv(file_path: str, chunksize: int = profile_chunksize, approx: bool = True,
+                precision: int = hll_precision, **kwargs) -> dict:
+    """
+    Profiliert eine CSV-Datei blockweise, der Speicherbedarf hängt von der Blockgröße ab.
+
+    Args:
+        file_path: Pfad zur Datei
+        chunksize: Anzahl Zeilen je Block
+        approx: Wenn True (Standard), werden die Ausprägungen mit HyperLogLog geschätzt
+        precision: Genauigkeit der HyperLogLog-Skizzen
+        **kwargs: Weitere Argumente für pd.read_csv (z.B. sep, encoding)
+
+    Returns:
+        Profil der gesamten Datei
+    """
+    profiles = []
+    for chunk in pd.read_csv(file_path, chunksize=chunksize, **kwargs):
+        profiles.append(profile_frame(chunk, approx=approx, precision=precision))
+        # Teilprofile laufend zusammenführen, damit die Anzahl der Blöcke keinen Speicher kostet
+        if len(profiles) > 1:
+            profiles = [merge_profiles(*profiles)]
+    return profiles[0]
+
+
+def summarize_profile(profile: dict) -> pd.DataFrame:
+    """
+    Wandelt ein Profil in eine Übersichtstabelle mit einer Zeile je Spalte um.
+
+    Args:
+        profile: Profil aus profile_frame, profile_csv oder merge_profiles
+
+    Returns:
+        DataFrame mit den Spalten 'Spalte', 'Datentyp', 'Anzahl_Werte', 'Anzahl_NULL',
+        'Anzahl_Ausprägungen', 'Minimum' und 'Maximum'
+    """
+    rows = []
+    for col, stats in profile['columns'].items():
+        distinct = hll_estimate(stats['distinct']) if profile['approx'] else len(stats['distinct'])
+        rows.append({
+            'Spalte': col,
+            'Datentyp': stats['dtype'],
+            'Anzahl_Werte': profile['n_rows'] - stats['null'],
+            'Anzahl_NULL': stats['null'],
+            'Anzahl_Ausprägungen': distinct,
+            'Minimum': stats['min'],
+            'Maximum': stats['max']
+        })
+    return pd.DataFrame(rows)
+
+
+def main(file_path: str, chunksize: int, exact: bool, sep: str, encoding: str):
+    """
+    Gibt das Profil einer Rohdatei aus, ohne sie vollständig in den Speicher zu laden.
+    """
+    profile = profile_csv(file_path, chunksize=chunksize, approx=not exact, sep=sep, encoding=encoding)
+    print(f"{profile['n_rows']} Zeilen, {len(profile['columns'])} Spalten")
+    print(summarize_profile(profile).to_string(index=False))
+
+
+def parse_args() -> argparse.Namespace:
+    """
+    Liest die Kommandozeilenargumente.
+    """
+    parser = argparse.ArgumentParser(description="Profil einer CSV-Datei (z.B. GENESIS-Rohdaten vor der Aufbereitung)")
+    parser.add_argument('file_path', metavar='DATEI', help="Pfad zur CSV-Datei")
+    parser.add_argument('--chunksize', type=int, default=profile_chunksize, help="Anzahl Zeilen je Block")
+    parser.add_argument('--exact', action='store_true', help="Ausprägungen exakt zählen statt schätzen")
+    parser.add_argument('--sep', default=';', help="Trennzeichen (Standard: ';')")
+    parser.add_argument('--encoding', default='utf-8', help="Zeichenkodierung (z.B. ISO-8859-1)")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    main(**vars(parse_args()))
@@ -0,0 +1,293 @@
+import os
+import numpy as np
+import pandas as pd
+
+
+# Verzeichnis externer Daten
+script_dir = os.path.dirname(os.path.abspath(__file__))
+root_external = os.path.join(script_dir, '..', 'data', 'external')
+
+# Zuordnung der Kreise vor einer Gebietsreform zu ihren Nachfolgern (mit Gewichten)
+crosswalk_path = os.path.join(root_external, 'gebietsreform_crosswalk.csv')
+
+# Ebenen des Amtlichen Gemeindeschlüssels (AGS) nach Stellenzahl: LL R KK GGG
+ags_levels = {2: 'land', 3: 'regierungsbezirk', 5: 'kreis', 8: 'gemeinde'}
+
+# Reihenfolge der Ebenen für das Nachschlagen von Kreisschlüsseln: zuerst der Kreis selbst, dann
+# ein gleichlautender Schlüssel einer höheren Ebene (z.B. Berlin 11000 als Land '11')
+lookup_levels = ['kreis', 'regierungsbezirk', 'land']
+
+# Schlüssel für Deutschland insgesamt ('DG')
+germany_key = 0
+
+
+# Kanonischer Regionalschlüssel: Ganzzahl in Kreisbreite (fünf Stellen, rechts mit Nullen aufgefüllt)
+#   Land '01' -> 1000, Regierungsbezirk '091' -> 9100, Kreis '01001' -> 1001, 'DG' -> 0
+# Gemeinden (acht Stellen) behalten ihren vollen Schlüssel (z.B. '01001000' -> 1001000).
+# Übergeordnete Schlüssel eines Kreisschlüssels k: Land k // 1000, Regierungsbezirk k // 100.
+
+
+def parse_ags(codes: pd.Series, level: str = None) -> pd.DataFrame:
+    """
+    Wandelt AGS-Codes in kanonische ganzzahlige Regionalschlüssel mit Ebene um.
+
+    Die Umwandlung erfolgt nur für die eindeutigen Codes und wird anschließend über die Positionen
+    zurückübertragen, kategoriale Spalten werden daher ohne Mehraufwand verarbeitet.
+
+    Args:
+        codes: Spalte mit AGS-Codes als Text, Zahl oder Kategorie (z.B. '01001', 1001, 'DG')
+        level: Ebene aller Codes, wenn führende Nullen verloren gegangen sind (z.B. 'kreis' für die
+            KFZ-Daten). Bei None wird die Ebene aus der Stellenzahl bestimmt
+
+    Returns:
+        DataFrame mit dem Index von codes und den Spalten 'region_key' (Int64) und 'ebene'
+        (kategorial). Ungültige oder fehlende Codes ergeben <NA>
+    """
+    if level is not None and level not in ags_levels.values():
+        raise ValueError(f"Unbekannte Ebene '{level}', erlaubt sind {list(ags_levels.values())}")
+
+    positions, uniques = pd.factorize(codes)
+    text = pd.Series(uniques, dtype=object).astype(str).str.strip()
+    # Zahlen, die als float gelesen wurden (z.B. 1001.0)
+    text = text.str.replace(r'\.0$', '', regex=True)
+
+    if level is not None:
+        text = text.str.zfill(next(length for length, name in ags_levels.items() if name == level))
+
+    lengths = text.str.len().to_numpy()
+    valid = text.str.fullmatch(r'\d+').to_numpy(dtype=bool) & np.isin(lengths, list(ags_levels))
+    keys = np.full(len(text), -1, dtype='int64')
+    keys[valid] = [int(t.ljust(5, '0')) if len(t) <= 5 else int(t) for t in text[valid]]
+    levels = np.array([ags_levels.get(n) if ok else None for n, ok in zip(lengths, valid)], dtype=object)
+
+    # Deutschland insgesamt
+    germany = text.eq('DG').to_numpy()
+    keys[germany] = germany_key
+    levels[germany] = 'deutschland'
+
+    # Positionen -1 (fehlende Codes) und ungültige Codes ergeben <NA>
+    take = np.where(positions >= 0, positions, 0)
+    missing = (positions < 0) | (keys[take] < 0)
+    region_key = pd.array(keys[take], dtype='Int64')
+    region_key[missing] = pd.NA
+    ebene = levels[take]
+    ebene[missing] = None
+
+    return pd.DataFrame({
+        'region_key': region_key,
+        'ebene': pd.Categorical(ebene, categories=['deutschland'] + list(ags_levels.values()))
+    }, index=codes.index)
+
+
+def add_region_key(df: pd.DataFrame, code_column: str = 'landkreis_id', level: str = None) -> pd.DataFrame:
+    """
+    Ergänzt die Spalten 'region_key' und 'ebene' aus den AGS-Codes einer Quelle.
+
+    Muss vor remove_leading_zeros aufgerufen werden, da die Ebene aus der Stellenzahl bestimmt wird.
+
+    Args:
+        df: Quelle mit AGS-Codes (z.B. vee, pop, svu)
+        code_column: Spalte mit den AGS-Codes
+        level: Ebene aller Codes, siehe parse_ags
+
+    Returns:
+        DataFrame mit den zusätzlichen Spalten
+    """
+    parsed = parse_ags(df[code_column], level=level)
+    df['region_key'] = parsed['region_key']
+    df['ebene'] = parsed['ebene']
+    return df
+
+
+def get_parent_key(keys: pd.Series, level: str) -> pd.Series:
+    """
+    Liefert zu Kreisschlüsseln den Schlüssel des Landes bzw. Regierungsbezirks in Kreisbreite.
+
+    Args:
+        keys: Kanonische Kreisschlüssel (z.B. 9162)
+        level: 'land' oder 'regierungsbezirk'
+
+    Returns:
+        Kanonische Schlüssel der übergeordneten Ebene (z.B. 9000 bzw. 9100)
+    """
+    divisor = {'land': 1000, 'regierungsbezirk': 100}[level]
+    return keys // divisor * divisor
+
+
+def format_ags(keys: pd.Series, level: str = 'kreis') -> pd.Series:
+    """
+    Wandelt kanonische Schlüssel zurück in AGS-Codes mit führenden Nullen (z.B. 1001 -> '01001').
+    """
+    length = next(length for length, name in ags_levels.items() if name == level)
+    text = keys.astype('Int64').astype(str).str.zfill(5)
+    return text.str[:length].where(keys.notna())
+
+
+def build_key_index(df: pd.DataFrame, code_column: str = 'landkreis_id', levels: list = lookup_levels) -> pd.DataFrame:
+    """
+    Baut einen Nachschlage-Index über kanonische Kreisschlüssel auf.
+
+    Je Schlüssel gilt die Zeile der ersten Ebene aus levels. Kommt ein Kreis nicht auf Kreisebene
+    vor, wird ein gleichlautender Schlüssel einer höheren Ebene verwendet (z.B. die Stadtstaaten
+    Berlin und Hamburg, die in manchen Quellen nur als Land geführt werden). Damit entfällt die
+    Suche mit abgeschnittenen Nullen auf Textbasis.
+
+    Args:
+        df: Quelle mit AGS-Codes (z.B. vee, pop, svu)
+        code_column: Spalte mit den AGS-Codes
+        levels: Ebenen in der Reihenfolge ihres Vorrangs
+
+    Returns:
+        DataFrame mit eindeutigem Index 'region_key' (int64) und den übrigen Spalten von df
+    """
+    parsed = parse_ags(df[code_column])
+    priority = parsed['ebene'].map({name: i for i, name in enumerate(levels)}).astype('float64')
+    keep = priority.notna() & parsed['region_key'].notna()
+
+    indexed = df[keep].assign(region_key=parsed.loc[keep, 'region_key'].astype('int64').to_numpy(),
+                              _priority=priority[keep].to_numpy())
+    indexed = indexed.sort_values('_priority', kind='stable').drop_duplicates('region_key', keep='first')
+    return indexed.drop(columns='_priority').set_index('region_key')
+
+
+def load_crosswalk(path: str = crosswalk_path) -> pd.DataFrame:
+    """
+    Liest die Zuordnung der Kreise vor einer Gebietsreform zu ihren Nachfolgern.
+
+    Args:
+        path: CSV-Datei mit den Spalten 'alt_id', 'alt_name', 'neu_id', 'neu_name', 'gewicht'
+            und 'gueltig_bis' (Trennzeichen ';')
+
+    Returns:
+        DataFrame mit zusätzlichen Spalten 'alt_key' und 'neu_key' (kanonische Schlüssel)
+    """
+    crosswalk = pd.read_csv(path, sep=';', dtype={'alt_id': str, 'neu_id': str}, encoding='utf-8')
+    crosswalk['alt_key'] = parse_ags(crosswalk['alt_id'], level='kreis')['region_key'].astype('int64')
+    crosswalk['neu_key'] = parse_ags(crosswalk['neu_id'], level='kreis')['region_key'].astype('int64')
+
+    # Die Gewichte eines Altkreises verteilen seine Werte vollständig auf die Nachfolger
+    totals = crosswalk.groupby('alt_key')['gewicht'].sum()
+    if not np.allclose(totals, 1.0):
+        raise ValueError(f"Gewichte je Altkreis müssen 1 ergeben: {totals[~np.isclose(totals, 1.0)].to_dict()}")
+    return crosswalk
+
+
+def apply_crosswalk(df: pd.DataFrame, crosswalk: pd.DataFrame, value_columns: list, rows: pd.Series = None,
+                    code_column: str = 'landkreis_id', label_column: str = 'landkreis') -> tuple:
+    """
+    Ordnet Zeilen von Kreisen vor einer Gebietsreform ihren Nachfolgern zu.
+
+    Zeilen eines Altkreises werden je Nachfolger wiederholt, die Werte mit dem Gewicht multipliziert
+    (bei ganzzahligen Spalten gerundet). Code und Bezeichnung werden durch die des Nachfolgers
+    ersetzt. Die Zeilen werden nicht zusammengefasst: Nachfolger und Altkreise haben danach mehrere
+    Zeilen je Kombination, die vor einer Pivotierung (die Duplikate mittelt) je Kreis und Kombination
+    summiert werden müssen (siehe main.stage_ingest_kfz).
+
+    Args:
+        df: DataFrame im Langformat (z.B. KFZ-Daten nach remove_leading_zeros)
+        crosswalk: Zuordnung aus load_crosswalk
+        value_columns: Zu gewichtende Wertspalten (z.B. ['anzahl_fahrzeuge'])
+        rows: Boolesche Maske der Zeilen, die als Altkreise gelten (z.B. über die Bezeichnung erkannt).
+            Bei None werden alle Zeilen mit einem Code aus der Zuordnung umgeschlüsselt
+        code_column: Spalte mit den AGS-Codes
+        label_column: Spalte mit den Bezeichnungen
+
+    Returns:
+        tuple: (DataFrame mit zugeordneten Zeilen, Bericht mit 'rows_mapped' und 'regions_mapped')
+    """
+    keys = parse_ags(df[code_column], level='kreis')['region_key']
+    mapped = keys.isin(crosswalk['alt_key']).to_numpy(dtype=bool)
+    if rows is not None:
+        mapped &= np.asarray(rows, dtype=bool)
+    report = {'rows_mapped': int(mapped.sum()), 'regions_mapped': int(keys[mapped].nunique())}
+    if not mapped.any():
+        return df, report
+
+    # Zeilen der Nachfolger behalten den Zeilenindex des Altkreises
+    old = df[mapped].assign(alt_key=keys[mapped].astype('int64').to_numpy())
+    new = old.rename_axis('_row').reset_index().merge(crosswalk[['alt_key', 'neu_key', 'neu_name', 'gewicht']],
+                                                      on='alt_key', how='inner').set_index('_row')
+    for col in value_columns:
+        weighted = new[col].astype('float64') * new['gewicht']
+        new[col] = weighted.round().astype(df[col].dtype) if pd.api.types.is_integer_dtype(df[col].dtype) else weighted
+
+    # Code ohne führende Nullen wie nach remove_leading_zeros, Bezeichnung des Nachfolgers aus den
+    # Daten oder aus der Zuordnung
+    labels = pd.Series(df.loc[~mapped, label_column].to_numpy(),
+                       index=keys[~mapped].to_numpy()).groupby(level=0).first()
+    new[code_column] = new['neu_key'].astype(str).to_numpy()
+    new[label_column] = new['neu_key'].map(labels).fillna(new['neu_name']).to_numpy()
+
+    new = new[df.columns].rename_axis(df.index.name)
+    result = pd.concat([df[~mapped].astype({col: object for col in [code_column, label_column]}),
+                        new.astype({col: object for col in [code_column, label_column]})])
+    # Kategoriale Spalten bleiben kategorial
+    result = result.astype({col: 'category' for col in [code_column, label_column]
+                            if isinstance(df[col].dtype, pd.CategoricalDtype)})
+    return result, report
+
+
+def join_sources(df_base: pd.DataFrame, sources: dict, key_column: str = 'landkreis_id',
+                 levels: list = lookup_levels) -> tuple:
+    """
+    Ergänzt einen DataFrame in einem Durchgang um Spalten aus beliebig vielen Quellen.
+
+    Alle Quellen werden über kanonische ganzzahlige Regionalschlüssel zugeordnet, bevorzugt über die
+    Spalten aus add_region_key (Codes mit führenden Nullen), sonst über key_column.
+    Je Quelle werden nur die angegebenen Spalten übernommen; fehlt ein Wert auf Kreisebene, wird
+    ein gleichlautender Schlüssel der nächsten Ebene aus levels verwendet (z.B. Berlin '11000' ->
+    Land '11', wie die Suche mit abgeschnittenen Nullen in fix_missing_values). Die neuen Spalten
+    werden gesammelt und einmalig angefügt, statt den breiten DataFrame je Quelle zu kopieren.
+
+    Args:
+        df_base: DataFrame mit Kreisschlüsseln (z.B. KFZ-Daten, Codes ohne führende Nullen)
+        sources: Dictionary {Quellenname: (DataFrame, Liste der zu übernehmenden Spalten)}
+        key_column: Spalte mit den AGS-Codes in df_base und allen Quellen
+        levels: Ebenen der Quellen in der Reihenfolge ihres Vorrangs
+
+    Returns:
+        tuple: (DataFrame mit den angefügten Spalten, Bericht {Quellenname: {'match_rate',
+            'repaired', 'still_missing'}}). match_rate ist der Anteil der Zeilen mit Werten auf
+            Kreisebene, repaired die Anzahl der über höhere Ebenen ergänzten Zeilen
+    """
+    base_keys = parse_ags(df_base[key_column], level='kreis')['region_key'].fillna(-1).astype('int64').to_numpy()
+    n_rows = len(df_base)
+
+    joined = {}
+    report = {}
+    for name, (df_source, columns) in sources.items():
+        duplicated = [col for col in columns if col in df_base.columns or col in joined]
+        if duplicated:
+            raise ValueError(f"Quelle '{name}': Spalten bereits vorhanden: {duplicated}")
+
+        # Schlüssel aus add_region_key verwenden, sonst aus den Codes bestimmen
+        parsed = df_source[['region_key', 'ebene']] if 'region_key' in df_source.columns else parse_ags(df_source[key_column])
+        values = None
+        for level in levels:
+            # Nachschlage-Index der Ebene (erster Eintrag je Schlüssel)
+            at_level = (parsed['ebene'] == level).to_numpy(dtype=bool)
+            keys = parsed.loc[at_level, 'region_key'].astype('int64').to_numpy()
+            subset = df_source.loc[at_level, columns].reset_index(drop=True)
+            first = ~pd.Index(keys).duplicated(keep='first')
+            positions = pd.Index(keys[first]).get_indexer(base_keys)
+            found = subset[first].reset_index(drop=True).reindex(positions)
+            found.index = df_base.index
+
+            if values is None:
+                values = found
+                direct = int(values.notna().any(axis=1).sum())
+            else:
+                # Nur fehlende Werte aus höheren Ebenen ergänzen
+                values = values.fillna(found)
+
+        matched = int(values.notna().any(axis=1).sum())
+        report[name] = {
+            'match_rate': direct / n_rows if n_rows else None,
+            'repaired': matched - direct,
+            'still_missing': n_rows - matched
+        }
+        joined.update({col: values[col] for col in columns})
+
+    # Alle Spalten in einem Schritt anfügen
+    df_joined = pd.concat([df_base, pd.DataFrame(joined, index=df_base.index)], axis=1)
+    return df_joined, report
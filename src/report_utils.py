@@ -6,23 +6,13 @@ sys.path.insert(0, os.path.abspath('..'))
 from src.data_preparation_utils import root_raw, root_interim, root_processed, data_kfz, data_pop, data_vee, data_svu, relevant_cols
 from src.data_exploration_utils import create_table_figure, create_stacked_bar_chart, create_distribution_plot, create_density_plot, create_scatterplot_grid, plot_regression_and_residuals
 from src.data_modelling_utils import *
+from src.storage_utils import read_table
+from src.profiling_utils import profile_frame, summarize_profile
 
 
-# Dataframes der Rohdaten
-df_kfz = pd.read_csv(os.path.join(root_raw, data_kfz), sep=";", decimal='.') # Fahrzeugbestand
-df_pop = pd.read_csv(os.path.join(root_raw, data_pop), sep=";", decimal='.', encoding='ISO-8859-1') # Bevölkerungsdaten
-df_vee = pd.read_csv(os.path.join(root_raw, data_vee), sep=";", decimal='.', encoding='ISO-8859-1') # Einkommen
-df_svu = pd.read_csv(os.path.join(root_raw, data_svu), sep=";", decimal='.', encoding='ISO-8859-1') # Straßenverkehrsunfälle
-
-# Dataframe der zusammengesetzen aufbereiteten Daten
-df_merged = pd.read_csv(os.path.join(root_processed, 'kfz_kombiniert.csv'))
-
-# gruppierte und normierte Dataframes (abgeleitet aus df_merged)
-df_antriebe = pd.read_csv(os.path.join(root_interim, 'antriebe.csv'))
-df_antriebe_prozent = pd.read_csv(os.path.join(root_interim, 'antriebe_prozent.csv'))
-df_eg = pd.read_csv(os.path.join(root_interim, 'emissionsgruppen.csv'))
-df_eg_prozent = pd.read_csv(os.path.join(root_interim, 'emissionsgruppen_prozent.csv'))
-df_regr = pd.read_csv(os.path.join(root_processed, 'regression_data.csv'))
+# Datensätze und Diagramme werden erst beim ersten Zugriff geladen bzw. erstellt und danach
+# wiederverwendet. Zugriff über get('df_kfz') oder report_utils.df_kfz, siehe loaders.
+cache = {}
 
 # Datenwörterbuch
 data_dict = {
@@ -99,35 +89,32 @@ data_dict = {
         "Format": "Float"
     }
 }
-df_data_dictionary = pd.DataFrame.from_dict(data_dict, orient='index').reset_index()
-df_data_dictionary.columns = ["Name", "Beschreibung", "Rolle", "Typ", "Format"]
 
 
-def create_info_table(df: pd.DataFrame) -> pd.DataFrame:
+def load_data_dictionary() -> pd.DataFrame:
+    """
+    Erstellt die Tabelle des Datenwörterbuchs aus data_dict.
+    """
+    df_data_dictionary = pd.DataFrame.from_dict(data_dict, orient='index').reset_index()
+    df_data_dictionary.columns = ["Name", "Beschreibung", "Rolle", "Typ", "Format"]
+    return df_data_dictionary
+
+
+def create_info_table(df: pd.DataFrame, approx: bool = False) -> pd.DataFrame:
     """
     Erstellt eine Übersichtstabelle mit Informationen zu allen Spalten eines DataFrames.
     
+    Die Kennzahlen werden mit profile_frame in einem Durchlauf über alle Spalten berechnet.
+    
     Args:
         df: Der zu analysierende DataFrame
+        approx: Wenn True, wird die Anzahl der Ausprägungen mit HyperLogLog geschätzt
         
     Returns:
         pd.DataFrame: Tabelle mit Spalteninformationen (Datentyp, Anzahl Werte, Anzahl NULL-Werte, Anzahl Ausprägungen)
     """
-    df_info = []
-    for column in df.columns:
-        dtype = str(df[column].dtype)
-        non_null = df[column].count()
-        null_count = df[column].isnull().sum()
-        unique_count = df[column].nunique()
-        df_info.append({
-            'Spalte': column,
-            'Datentyp': dtype,
-            'Anzahl_Werte': non_null,
-            'Anzahl_NULL': null_count,
-            'Anzahl_Ausprägungen': unique_count
-        })
-    
-    return pd.DataFrame(df_info)
+    df_info = summarize_profile(profile_frame(df, approx=approx))
+    return df_info[['Spalte', 'Datentyp', 'Anzahl_Werte', 'Anzahl_NULL', 'Anzahl_Ausprägungen']]
 
 
 def add_description_column(info_df: pd.DataFrame, relevant_cols: list) -> pd.DataFrame:
@@ -150,52 +137,136 @@ def add_description_column(info_df: pd.DataFrame, relevant_cols: list) -> pd.Dat
     return info_df
 
 
-def create_info_figure(df: pd.DataFrame, description: str = 'Beschreibung der Datenspalten') -> None:
+def create_info_figure(df: pd.DataFrame, description: str = 'Beschreibung der Datenspalten', page: int = 0) -> None:
     """
     Erstellt eine Übersichtstabelle mit Informationen zu allen Spalten eines DataFrames.
     
     Args:
         df: Der zu visualisierende DataFrame
         description: Die Beschreibung unter der Abbildung (Standard: 'Beschreibung der Datenspalten')
+        page: Nummer der dargestellten Seite bei DataFrames mit vielen Spalten (beginnend bei 0)
     """
     info_df = create_info_table(df)
     info_df = add_description_column(info_df, relevant_cols)
-    create_table_figure(info_df, description)
-
-# Fahrzeugbestand nach Antriebsart und Landkreis
-chart_antriebe = create_stacked_bar_chart(
-    df=df_antriebe,
-    id_vars=['landkreis'],
-    var_name='antriebsart',
-    value_name='Anzahl',
-    x_axis_title='Landkreis',
-    chart_title='Fahrzeugbestand nach Antriebsart und Landkreis'
-)
-
-# Fahrzeugbestand nach Antriebsart und Landkreis (normiert)
-chart_antriebe_prozent = create_stacked_bar_chart(
-    df=df_antriebe_prozent,
-    id_vars=['landkreis'],
-    var_name='antriebsart',
-    value_name='Anteil %',
-    x_axis_title='Landkreis',
-    chart_title='Fahrzeugbestand nach Antriebsart und Landkreis'
-)
-
-# Fahrzeugbestand nach Emissionsgruppe und Landkreis (normiert)
-chart_eg_prozent = create_stacked_bar_chart(
-    df=df_eg_prozent,
-    id_vars=['landkreis'],
-    var_name='Emissiongruppe',
-    value_name='Anteil %',
-    x_axis_title='Landkreis',
-    chart_title='Fahrzeugbestand nach Emissionsgruppe und Landkreis'
-)
-
-X = df_regr[features]
-y = df_regr[y_label]
-srr_plot = plot_regression_and_residuals(X, y)
-srr_plot_elektro_with_outliers = plot_regression_and_residuals(X[['elektro']], y)
-filtered_X = X[X['elektro'] <= 2]
-filtered_y = y[filtered_X.index]
-srr_plot_elektro_without_outliers = plot_regression_and_residuals(filtered_X[['elektro']], filtered_y)
\ No newline at end of file
+    create_table_figure(info_df, description, page=page)
+
+def load_regression_plots() -> dict:
+    """
+    Erstellt die Regressions- und Residuendiagramme, die gemeinsam auf df_regr beruhen.
+    """
+    df_regr = get('df_regr')
+    X = df_regr[features]
+    y = df_regr[y_label]
+    filtered_X = X[X['elektro'] <= 2]
+    filtered_y = y[filtered_X.index]
+    return {
+        'srr_plot': plot_regression_and_residuals(X, y),
+        'srr_plot_elektro_with_outliers': plot_regression_and_residuals(X[['elektro']], y),
+        'srr_plot_elektro_without_outliers': plot_regression_and_residuals(filtered_X[['elektro']], filtered_y)
+    }
+
+
+# Name -> (Funktion zum Laden bzw. Erstellen, Namen der Einträge, auf denen der Eintrag beruht)
+loaders = {
+    # Dataframes der Rohdaten
+    'df_kfz': (lambda: pd.read_csv(os.path.join(root_raw, data_kfz), sep=";", decimal='.'), []), # Fahrzeugbestand
+    'df_pop': (lambda: pd.read_csv(os.path.join(root_raw, data_pop), sep=";", decimal='.', encoding='ISO-8859-1'), []), # Bevölkerungsdaten
+    'df_vee': (lambda: pd.read_csv(os.path.join(root_raw, data_vee), sep=";", decimal='.', encoding='ISO-8859-1'), []), # Einkommen
+    'df_svu': (lambda: pd.read_csv(os.path.join(root_raw, data_svu), sep=";", decimal='.', encoding='ISO-8859-1'), []), # Straßenverkehrsunfälle
+
+    # Dataframe der zusammengesetzen aufbereiteten Daten (Parquet bevorzugt, sonst CSV)
+    'df_merged': (lambda: read_table(root_processed, 'kfz_kombiniert'), []),
+
+    # gruppierte und normierte Dataframes (abgeleitet aus df_merged)
+    'df_antriebe': (lambda: read_table(root_interim, 'antriebe'), []),
+    'df_antriebe_prozent': (lambda: read_table(root_interim, 'antriebe_prozent'), []),
+    'df_eg': (lambda: read_table(root_interim, 'emissionsgruppen'), []),
+    'df_eg_prozent': (lambda: read_table(root_interim, 'emissionsgruppen_prozent'), []),
+    'df_regr': (lambda: read_table(root_processed, 'regression_data'), []),
+
+    # Datenwörterbuch
+    'df_data_dictionary': (load_data_dictionary, []),
+
+    # Fahrzeugbestand nach Antriebsart und Landkreis
+    'chart_antriebe': (lambda: create_stacked_bar_chart(
+        df=get('df_antriebe'),
+        id_vars=['landkreis'],
+        var_name='antriebsart',
+        value_name='Anzahl',
+        x_axis_title='Landkreis',
+        chart_title='Fahrzeugbestand nach Antriebsart und Landkreis'
+    ), ['df_antriebe']),
+
+    # Fahrzeugbestand nach Antriebsart und Landkreis (normiert)
+    'chart_antriebe_prozent': (lambda: create_stacked_bar_chart(
+        df=get('df_antriebe_prozent'),
+        id_vars=['landkreis'],
+        var_name='antriebsart',
+        value_name='Anteil %',
+        x_axis_title='Landkreis',
+        chart_title='Fahrzeugbestand nach Antriebsart und Landkreis'
+    ), ['df_antriebe_prozent']),
+
+    # Fahrzeugbestand nach Emissionsgruppe und Landkreis (normiert)
+    'chart_eg_prozent': (lambda: create_stacked_bar_chart(
+        df=get('df_eg_prozent'),
+        id_vars=['landkreis'],
+        var_name='Emissiongruppe',
+        value_name='Anteil %',
+        x_axis_title='Landkreis',
+        chart_title='Fahrzeugbestand nach Emissionsgruppe und Landkreis'
+    ), ['df_eg_prozent']),
+
+    # Regressions- und Residuendiagramme
+    'regression_plots': (load_regression_plots, ['df_regr']),
+    'srr_plot': (lambda: get('regression_plots')['srr_plot'], ['regression_plots']),
+    'srr_plot_elektro_with_outliers': (lambda: get('regression_plots')['srr_plot_elektro_with_outliers'], ['regression_plots']),
+    'srr_plot_elektro_without_outliers': (lambda: get('regression_plots')['srr_plot_elektro_without_outliers'], ['regression_plots'])
+}
+
+
+def get(name: str):
+    """
+    Liefert einen Datensatz oder ein Diagramm. Beim ersten Zugriff wird der Eintrag geladen bzw.
+    erstellt, danach wird das gespeicherte Ergebnis zurückgegeben.
+    
+    Args:
+        name: Name des Eintrags, siehe loaders (z.B. 'df_kfz', 'chart_antriebe')
+        
+    Returns:
+        DataFrame oder Diagramm
+    """
+    if name not in loaders:
+        raise KeyError(f"Unbekannter Eintrag '{name}', verfügbar sind {list(loaders)}")
+    if name not in cache:
+        cache[name] = loaders[name][0]()
+    return cache[name]
+
+
+def invalidate(*names: str) -> None:
+    """
+    Verwirft geladene Einträge, z.B. nachdem die zugrunde liegenden Dateien neu erzeugt wurden.
+    Einträge, die auf einem verworfenen Eintrag beruhen (z.B. Diagramme), werden ebenfalls verworfen.
+    
+    Args:
+        *names: Namen der Einträge. Ohne Angabe werden alle Einträge verworfen
+    """
+    if not names:
+        cache.clear()
+        return
+    pending = list(names)
+    while pending:
+        name = pending.pop()
+        if name not in loaders:
+            raise KeyError(f"Unbekannter Eintrag '{name}', verfügbar sind {list(loaders)}")
+        cache.pop(name, None)
+        pending.extend(other for other, (_, dependencies) in loaders.items() if name in dependencies)
+
+
+def __getattr__(name: str):
+    """
+    Ermöglicht den Zugriff als Modulattribut (report_utils.df_kfz), der Eintrag wird dabei über get geladen.
+    """
+    if name in loaders:
+        return get(name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
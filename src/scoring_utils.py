@@ -0,0 +1,277 @@
+import os
+import glob
+import argparse
+from functools import lru_cache
+import joblib
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from data_modelling_utils import features, y_label
+
+
+# Verzeichnis der gespeicherten Modelle
+script_dir = os.path.dirname(os.path.abspath(__file__))
+root_models = os.path.join(script_dir, '..', 'models')
+
+# Standardeingabe: Regressionsdaten mit landkreis_id (erzeugt von main.py)
+default_input = os.path.join(script_dir, '..', 'data', 'processed', 'scoring_data.parquet')
+
+# Spalte, die jede Prognose einem Landkreis zuordnet
+id_column = 'landkreis_id'
+
+# Anzahl der Modelle, die gleichzeitig im Speicher gehalten werden
+model_cache_size = 32
+
+
+@lru_cache(maxsize=model_cache_size)
+def load_model_cached(path: str, mtime_ns: int):
+    """
+    Lädt ein Modell. Die Änderungszeit ist Teil des Cache-Schlüssels, damit eine
+    überschriebene Datei neu geladen wird.
+    """
+    return joblib.load(path)
+
+
+def load_model(path: str):
+    """
+    Lädt ein mit joblib gespeichertes Modell, wiederholte Aufrufe nutzen den LRU-Cache.
+
+    Args:
+        path: Pfad zur .joblib-Datei
+
+    Returns:
+        Geladenes Modell (z.B. LinearRegression)
+    """
+    path = os.path.abspath(path)
+    return load_model_cached(path, os.stat(path).st_mtime_ns)
+
+
+def get_model_name(path: str) -> str:
+    """
+    Liefert den Modellnamen aus dem Dateinamen (ohne Verzeichnis und Endung).
+    """
+    return os.path.splitext(os.path.basename(path))[0]
+
+
+def find_models(root: str = root_models) -> list:
+    """
+    Liefert die Pfade aller gespeicherten Modelle, sortiert nach Dateiname.
+    """
+    return sorted(glob.glob(os.path.join(root, '*.joblib')))
+
+
+def get_model_features(model, name: str = 'Modell') -> list:
+    """
+    Ermittelt die Features, mit denen ein Modell trainiert wurde.
+
+    Modelle ohne gespeicherte Featurenamen müssen die Features aus data_modelling_utils.features
+    in dieser Reihenfolge verwenden.
+
+    Args:
+        model: Trainiertes Modell
+        name: Modellname für Fehlermeldungen
+
+    Returns:
+        Liste der Featurenamen in der Reihenfolge des Trainings
+    """
+    if hasattr(model, 'feature_names_in_'):
+        return list(model.feature_names_in_)
+    if getattr(model, 'n_features_in_', len(features)) != len(features):
+        raise ValueError(f"{name}: {model.n_features_in_} Features ohne Namen, erwartet werden {features}")
+    return list(features)
+
+
+def validate_features(models: dict, columns: list, strict: bool = True) -> tuple:
+    """
+    Prüft, ob die Eingabedaten alle Features der Modelle enthalten.
+
+    Modelle, die nicht angewendet werden können, werden übersprungen statt den gesamten Durchlauf
+    abzubrechen. Der Grund wird je Modell zurückgegeben.
+
+    Args:
+        models: Dictionary {Modellname: Modell}
+        columns: Spalten der Eingabedaten
+        strict: Wenn True (Standard), dürfen die Modelle nur Features aus data_modelling_utils.features verwenden
+
+    Returns:
+        Tuple aus dem Dictionary {Modellname: Liste der Features} der anwendbaren Modelle und dem
+        Dictionary {Modellname: Grund} der übersprungenen Modelle
+    """
+    model_features = {}
+    skipped = {}
+    for name, model in models.items():
+        try:
+            names = get_model_features(model, name)
+        except ValueError as e:
+            skipped[name] = str(e)
+            continue
+        unknown = [f for f in names if f not in features]
+        missing = [f for f in names if f not in columns]
+        if strict and unknown:
+            skipped[name] = f"Features sind nicht in data_modelling_utils.features enthalten: {unknown}"
+        elif missing:
+            skipped[name] = f"Features fehlen in den Eingabedaten: {missing}"
+        else:
+            model_features[name] = names
+    return model_features, skipped
+
+
+def read_table_columns(path: str) -> list:
+    """
+    Liest nur die Spaltennamen einer CSV- oder Parquet-Datei.
+    """
+    if path.endswith('.parquet'):
+        return pq.ParquetFile(path).schema_arrow.names
+    return list(pd.read_csv(path, nrows=0).columns)
+
+
+def iter_table_chunks(path: str, columns: list, chunksize: int):
+    """
+    Liest eine CSV- oder Parquet-Datei blockweise und nur mit den angegebenen Spalten.
+
+    Args:
+        path: Pfad zur Eingabedatei
+        columns: Zu lesende Spalten
+        chunksize: Anzahl Zeilen je Block
+
+    Returns:
+        Generator über DataFrames
+    """
+    if path.endswith('.parquet'):
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunksize, columns=columns):
+            yield batch.to_pandas()
+    else:
+        # landkreis_id als Text lesen, damit führende Nullen erhalten bleiben
+        dtype = {id_column: 'str'} if id_column in columns else None
+        yield from pd.read_csv(path, usecols=columns, dtype=dtype, chunksize=chunksize)
+
+
+def score_frame(df: pd.DataFrame, models: dict, model_features: dict, target: str = y_label) -> pd.DataFrame:
+    """
+    Wendet alle Modelle auf einen Block an.
+
+    Args:
+        df: Block der Eingabedaten
+        models: Dictionary {Modellname: Modell}
+        model_features: Dictionary {Modellname: Liste der Features}, siehe validate_features
+        target: Zielvariable. Ist sie vorhanden, werden zusätzlich die Residuen berechnet
+
+    Returns:
+        DataFrame mit landkreis_id (falls vorhanden) sowie je Modell 'prognose_<Modell>'
+        und ggf. 'residuum_<Modell>'. Zeilen mit fehlenden Features erhalten NaN
+    """
+    result = pd.DataFrame(index=df.index)
+    if id_column in df.columns:
+        result[id_column] = df[id_column]
+
+    for name, model in models.items():
+        # Zeilen mit fehlenden Features erhalten keine Prognose
+        X = df[model_features[name]]
+        complete = X.notna().all(axis=1).to_numpy()
+        prediction = np.full(len(df), np.nan)
+        if complete.any():
+            prediction[complete] = model.predict(X[complete])
+        result[f'prognose_{name}'] = prediction
+        if target in df.columns:
+            result[f'residuum_{name}'] = df[target] - prediction
+    return result
+
+
+def score_table(input_path: str, model_paths: list, output_path: str = None,
+                chunksize: int = 100000, target: str = y_label, strict: bool = True, skipped: dict = None):
+    """
+    Wendet mehrere Modelle in einem einzigen Durchlauf auf eine Tabelle an.
+
+    Die Eingabe wird blockweise und nur mit den benötigten Spalten gelesen, jeder Block wird mit
+    allen Modellen bewertet. Die Ergebnisse werden blockweise geschrieben (CSV oder Parquet,
+    abhängig von der Dateiendung von output_path).
+
+    Args:
+        input_path: Eingabedatei (.csv oder .parquet, z.B. scoring_data)
+        model_paths: Liste der Modelldateien
+        output_path: Ausgabedatei. Bei None wird das Ergebnis als DataFrame zurückgegeben
+        chunksize: Anzahl Zeilen je Block
+        target: Zielvariable für die Residuen
+        strict: Siehe validate_features
+        skipped: Optionales Dictionary, in das die übersprungenen Modelle mit Grund eingetragen werden
+
+    Returns:
+        DataFrame mit den Prognosen (ohne output_path) bzw. Pfad der Ausgabedatei
+    """
+    models = {get_model_name(path): load_model(path) for path in model_paths}
+    columns = read_table_columns(input_path)
+    model_features, incompatible = validate_features(models, columns, strict=strict)
+    if skipped is not None:
+        skipped.update(incompatible)
+    if not model_features:
+        raise ValueError(f"Keines der Modelle ist auf {input_path} anwendbar: {incompatible}")
+    models = {name: models[name] for name in model_features}
+
+    # Nur Spalten lesen, die für die Prognosen benötigt werden
+    needed = {f for names in model_features.values() for f in names} | {id_column, target}
+    usecols = [col for col in columns if col in needed]
+
+    chunks = []
+    writer = None
+    try:
+        for i, chunk in enumerate(iter_table_chunks(input_path, usecols, chunksize)):
+            scored = score_frame(chunk, models, model_features, target)
+            if output_path is None:
+                chunks.append(scored)
+            elif output_path.endswith('.parquet'):
+                table = pa.Table.from_pandas(scored, preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(output_path, table.schema, compression='zstd')
+                writer.write_table(table)
+            else:
+                scored.to_csv(output_path, mode='w' if i == 0 else 'a', header=(i == 0), index=False, encoding='utf-8')
+    finally:
+        if writer is not None:
+            writer.close()
+
+    if output_path is None:
+        return pd.concat(chunks, ignore_index=True)
+    return output_path
+
+
+def main(input_path: str, models: list, output: str, chunksize: int, strict: bool):
+    """
+    Bewertet eine Tabelle mit den angegebenen bzw. allen gespeicherten Modellen.
+    """
+    # Mehrfach angegebene Modelle nur einmal anwenden
+    model_paths = list(dict.fromkeys(os.path.abspath(path) for path in (models or find_models())))
+    if not model_paths:
+        raise SystemExit(f"Keine Modelle in {root_models} gefunden")
+    if not os.path.exists(input_path):
+        raise SystemExit(f"Eingabedatei {input_path} nicht gefunden, sie wird von main.py erzeugt")
+
+    skipped = {}
+    result = score_table(input_path, model_paths, output_path=output, chunksize=chunksize, strict=strict, skipped=skipped)
+    for name, reason in skipped.items():
+        print(f"{name}: übersprungen, {reason}")
+    if output is None:
+        print(result.to_string(index=False))
+    else:
+        print(f"{len(model_paths) - len(skipped)} Modelle angewendet, Ergebnis in {output}")
+
+
+def parse_args() -> argparse.Namespace:
+    """
+    Liest die Kommandozeilenargumente.
+    """
+    parser = argparse.ArgumentParser(description="Anwendung der gespeicherten Regressionsmodelle auf neue Daten")
+    parser.add_argument('input_path', metavar='EINGABE', nargs='?', default=default_input,
+                        help="CSV- oder Parquet-Datei mit den Features (Standard: data/processed/scoring_data.parquet)")
+    parser.add_argument('--models', nargs='+', metavar='MODELL', help=f"Modelldateien (Standard: alle .joblib-Dateien in {root_models})")
+    parser.add_argument('--output', metavar='AUSGABE', help="Ausgabedatei (.csv oder .parquet), ohne Angabe Ausgabe auf der Konsole")
+    parser.add_argument('--chunksize', type=int, default=100000, help="Anzahl Zeilen je Block")
+    parser.add_argument('--strict', action=argparse.BooleanOptionalAction, default=True,
+                        help="Nur Modelle mit Features aus data_modelling_utils.features zulassen (Standard), "
+                             "mit --no-strict auch Modelle mit weiteren Features, sofern diese in den Eingabedaten vorhanden sind")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    main(**vars(parse_args()))
@@ -0,0 +1,119 @@
+import os
+import pandas as pd
+import pyarrow.feather as feather
+import pyarrow.parquet as pq
+
+
+# Unterstützte Speicherformate und ihre Dateiendungen
+storage_formats = {
+    'parquet': '.parquet', # spaltenorientiert, komprimiert
+    'feather': '.feather', # Arrow IPC, memory-mapped lesbar
+    'csv': '.csv'          # Textformat, nur noch als Export
+}
+
+# Standardformat für Zwischen- und Endergebnisse
+default_format = 'parquet'
+
+# Komprimierung je Format
+compression = {
+    'parquet': 'zstd',
+    'feather': 'lz4'
+}
+
+
+def get_table_path(root: str, name: str, fmt: str = default_format) -> str:
+    """
+    Liefert den Dateipfad eines gespeicherten Datensatzes.
+
+    Args:
+        root: Verzeichnis des Datensatzes (z.B. root_interim)
+        name: Name des Datensatzes ohne Dateiendung (z.B. 'kfz')
+        fmt: Speicherformat, siehe storage_formats
+
+    Returns:
+        Pfad zur Datei
+    """
+    if fmt not in storage_formats:
+        raise ValueError(f"Unbekanntes Speicherformat '{fmt}', erlaubt sind {list(storage_formats)}")
+    return os.path.join(root, name + storage_formats[fmt])
+
+
+def write_table(df: pd.DataFrame, root: str, name: str, fmt: str = default_format, csv_export: bool = False) -> str:
+    """
+    Speichert einen DataFrame typisiert und komprimiert im gewählten Format.
+
+    Im Gegensatz zu CSV bleiben Datentypen wie Int64 oder die landkreis_id als Text
+    beim Zurücklesen erhalten. Der Index wird nicht gespeichert.
+
+    Args:
+        df: Zu speichernder DataFrame
+        root: Zielverzeichnis
+        name: Name des Datensatzes ohne Dateiendung
+        fmt: Speicherformat, siehe storage_formats
+        csv_export: Wenn True, wird zusätzlich eine CSV-Datei geschrieben
+
+    Returns:
+        Pfad zur geschriebenen Datei im gewählten Format
+    """
+    path = get_table_path(root, name, fmt)
+    os.makedirs(root, exist_ok=True)
+
+    if fmt == 'parquet':
+        df.to_parquet(path, engine='pyarrow', compression=compression['parquet'], index=False)
+    elif fmt == 'feather':
+        df.reset_index(drop=True).to_feather(path, compression=compression['feather'])
+    else:
+        df.to_csv(path, index=False, encoding='utf-8')
+
+    if csv_export and fmt != 'csv':
+        df.to_csv(get_table_path(root, name, 'csv'), index=False, encoding='utf-8')
+
+    return path
+
+
+def find_table_format(root: str, name: str) -> str:
+    """
+    Ermittelt das Format, in dem ein Datensatz vorliegt. Spaltenorientierte Formate werden bevorzugt.
+
+    Args:
+        root: Verzeichnis des Datensatzes
+        name: Name des Datensatzes ohne Dateiendung
+
+    Returns:
+        Name des gefundenen Formats
+    """
+    for fmt in storage_formats:
+        if os.path.exists(get_table_path(root, name, fmt)):
+            return fmt
+    raise FileNotFoundError(f"Datensatz '{name}' nicht in {root} gefunden")
+
+
+def read_table(root: str, name: str, columns: list = None, fmt: str = None) -> pd.DataFrame:
+    """
+    Liest einen gespeicherten Datensatz, optional beschränkt auf einzelne Spalten.
+
+    Parquet- und Feather-Dateien werden memory-mapped gelesen und nur die angeforderten
+    Spalten werden dekodiert. Für CSV werden die Spalten per usecols beschränkt.
+
+    Args:
+        root: Verzeichnis des Datensatzes
+        name: Name des Datensatzes ohne Dateiendung
+        columns: Liste der zu lesenden Spalten. Bei None werden alle Spalten gelesen
+        fmt: Speicherformat. Bei None wird das vorhandene Format automatisch gewählt
+
+    Returns:
+        DataFrame mit den gelesenen Spalten
+    """
+    if fmt is None:
+        fmt = find_table_format(root, name)
+    path = get_table_path(root, name, fmt)
+
+    if fmt == 'parquet':
+        table = pq.read_table(path, columns=columns, memory_map=True)
+    elif fmt == 'feather':
+        table = feather.read_table(path, columns=columns, memory_map=True)
+    else:
+        return pd.read_csv(path, usecols=columns)
+
+    # Pandas-Metadaten in der Datei stellen die ursprünglichen Datentypen wieder her
+    return table.to_pandas()
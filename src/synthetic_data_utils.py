@@ -0,0 +1,349 @@
+import os
+import argparse
+import numpy as np
+import pandas as pd
+
+from data_preparation_utils import root_raw, data_kfz, data_pop, data_vee, data_svu, get_vintage_files
+from region_key_utils import crosswalk_path
+
+
+# Antriebe und Emissionsgruppen der KFZ-Daten (Code -> Bezeichnung) in der Reihenfolge der Rohdaten
+kfz_antriebe = {
+    'KS-BENZIN': 'Benzin',
+    'KS-DIESEL': 'Diesel',
+    'KS-GAS': 'Gas',
+    'KS-ELEKTRO': 'Elektro',
+    'KS-HYBRID': 'Hybrid',
+    'KS-PIH': 'Plug-in-Hybrid',
+    'KS-SONST': 'Sonstige'
+}
+kfz_emissionsgruppen = {
+    'PKW-EURO1': 'Euro 1',
+    'PKW-EURO2': 'Euro 2',
+    'PKW-EURO3': 'Euro 3',
+    'PKW-EURO4': 'Euro 4',
+    'PKW-EURO5': 'Euro 5',
+    'PKW-EURO6-R': 'Euro 6 (ohne 6d und 6d-temp)',
+    'PKW-EURO6DT': 'Euro 6d-temp',
+    'PKW-EURO6D': 'Euro 6d',
+    'PKW-SONST': 'Sonstige'
+}
+
+# Länder; Hamburg und Berlin bestehen nur aus einem Kreis (LL000), der in den Regionalatlas-Daten
+# nur auf Landesebene ('02', '11') vorkommt und über fix_missing_values ergänzt wird
+laender = ['01', '03', '04', '05', '06', '07', '08', '09', '10', '12', '13', '14', '15', '16']
+stadtstaaten = {'02': 'Hamburg', '11': 'Berlin'}
+
+# Altersgruppen und Geschlecht der Bevölkerungsdaten (Code -> Bezeichnung, '' für Insgesamt)
+pop_altersgruppen = {'': 'Insgesamt', 'ALT000B25': 'unter 25 Jahre', 'ALT025B45': '25 bis unter 45 Jahre',
+                     'ALT045B65': '45 bis unter 65 Jahre', 'ALT065UM': '65 Jahre und mehr'}
+pop_geschlecht = {'': 'Insgesamt', 'GESM': 'männlich', 'GESW': 'weiblich'}
+
+# Bezeichnung von Landkreisen, die in einer Gebietsreform aufgegangen sind
+gebietsreform_suffix = ' (bis 03.09.2011)'
+
+# Einrückung der Kreisbezeichnungen in den Regionalatlas- und Mikrozensus-Daten
+kreis_indent = '      '
+
+
+def make_regions(n_regions: int, gebietsreform_rate: float = 0.02) -> pd.DataFrame:
+    """
+    Erzeugt Kreise mit fünfstelligen Kreisschlüsseln (LLRKK) über alle Länder.
+
+    Args:
+        n_regions: Anzahl der Kreise (einschließlich Hamburg und Berlin)
+        gebietsreform_rate: Anteil der Kreise, die nur als Altkreise mit Gebietsreform-Bezeichnung vorkommen.
+            Die Altkreise und ihre Nachfolger stammen aus der Zuordnung in data/external (höchstens
+            so viele Altkreise, wie dort aufgeführt sind), damit region_key_utils.apply_crosswalk greift
+
+    Returns:
+        DataFrame mit den Spalten 'code', 'land', 'label' und 'gebietsreform'
+    """
+    n_kreise = n_regions - len(stadtstaaten)
+    capacity = len(laender) * 10 * 99
+    if not 0 <= n_kreise <= capacity:
+        raise ValueError(f"n_regions muss zwischen {len(stadtstaaten)} und {capacity + len(stadtstaaten)} liegen")
+
+    i = np.arange(n_kreise)
+    land = np.array(laender)[i % len(laender)]
+    position = i // len(laender)
+    codes = [f'{l}{r}{k:02d}' for l, r, k in zip(land, position // 99, position % 99 + 1)]
+    labels = [f'Kreis {c}, Landkreis' if j % 2 == 0 else f'Stadt {c}, kreisfreie Stadt' for j, c in enumerate(codes)]
+
+    regions = pd.DataFrame({'code': codes, 'land': land, 'label': labels})
+    regions = pd.concat([
+        pd.DataFrame({'code': [f'{l}000' for l in stadtstaaten], 'land': list(stadtstaaten), 'label': list(stadtstaaten.values())}),
+        regions
+    ], ignore_index=True)
+
+    # Altkreise einer Gebietsreform und ihre Nachfolger aus der Zuordnung ersetzen die letzten Kreise
+    regions['gebietsreform'] = False
+    crosswalk = pd.read_csv(crosswalk_path, sep=';', dtype=str).drop_duplicates('alt_id')
+    crosswalk = crosswalk.head(int(round(gebietsreform_rate * n_kreise)))
+    if len(crosswalk):
+        old = pd.DataFrame({'code': crosswalk['alt_id'], 'label': crosswalk['alt_name'] + gebietsreform_suffix,
+                            'gebietsreform': True})
+        new = pd.DataFrame({'code': crosswalk['neu_id'], 'label': crosswalk['neu_name'],
+                            'gebietsreform': False}).drop_duplicates('code')
+        replacement = pd.concat([old, new], ignore_index=True)
+        replacement['land'] = replacement['code'].str[:2]
+
+        synthetic = regions[~regions['code'].isin(replacement['code'])]
+        n_keep = len(regions) - len(replacement)
+        if n_keep < len(stadtstaaten):
+            raise ValueError(f"n_regions ist zu klein für {len(old)} Altkreise mit Nachfolgern")
+        regions = pd.concat([synthetic.head(n_keep), replacement], ignore_index=True)
+    return regions.sort_values('code', ignore_index=True)
+
+
+def with_placeholders(values: np.ndarray, placeholders: list, rate: float, rng: np.random.Generator) -> np.ndarray:
+    """
+    Ersetzt zufällig einen Anteil rate der Werte durch GENESIS-Platzhalter.
+    """
+    values = values.astype(object)
+    mask = rng.random(len(values)) < rate
+    values[mask] = rng.choice(placeholders, size=mask.sum())
+    return values
+
+
+def make_kfz_frame(regions: pd.DataFrame, year: int, n_antriebe: int = len(kfz_antriebe),
+                   n_emissionsgruppen: int = len(kfz_emissionsgruppen), placeholder_rate: float = 0.02,
+                   rng: np.random.Generator = None) -> pd.DataFrame:
+    """
+    Erzeugt KFZ-Bestandsdaten im Layout der GENESIS-Flatfile 46251-0021 (22 Spalten).
+
+    Je Kreis gibt es alle Kombinationen aus Antrieb und Emissionsgruppe einschließlich der Zeilen
+    'Insgesamt' (leerer Code). Bei mehr Antrieben oder Emissionsgruppen als in kfz_antriebe bzw.
+    kfz_emissionsgruppen werden zusätzliche Codes ('KS-ANTRIEB8', 'PKW-GRUPPE10', ...) erzeugt.
+
+    Args:
+        regions: Kreise aus make_regions
+        year: Jahrgang (Stichtag 1. Januar)
+        n_antriebe: Anzahl der Antriebe
+        n_emissionsgruppen: Anzahl der Emissionsgruppen
+        placeholder_rate: Anteil der Werte mit Platzhalter '-'
+        rng: Zufallsgenerator
+
+    Returns:
+        DataFrame mit den Spalten der Rohdatei
+    """
+    rng = rng or np.random.default_rng()
+    antriebe = list(kfz_antriebe.items())[:n_antriebe] + \
+        [(f'KS-ANTRIEB{i + 1}', f'Antrieb {i + 1}') for i in range(len(kfz_antriebe), n_antriebe)]
+    emissionen = list(kfz_emissionsgruppen.items())[:n_emissionsgruppen] + \
+        [(f'PKW-GRUPPE{i + 1}', f'Gruppe {i + 1}') for i in range(len(kfz_emissionsgruppen), n_emissionsgruppen)]
+    antriebe = [('', 'Insgesamt')] + antriebe
+    emissionen = [('', 'Insgesamt')] + emissionen
+
+    # Kreuzprodukt Kreis × Antrieb × Emissionsgruppe über Indizes
+    n_r, n_a, n_e = len(regions), len(antriebe), len(emissionen)
+    r_idx = np.repeat(np.arange(n_r), n_a * n_e)
+    a_idx = np.tile(np.repeat(np.arange(n_a), n_e), n_r)
+    e_idx = np.tile(np.arange(n_e), n_r * n_a)
+    n = len(r_idx)
+
+    counts = rng.integers(0, 20000, n)
+    values = with_placeholders(counts, ['-'], placeholder_rate, rng)
+    antrieb_codes = np.array([code for code, _ in antriebe], dtype=object)
+    emission_codes = np.array([code for code, _ in emissionen], dtype=object)
+
+    return pd.DataFrame({
+        'statistics_code': '46251',
+        'statistics_label': 'Statistik des Kraftfahrzeug- und Anhängerbestandes',
+        'time_code': 'STAG',
+        'time_label': 'Stichtag',
+        'time': f'{year}-01-01',
+        '1_variable_code': 'KREISE',
+        '1_variable_label': 'Kreise',
+        # Kreisschlüssel ohne führende Nullen wie in der Originaldatei
+        '1_variable_attribute_code': regions['code'].str.lstrip('0').to_numpy()[r_idx],
+        '1_variable_attribute_label': regions['label'].to_numpy()[r_idx],
+        '2_variable_code': 'KSTAT1',
+        '2_variable_label': 'Kraftstoffarten',
+        '2_variable_attribute_code': np.where(antrieb_codes[a_idx] == '', None, antrieb_codes[a_idx]),
+        '2_variable_attribute_label': np.array([label for _, label in antriebe], dtype=object)[a_idx],
+        '3_variable_code': 'EMIGR1',
+        '3_variable_label': 'Emissionsgruppen',
+        '3_variable_attribute_code': np.where(emission_codes[e_idx] == '', None, emission_codes[e_idx]),
+        '3_variable_attribute_label': np.array([label for _, label in emissionen], dtype=object)[e_idx],
+        'value': values,
+        'value_unit': 'Anzahl',
+        'value_variable_code': 'PKW001',
+        'value_variable_label': 'Personenkraftwagen',
+        'value_q': np.where(rng.random(n) < 0.4, 'e', None)
+    })
+
+
+def make_region_rows(regions: pd.DataFrame) -> pd.DataFrame:
+    """
+    Liefert die Gebietszeilen der Regionalatlas- und Mikrozensus-Daten: Deutschland, Länder
+    (einschließlich der Stadtstaaten) und Kreise ohne Stadtstaaten und Altkreise.
+    """
+    kreise = regions[~regions['gebietsreform'] & ~regions['land'].isin(list(stadtstaaten))]
+    land_codes = sorted(set(laender) | set(stadtstaaten))
+    return pd.DataFrame({
+        'code': ['DG'] + land_codes + kreise['code'].tolist(),
+        'label': ['Deutschland'] + [f'  {stadtstaaten.get(l, "Land " + l)}' for l in land_codes]
+                 + (kreis_indent + kreise['label']).tolist()
+    })
+
+
+def make_regionalatlas_frame(regions: pd.DataFrame, year: int, value_column: str, low: float, high: float,
+                             decimals: int, placeholders: list, placeholder_rate: float = 0.02,
+                             missing_rate: float = 0.01, rng: np.random.Generator = None) -> pd.DataFrame:
+    """
+    Erzeugt Daten im Layout der Regionalatlas-Flatfiles (z.B. AI-S-01, AI013-3) mit 10 Spalten.
+
+    Args:
+        regions: Kreise aus make_regions
+        year: Jahrgang
+        value_column: Name der Wertspalte
+        low, high: Wertebereich der gleichverteilten Werte
+        decimals: Nachkommastellen, Dezimaltrennzeichen ist das Komma
+        placeholders: Platzhalter für fehlende Werte (z.B. ['-', '.'])
+        placeholder_rate: Anteil der Werte mit Platzhalter
+        missing_rate: Anteil der Kreise, die in der Datei fehlen
+        rng: Zufallsgenerator
+
+    Returns:
+        DataFrame mit den Spalten der Rohdatei
+    """
+    rng = rng or np.random.default_rng()
+    rows = make_region_rows(regions)
+    rows = rows[(rows['code'].str.len() < 5) | (rng.random(len(rows)) >= missing_rate)]
+
+    values = np.round(rng.uniform(low, high, len(rows)), decimals)
+    text = np.char.replace(np.char.mod(f'%.{decimals}f', values), '.', ',') if decimals else values.astype(int).astype(str)
+
+    return pd.DataFrame({
+        'Statistik_Code': '99910',
+        'Statistik_Label': 'Regionalatlas Deutschland',
+        'Zeit_Code': 'JAHR',
+        'Zeit_Label': 'Jahr',
+        'Zeit': str(year),
+        '1_Merkmal_Code': 'KREISE',
+        '1_Merkmal_Label': 'Kreise und kreisfreie Städte',
+        '1_Auspraegung_Code': rows['code'].to_numpy(),
+        '1_Auspraegung_Label': rows['label'].to_numpy(),
+        value_column: with_placeholders(text, placeholders, placeholder_rate, rng)
+    })
+
+
+def make_pop_frame(regions: pd.DataFrame, year: int, placeholder_rate: float = 0.02,
+                   rng: np.random.Generator = None) -> pd.DataFrame:
+    """
+    Erzeugt Bevölkerungsdaten im Layout der Mikrozensus-Flatfile 12211-Z-03 (18 Spalten).
+    Je Gebiet gibt es alle Kombinationen aus Altersgruppe und Geschlecht einschließlich 'Insgesamt'.
+    """
+    rng = rng or np.random.default_rng()
+    rows = make_region_rows(regions)
+    alter = list(pop_altersgruppen.items())
+    geschlecht = list(pop_geschlecht.items())
+    n_g, n_a, n_s = len(rows), len(alter), len(geschlecht)
+
+    g_idx = np.repeat(np.arange(n_g), n_a * n_s)
+    a_idx = np.tile(np.repeat(np.arange(n_a), n_s), n_g)
+    s_idx = np.tile(np.arange(n_s), n_g * n_a)
+    alter_codes = np.array([code or None for code, _ in alter], dtype=object)
+    geschlecht_codes = np.array([code or None for code, _ in geschlecht], dtype=object)
+
+    # Bevölkerung in Tausend, Teilgruppen mit Platzhaltern '/' (zu wenige Fälle) und '-'
+    values = rng.integers(5, 500, len(g_idx)).astype(str)
+    is_total = (a_idx == 0) & (s_idx == 0)
+    values = np.where(is_total, values, with_placeholders(values, ['/', '-'], placeholder_rate, rng))
+
+    return pd.DataFrame({
+        'Statistik_Code': '12211',
+        'Statistik_Label': 'Grundprogramm des Mikrozensus',
+        'Zeit_Code': 'JAHR',
+        'Zeit_Label': 'Jahr',
+        'Zeit': str(year),
+        '1_Merkmal_Code': 'KREISE',
+        '1_Merkmal_Label': 'Kreise und kreisfreie Städte',
+        '1_Auspraegung_Code': rows['code'].to_numpy()[g_idx],
+        '1_Auspraegung_Label': rows['label'].to_numpy()[g_idx],
+        '2_Merkmal_Code': 'ALTGR01',
+        '2_Merkmal_Label': 'Altersgruppen (unter 25, 25-45,45-65, 65 und älter)',
+        '2_Auspraegung_Code': alter_codes[a_idx],
+        '2_Auspraegung_Label': np.array([label for _, label in alter], dtype=object)[a_idx],
+        '3_Merkmal_Code': 'GES',
+        '3_Merkmal_Label': 'Geschlecht',
+        '3_Auspraegung_Code': geschlecht_codes[s_idx],
+        '3_Auspraegung_Label': np.array([label for _, label in geschlecht], dtype=object)[s_idx],
+        'BEVMZ11__Bevoelkerung_am_Hauptwohnort__1000': values
+    })
+
+
+def generate_raw_data(root: str = root_raw, n_regions: int = 400, years: list = None,
+                      n_antriebe: int = len(kfz_antriebe), n_emissionsgruppen: int = len(kfz_emissionsgruppen),
+                      placeholder_rate: float = 0.02, gebietsreform_rate: float = 0.02,
+                      sources: list = None, overwrite: bool = False, seed: int = 42) -> dict:
+    """
+    Schreibt synthetische Rohdaten im Layout der vier GENESIS-Quellen.
+
+    Ohne years werden die Dateinamen aus data_preparation_utils (data_kfz, ...) verwendet, mit years
+    je Jahrgang die Dateinamen aus vintage_file_templates (für main.py --years).
+
+    Args:
+        root: Zielverzeichnis
+        n_regions: Anzahl der Kreise
+        years: Liste der Jahrgänge oder None
+        n_antriebe: Anzahl der Antriebe (main.py erwartet die 7 Antriebe aus kfz_antriebe)
+        n_emissionsgruppen: Anzahl der Emissionsgruppen (main.py erwartet die 9 aus kfz_emissionsgruppen)
+        placeholder_rate: Anteil der Werte mit Platzhaltern
+        gebietsreform_rate: Anteil der Altkreise mit Gebietsreform-Bezeichnung in den KFZ-Daten
+        sources: Liste der zu schreibenden Quellen ('kfz', 'pop', 'vee', 'svu'), None für alle
+        overwrite: Wenn False, werden vorhandene Dateien nicht überschrieben
+        seed: Startwert des Zufallsgenerators
+
+    Returns:
+        Dictionary {Jahrgang bzw. None: {Quelle: Dateipfad}}
+    """
+    rng = np.random.default_rng(seed)
+    regions = make_regions(n_regions, gebietsreform_rate)
+    sources = sources or ['kfz', 'pop', 'vee', 'svu']
+    os.makedirs(root, exist_ok=True)
+
+    builders = {
+        'kfz': lambda year: make_kfz_frame(regions, year, n_antriebe, n_emissionsgruppen, placeholder_rate, rng),
+        'pop': lambda year: make_pop_frame(regions, year, placeholder_rate, rng),
+        'vee': lambda year: make_regionalatlas_frame(regions, year, 'ID0002__Verfuegbares_Einkommen_je_EW__EUR',
+                                                     17000, 30000, 0, ['-', '.'], placeholder_rate, rng=rng),
+        'svu': lambda year: make_regionalatlas_frame(regions, year, 'AI1303__Strassenverkehrsunfaelle_je_10.000_Kfz__Anzahl',
+                                                     40, 120, 1, ['.'], placeholder_rate, rng=rng)
+    }
+    encodings = {'kfz': 'utf-8', 'pop': 'ISO-8859-1', 'vee': 'ISO-8859-1', 'svu': 'ISO-8859-1'}
+
+    written = {}
+    for year in (years or [None]):
+        if year is None:
+            files = {name: os.path.join(root, file) for name, file in
+                     zip(['kfz', 'pop', 'vee', 'svu'], [data_kfz, data_pop, data_vee, data_svu])}
+        else:
+            files = get_vintage_files(year, root)
+        for source in sources:
+            if os.path.exists(files[source]) and not overwrite:
+                print(f"Datei vorhanden, wird nicht überschrieben: {files[source]}")
+                continue
+            df = builders[source](year or 2020)
+            df.to_csv(files[source], sep=';', index=False, encoding=encodings[source])
+        written[year] = {source: files[source] for source in sources}
+    return written
+
+
+def parse_args() -> argparse.Namespace:
+    """
+    Liest die Kommandozeilenargumente.
+    """
+    parser = argparse.ArgumentParser(description="Synthetische Rohdaten im Layout der GENESIS-Flatfiles erzeugen")
+    parser.add_argument('--root', default=root_raw, help="Zielverzeichnis (Standard: data/raw)")
+    parser.add_argument('--n-regions', dest='n_regions', type=int, default=400, help="Anzahl der Kreise")
+    parser.add_argument('--years', nargs='+', type=int, metavar='JAHR', help="Jahrgänge (Dateinamen für main.py --years)")
+    parser.add_argument('--sources', nargs='+', choices=['kfz', 'pop', 'vee', 'svu'], help="Nur diese Quellen schreiben")
+    parser.add_argument('--overwrite', action='store_true', help="Vorhandene Dateien überschreiben")
+    parser.add_argument('--seed', type=int, default=42, help="Startwert des Zufallsgenerators")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    generate_raw_data(**vars(parse_args()))